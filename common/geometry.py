@@ -0,0 +1,105 @@
+"""
+Geometry of the graphic items of footprints.
+"""
+
+import math
+from typing import Optional, Tuple
+
+Point = Tuple[float, float]
+
+
+def arcCenter(start: Point, mid: Point, end: Point) -> Optional[Point]:
+    """
+    Returns the center of the circle through the three points of an arc, or None
+    if the points are on a straight line.
+
+    If start and end are the same point, the arc is a full circle through mid.
+    """
+    (p1x, p1y) = start
+    (p2x, p2y) = mid
+    (p3x, p3y) = end
+
+    if math.sqrt((p1x - p3x)**2 + (p1y - p3y)**2) < 1e-7:
+        # start and end points match --> center is half way between
+        # start(=end) and mid
+        return (0.5 * (p1x + p2x), 0.5 * (p1y + p2y))
+
+    # make square names
+    p1x_2 = p1x * p1x
+    p1y_2 = p1y * p1y
+    p2x_2 = p2x * p2x
+    p2y_2 = p2y * p2y
+    p3x_2 = p3x * p3x
+    p3y_2 = p3y * p3y
+
+    # Calculate coordinates of the Center (rx,ry) from the three points
+    # using formula found on http://ambrsoft.com/TrigoCalc/Circle3D.htm
+    A = 2 * (p1x * (p2y - p3y) - p1y * (p2x - p3x) + p2x * p3y - p3x * p2y)
+    if A == 0:
+        return None
+    rx = (
+        ((p1x_2 + p1y_2) * (p2y - p3y))
+        + ((p2x_2 + p2y_2) * (p3y - p1y))
+        + ((p3x_2 + p3y_2) * (p1y - p2y))
+    ) / A
+    ry = (
+        ((p1x_2 + p1y_2) * (p3x - p2x))
+        + ((p2x_2 + p2y_2) * (p1x - p3x))
+        + ((p3x_2 + p3y_2) * (p2x - p1x))
+    ) / A
+    return (rx, ry)
+
+
+def _ccwAngle(a: float, b: float) -> float:
+    # angle from a to b in positive direction, in [0, 2 pi)
+    return (b - a) % (2 * math.pi)
+
+
+def arcBoundingBox(start: Point, mid: Point, end: Point) -> Tuple[float, float, float, float]:
+    """
+    Returns the exact bounds (xmin, ymin, xmax, ymax) of the arc from start
+    through mid to end.
+
+    These are the bounds of the end points and of the points of the circle at
+    0, 90, 180 and 270 degrees that are part of the arc.
+    """
+    xs = [start[0], end[0]]
+    ys = [start[1], end[1]]
+
+    center = arcCenter(start, mid, end)
+    if center is None:
+        # a straight line
+        xs.append(mid[0])
+        ys.append(mid[1])
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    (cx, cy) = center
+    r = math.hypot(start[0] - cx, start[1] - cy)
+
+    if math.dist(start, end) < 1e-7:
+        # a full circle
+        return (cx - r, cy - r, cx + r, cy + r)
+
+    a_start = math.atan2(start[1] - cy, start[0] - cx)
+    a_mid = math.atan2(mid[1] - cy, mid[0] - cx)
+    a_end = math.atan2(end[1] - cy, end[0] - cx)
+
+    # the arc in positive direction from a_first, mid is part of it
+    sweep = _ccwAngle(a_start, a_end)
+    if _ccwAngle(a_start, a_mid) <= sweep:
+        a_first = a_start
+    else:
+        a_first = a_end
+        sweep = 2 * math.pi - sweep
+
+    for (angle, x, y) in (
+        (0.0, cx + r, cy),
+        (0.5 * math.pi, cx, cy + r),
+        (math.pi, cx - r, cy),
+        (1.5 * math.pi, cx, cy - r),
+    ):
+        if _ccwAngle(a_first, angle) <= sweep:
+            xs.append(x)
+            ys.append(y)
+
+    return (min(xs), min(ys), max(xs), max(ys))
@@ -4,21 +4,25 @@ Library for handling KiCad's footprint files (`*.kicad_mod`).
 
 import copy
 import math
+import operator
 import time
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
 
 import sexpr
+import snapshot
 from boundingbox import BoundingBox
+from geometry import arcBoundingBox, arcCenter
+
+if TYPE_CHECKING:
+    from kicad_mod_table import PadTable
 
 
 # Rotate a point by given angle (in degrees)
 def _rotatePoint(point: Dict[str, float], degrees: float) -> Dict[str, float]:
 
-    # @todo Does not copy! Only reference objects are compiled but not the real object!
-    # Create a new point (copy)
-    p = {}
-    for key in point:
-        p[key] = point[key]
+    # Create a new point (copy), a dict or a Point
+    p = copy.copy(point)
 
     radians = degrees * math.pi / 180
 
@@ -37,12 +41,8 @@ def _rotatePoint(point: Dict[str, float], degrees: float) -> Dict[str, float]:
 # Move point by certain offset
 def _movePoint(point: Dict[str, float], offset: Dict[str, float]) -> Dict[str, float]:
 
-    # @todo Does not copy! Only reference objects are compiled but not the real object!
-    # Copy all points
-
-    p = {}
-    for key in point:
-        p[key] = point[key]
+    # Copy the point, a dict or a Point
+    p = copy.copy(point)
 
     p["x"] += offset["x"]
     p["y"] += offset["y"]
@@ -50,6 +50,379 @@ def _movePoint(point: Dict[str, float], offset: Dict[str, float]) -> Dict[str, f
     return p
 
 
+class FootprintElement(MutableMapping):
+    """
+    Base class of the elements of a footprint (pads, lines, texts, ...).
+
+    The values are attributes, e.g. `pad.pos.x`. For code written for the nested
+    dicts that were used before, an element also behaves like a dict of its fields:
+    `pad["pos"]["x"]` is the same value. A field that is not set is a missing key,
+    keys that are no field are kept in a separate dict.
+    """
+
+    __slots__ = ("_extra",)
+
+    # the fields that are keys, in the order of the keys
+    _fields: Tuple[str, ...] = ()
+    _fieldSet: FrozenSet[str] = frozenset()
+    # all slots but _extra
+    _slotNames: Tuple[str, ...] = ()
+    # the keys of the state in snapshots
+    _stateKeys: FrozenSet[str] = frozenset(("_extra",))
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fieldSet = frozenset(cls._fields)
+        cls._slotNames = tuple(
+            name
+            for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get("__slots__", ())
+            if name != "_extra"
+        )
+        cls._stateKeys = frozenset(cls._slotNames + ("_extra",))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fieldSet:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._fieldSet:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._fieldSet:
+            try:
+                delattr(self, key)
+                return
+            except AttributeError:
+                pass
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+            return
+        raise KeyError(key)
+
+    # faster than the methods of Mapping, which handle a KeyError
+    def __contains__(self, key: Any) -> bool:
+        if key in self._fieldSet:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._fieldSet:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __iter__(self) -> Iterator[str]:
+        for name in self._fields:
+            if hasattr(self, name):
+                yield name
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def copy(self) -> "FootprintElement":
+        """
+        Returns a shallow copy, like `dict.copy()`.
+        """
+        return copy.copy(self)
+
+    @property
+    def _snapshotState(self) -> Dict[str, Any]:
+        # the fields that are set
+        state = {}
+        for name in self._slotNames:
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        if self._extra is not None:
+            state["_extra"] = self._extra
+        return state
+
+    @classmethod
+    def _fromSnapshotState(cls, state: Dict[str, Any]) -> "FootprintElement":
+        if (
+            not isinstance(state, dict)
+            or not state.keys() <= cls._stateKeys
+            or not isinstance(state.get("_extra", {}), dict)
+        ):
+            raise snapshot.SnapshotError(f"Invalid {cls.__name__} in snapshot")
+        element = cls.__new__(cls)
+        element._extra = None
+        for (name, value) in state.items():
+            setattr(element, name, value)
+        return element
+
+
+class Point(FootprintElement):
+    """
+    A point, or an empty point without coordinates (e.g. the offset of a drill
+    without offset).
+    """
+
+    __slots__ = ("x", "y")
+    _fields = ("x", "y")
+
+    def __init__(self, x: Optional[float] = None, y: Optional[float] = None):
+        self._extra = None
+        if x is not None:
+            self.x: float = x
+            self.y: float = y
+
+
+class Position(Point):
+    """
+    The position of a pad or text, `lock` is only set for texts.
+    """
+
+    __slots__ = ("orientation", "lock")
+    _fields = ("x", "y", "orientation", "lock")
+
+    def __init__(self, x: float, y: float, orientation: float = 0, lock: Optional[str] = None):
+        self._extra = None
+        self.x = x
+        self.y = y
+        self.orientation: float = orientation
+        if lock is not None:
+            self.lock: str = lock
+
+
+class Point3D(FootprintElement):
+    __slots__ = ("x", "y", "z")
+    _fields = ("x", "y", "z")
+
+    def __init__(self, x: float, y: float, z: float):
+        self._extra = None
+        self.x: float = x
+        self.y: float = y
+        self.z: float = z
+
+
+class Font(FootprintElement):
+    __slots__ = ("thickness", "height", "width", "italic")
+    _fields = ("thickness", "height", "width", "italic")
+
+    def __init__(self, thickness: float = 0, height: float = 0, width: float = 0, italic: bool = False):
+        self._extra = None
+        self.thickness: float = thickness
+        self.height: float = height
+        self.width: float = width
+        self.italic: bool = italic
+
+
+class Text(FootprintElement):
+    """
+    A text or property of the footprint. Its key is the name, e.g.
+    `module.reference["reference"]` is the text of the reference.
+    """
+
+    __slots__ = ("name", "text", "pos", "layer", "font", "hide")
+    _fields = ("pos", "layer", "font", "hide")
+
+    def __init__(
+        self,
+        name: str,
+        text: str,
+        pos: Optional[Position] = None,
+        layer: Optional[str] = None,
+        font: Optional[Font] = None,
+        hide: Optional[bool] = None,
+    ):
+        self._extra = None
+        self.name: str = name
+        self.text: str = text
+        if pos is not None:
+            self.pos: Position = pos
+        if layer is not None:
+            self.layer: str = layer
+        if font is not None:
+            self.font: Font = font
+        if hide is not None:
+            self.hide: bool = hide
+
+    def __getitem__(self, key: str) -> Any:
+        if key == self.name:
+            return self.text
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == self.name:
+            self.text = value
+        else:
+            super().__setitem__(key, value)
+
+    def __contains__(self, key: Any) -> bool:
+        return key == self.name or super().__contains__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == self.name:
+            return self.text
+        return super().get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        yield self.name
+        yield from super().__iter__()
+
+
+class Line(FootprintElement):
+    __slots__ = ("start", "end", "layer", "width")
+    _fields = ("start", "end", "layer", "width")
+
+    def __init__(self, start: Point, end: Point, layer: str, width: float):
+        self._extra = None
+        self.start: Point = start
+        self.end: Point = end
+        self.layer: str = layer
+        self.width: float = width
+
+
+class Rect(Line):
+    __slots__ = ()
+
+
+class Circle(FootprintElement):
+    __slots__ = ("center", "end", "layer", "width")
+    _fields = ("center", "end", "layer", "width")
+
+    def __init__(self, center: Point, end: Point, layer: str, width: float):
+        self._extra = None
+        self.center: Point = center
+        self.end: Point = end
+        self.layer: str = layer
+        self.width: float = width
+
+
+class Poly(FootprintElement):
+    __slots__ = ("points", "layer", "width")
+    _fields = ("points", "layer", "width")
+
+    def __init__(self, points: List[Point], layer: str, width: float):
+        self._extra = None
+        self.points: List[Point] = points
+        self.layer: str = layer
+        self.width: float = width
+
+
+class Arc(FootprintElement):
+    """
+    An arc, `angle` is the angle from start to end in radians.
+    """
+
+    __slots__ = ("start", "end", "mid", "angle", "layer", "width")
+    _fields = ("start", "end", "mid", "angle", "layer", "width")
+
+    def __init__(self, start: Point, end: Point, mid: Point, angle: float, layer: str, width: float):
+        self._extra = None
+        self.start: Point = start
+        self.end: Point = end
+        self.mid: Point = mid
+        self.angle: float = angle
+        self.layer: str = layer
+        self.width: float = width
+
+
+class Drill(FootprintElement):
+    """
+    The drill of a pad. Pads without drill have an empty drill without fields,
+    a drill without size or offset has an empty point.
+    """
+
+    __slots__ = ("offset", "shape", "size")
+    _fields = ("offset", "shape", "size")
+
+    def __init__(self, shape: Optional[str] = None, size: Optional[Point] = None, offset: Optional[Point] = None):
+        self._extra = None
+        if shape is not None:
+            self.offset: Point = offset if offset is not None else Point()
+            self.shape: str = shape
+            self.size: Point = size if size is not None else Point()
+
+
+class Pad(FootprintElement):
+    """
+    A pad. The optional settings (e.g. `clearance`) are an empty dict if they are
+    not set, `options` and `primitives` are only set for custom pads.
+    """
+
+    __slots__ = (
+        "number",
+        "type",
+        "shape",
+        "pos",
+        "size",
+        "layers",
+        "property",
+        "rect_delta",
+        "roundrect_rratio",
+        "drill",
+        "die_length",
+        "clearance",
+        "solder_mask_margin",
+        "solder_paste_margin",
+        "solder_paste_margin_ratio",
+        "zone_connect",
+        "thermal_width",
+        "thermal_gap",
+        "options",
+        "primitives",
+    )
+    _fields = __slots__
+
+    def __init__(self, number: str, type: str, shape: str, pos: Position, size: Point, layers: List[str]):
+        self._extra = None
+        self.number: str = number
+        self.type: str = type
+        self.shape: str = shape
+        self.pos: Position = pos
+        self.size: Point = size
+        self.layers: List[str] = layers
+        self.property: Optional[str] = None
+        self.rect_delta: Union[List[float], Dict] = {}
+        self.roundrect_rratio: Union[float, Dict] = {}
+        self.drill: Drill = Drill()
+        self.die_length: Union[float, Dict] = {}
+        self.clearance: Union[float, Dict] = {}
+        self.solder_mask_margin: Union[float, Dict] = {}
+        self.solder_paste_margin: Union[float, Dict] = {}
+        self.solder_paste_margin_ratio: Union[float, Dict] = {}
+        self.zone_connect: Union[int, Dict] = {}
+        self.thermal_width: Union[float, Dict] = {}
+        self.thermal_gap: Union[float, Dict] = {}
+
+
+class Model(FootprintElement):
+    __slots__ = ("file", "pos", "scale", "rotate")
+    _fields = ("file", "pos", "scale", "rotate")
+
+    def __init__(self, file: str, pos: Point3D, scale: Point3D, rotate: Point3D):
+        self._extra = None
+        self.file: str = file
+        self.pos: Point3D = pos
+        self.scale: Point3D = scale
+        self.rotate: Point3D = rotate
+
+
+# the layer of a graphic item, faster than item["layer"]
+_getLayer = operator.attrgetter("layer")
+
+
 class KicadMod:
     """
     A class to parse KiCad footprint files (.kicad_mod format)
@@ -57,85 +430,185 @@ class KicadMod:
 
     SEXPR_BOARD_FILE_VERSION = 20210108
 
+    # the pad bounds use the pad table (with NumPy) from this number of pads on,
+    # for fewer pads the loop is faster than importing NumPy and building the table
+    PAD_TABLE_MIN_PADS = 100
+
+    # the attributes that are stored in snapshots, all but the caches
+    _SNAPSHOT_ATTRIBUTES = (
+        "filename",
+        "sexpr_data",
+        "name",
+        "version",
+        "generator",
+        "layer",
+        "locked",
+        "description",
+        "tags",
+        "autoplace_cost90",
+        "autoplace_cost180",
+        "clearance",
+        "solder_mask_margin",
+        "solder_paste_margin",
+        "solder_paste_ratio",
+        "attribute",
+        "exclude_from_pos_files",
+        "exclude_from_bom",
+        "reference",
+        "value",
+        "userText",
+        "lines",
+        "rects",
+        "circles",
+        "polys",
+        "arcs",
+        "pads",
+        "models",
+    )
+
     def __init__(self, filename: str=None, data=None):
         self.filename: str = filename
 
+        # parse s-expr
         if data is not None:
-            sexpr_data = data
+            sexpr_data = sexpr.parse_sexp(data, index_heads=True)
         elif filename:
-            # read the s-expression data
-            with open(filename) as f:
-                sexpr_data = f.read()
+            sexpr_data = sexpr.parse_sexp_file(filename, index_heads=True)
         else:
             raise ValueError('Either filename or data must be given.')
 
-        # parse s-expr
-        sexpr_data = sexpr.parse_sexp(sexpr_data)
         self.sexpr_data = sexpr_data
 
         # module name
         self.name: str = str(self.sexpr_data[1])
 
+        # the top level values, with their defaults
+        values = self._getValues(
+            {
+                "version": 0,
+                "generator": "",
+                "layer": "through_hole",
+                "locked": False,
+                "descr": "",
+                "tags": "",
+                "autoplace_cost90": 0,
+                "autoplace_cost180": 0,
+                "clearance": 0,
+                "solder_mask_margin": 0,
+                "solder_paste_margin": 0,
+                "solder_paste_ratio": 0,
+            }
+        )
+
         # file version
-        self.version = self._getValue("version", 0, 2)
+        self.version = values["version"]
 
         # generator
-        self.generator = self._getValue("generator", "", 2)
+        self.generator = values["generator"]
 
         # module layer
-        self.layer = self._getValue("layer", "through_hole", 2)
+        self.layer = values["layer"]
 
         # locked flag
-        self.locked = self._getValue("locked", False, 2)
+        self.locked = values["locked"]
 
         # description
-        self.description = self._getValue("descr", "", 2)
+        self.description = values["descr"]
 
         # tags
-        self.tags = self._getValue("tags", "", 2)
+        self.tags = values["tags"]
 
         # auto place settings
-        self.autoplace_cost90 = self._getValue("autoplace_cost90", 0, 2)
-        self.autoplace_cost180 = self._getValue("autoplace_cost180", 0, 2)
+        self.autoplace_cost90 = values["autoplace_cost90"]
+        self.autoplace_cost180 = values["autoplace_cost180"]
 
         # global footprint clearance settings
-        self.clearance = self._getValue("clearance", 0, 2)
-        self.solder_mask_margin = self._getValue("solder_mask_margin", 0, 2)
-        self.solder_paste_margin = self._getValue("solder_paste_margin", 0, 2)
-        self.solder_paste_ratio = self._getValue("solder_paste_ratio", 0, 2)
+        self.clearance = values["clearance"]
+        self.solder_mask_margin = values["solder_mask_margin"]
+        self.solder_paste_margin = values["solder_paste_margin"]
+        self.solder_paste_ratio = values["solder_paste_ratio"]
 
         # attribute
         self._getAttributes()
 
+        texts = self._getTexts(["reference", "value", "user"])
+
         # reference
-        self.reference = self.getProperty("reference")
+        self.reference = texts["reference"][0] if texts["reference"] else None
 
         # value
-        self.value = self.getProperty("value")
+        self.value = texts["value"][0] if texts["value"] else None
 
         # user text
-        self.userText: List[Dict[str, Any]] = self._getText("user")
+        self.userText: List[Text] = texts["user"]
 
         # lines
-        self.lines: List[Dict[str, Any]] = self._getLines()
+        self.lines: List[Line] = self._getLines()
 
         # rects
-        self.rects = self._getRects()
+        self.rects: List[Rect] = self._getRects()
 
         # circles
-        self.circles = self._getCircles()
+        self.circles: List[Circle] = self._getCircles()
 
         # polygons
-        self.polys = self._getPolys()
+        self.polys: List[Poly] = self._getPolys()
 
         # arcs
-        self.arcs = self._getArcs()
+        self.arcs: List[Arc] = self._getArcs()
 
         # pads
-        self.pads = self._getPads()
+        self.pads: List[Pad] = self._getPads()
 
         # models
-        self.models = self._getModels()
+        self.models: List[Model] = self._getModels()
+
+        self.invalidateCaches()
+
+    def invalidateCaches(self) -> None:
+        """
+        Drop the graphic items by layer and the pad table.
+
+        Adding, removing or replacing lines, rects, circles, polys, arcs and pads
+        is detected automatically, and so is moving one of the graphic items to
+        another layer. Call this after changing pads in place, e.g. after moving
+        or resizing a pad.
+        """
+        self._cache: Dict[Any, Any] = {}
+        self._cacheState: Optional[Tuple[Any, ...]] = None
+
+    def _cached(self, key: Any, build: Callable[..., Any], *args: Any) -> Any:
+        # the cache is only valid for the item lists it was built from
+        lists = (self.lines, self.rects, self.circles, self.polys, self.arcs, self.pads)
+        state = self._cacheState
+        if (
+            state is None
+            or not all(map(operator.is_, state[0], lists))
+            or state[1] != tuple(map(len, lists))
+        ):
+            self._cache = {}
+            self._cacheState = (lists, tuple(map(len, lists)))
+        try:
+            return self._cache[key]
+        except KeyError:
+            result = self._cache[key] = build(*args)
+            return result
+
+    # return the items of a list attribute on the given layer, from an index of all layers
+    def _itemsOnLayer(self, attribute: str, layer: str) -> List[Any]:
+        (layers, index) = self._cached(attribute, self._buildLayerIndex, attribute)
+        if tuple(map(_getLayer, getattr(self, attribute))) != layers:
+            # an item was moved to another layer
+            (layers, index) = self._cache[attribute] = self._buildLayerIndex(attribute)
+        return list(index.get(layer, ()))
+
+    def _buildLayerIndex(self, attribute: str) -> Tuple[Tuple[str, ...], Dict[str, List[Any]]]:
+        items = getattr(self, attribute)
+        layers = tuple(map(_getLayer, items))
+        index: Dict[str, List[Any]] = {}
+        for (item, layer) in zip(items, layers):
+            index.setdefault(layer, []).append(item)
+        return (layers, index)
 
     # check if value exists in any element of data
     def _hasValue(self, data: Iterable[Any], value: str) -> bool:
@@ -172,6 +645,10 @@ class KicadMod:
                     result.append(data)
         return result
 
+    # return the width array of a graphic item, which is part of its stroke since KiCad 7
+    def _getWidth(self, item) -> List[Any]:
+        return sexpr.find_all(sexpr.find(item, "stroke") or item, "width")
+
     # update or create an array
     def _updateCreateArray(self, array, place_after=None):
         # check if array exists
@@ -211,56 +688,74 @@ class KicadMod:
         a = self._getArray(self.sexpr_data, array, max_level=max_level)
         return def_value if not a else a[0][1]
 
-    def _getText(self, which_text) -> List[Any]:
-        result = []
+    # same as _getValue(key, default, 2) for each key and default, in a single pass
+    def _getValues(self, defaults: Dict[str, Any]) -> Dict[str, Any]:
+        # the first array that contains the key, which is the module itself if
+        # it contains the key before any other array does
+        found = {}
+        for item in self.sexpr_data:
+            if isinstance(item, list):
+                for i in item:
+                    if not isinstance(i, list) and i in defaults and i not in found:
+                        found[i] = item
+            elif item in defaults and item not in found:
+                found[item] = self.sexpr_data
+        return {key: found[key][1] if key in found else default for (key, default) in defaults.items()}
+
+    def _getText(self, which_text) -> List[Text]:
+        return self._getTexts([which_text])[which_text]
+
+    # same as _getText() for each of the texts, in a single pass
+    def _getTexts(self, which_texts: List[str]) -> Dict[str, List[Text]]:
+        result: Dict[str, List[Text]] = {which_text: [] for which_text in which_texts}
 
         for propertykey in ["fp_text", "property"]:
-            for text in self._getArray(self.sexpr_data, propertykey):
-                if text[1] == which_text or text[1].lower() == which_text:
-                    text_dict = {}
-                    text_dict[which_text] = text[2]
+            for text in sexpr.find_all(self.sexpr_data, propertykey):
+                which_text = text[1] if text[1] in result else text[1].lower()
+                if which_text not in result:
+                    continue
 
-                    # text position
-                    a = self._getArray(text, "at")[0]
-                    text_dict["pos"] = {"x": a[1], "y": a[2], "orientation": 0, "lock": 'locked'}
-                    if len(a) > 3:
-                        text_dict["pos"]["orientation"] = a[3]
-                        if text_dict["pos"]["orientation"] == 'unlocked':
-                            text_dict["pos"]["lock"] = a[3]
-                    if len(a) > 4 :
-                        text_dict["pos"]["lock"] = a[4]
+                # text position
+                a = sexpr.find_all(text, "at")[0]
+                pos = Position(a[1], a[2], 0, 'locked')
+                if len(a) > 3:
+                    pos.orientation = a[3]
+                    if pos.orientation == 'unlocked':
+                        pos.lock = a[3]
+                if len(a) > 4 :
+                    pos.lock = a[4]
 
-                    # text layer
-                    a = self._getArray(text, "layer")[0]
-                    text_dict["layer"] = a[1]
+                # text layer
+                a = sexpr.find_all(text, "layer")[0]
+                layer = a[1]
 
-                    # text font
-                    font = self._getArray(text, "font")[0]
+                # text font
+                font = sexpr.find(text, "effects", "font")
 
-                    # Some footprints miss out some parameters
-                    text_dict["font"] = {"thickness": 0, "height": 0, "width": 0}
+                # Some footprints miss out some parameters
+                text_font = Font()
 
-                    for pair in font[1:]:
-                        key = pair[0]
-                        data = pair[1:]
+                for pair in font[1:]:
+                    key = pair[0]
+                    data = pair[1:]
 
-                        if key == "thickness":
-                            text_dict["font"]["thickness"] = data[0]
+                    if key == "thickness":
+                        text_font.thickness = data[0]
 
-                        elif key == "size":
-                            text_dict["font"]["height"] = data[0]
-                            text_dict["font"]["width"] = data[1]
+                    elif key == "size":
+                        text_font.height = data[0]
+                        text_font.width = data[1]
 
-                    text_dict["font"]["italic"] = self._hasValue(a, "italic")
+                text_font.italic = self._hasValue(a, "italic")
 
-                    # text hide
-                    text_dict["hide"] = self._hasValue(text, "hide")
+                # text hide
+                hide = self._hasValue(text, "hide")
 
-                    result.append(text_dict)
+                result[which_text].append(Text(which_text, text[2], pos, layer, text_font, hide))
 
         return result
 
-    def getProperty(self, key: str) -> Optional[dict]:
+    def getProperty(self, key: str) -> Optional[Text]:
         """
         Get the footprint's property (aka field) with this key
         """
@@ -283,335 +778,289 @@ class KicadMod:
         return prop[key] if prop else None
 
     def addUserText(self, text: str, params: Dict[str, Any]) -> None:
-        user = {"user": text}
+        user = Text("user", text)
 
         for key in params:
             user[key] = params[key]
 
         self.userText.append(user)
 
-    def _getLines(self, layer: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _getLines(self, layer: Optional[str] = None) -> List[Line]:
         lines = []
-        for line in self._getArray(self.sexpr_data, "fp_line"):
-            line_dict = {}
-            if self._hasValue(line, layer) or layer is None:
-                a = self._getArray(line, "start")[0]
-                line_dict["start"] = {"x": a[1], "y": a[2]}
+        for line in sexpr.find_all(self.sexpr_data, "fp_line"):
+            if layer is None or self._hasValue(line, layer):
+                a = sexpr.find_all(line, "start")[0]
+                start = Point(a[1], a[2])
 
-                a = self._getArray(line, "end")[0]
-                line_dict["end"] = {"x": a[1], "y": a[2]}
+                a = sexpr.find_all(line, "end")[0]
+                end = Point(a[1], a[2])
 
                 try:
-                    a = self._getArray(line, "layer")[0]
-                    line_dict["layer"] = a[1]
+                    a = sexpr.find_all(line, "layer")[0]
+                    item_layer = a[1]
                 except IndexError:
-                    line_dict["layer"] = ""
+                    item_layer = ""
 
                 try:
-                    a = self._getArray(line, "width")[0]
-                    line_dict["width"] = a[1]
+                    a = self._getWidth(line)[0]
+                    width = a[1]
                 except IndexError:
-                    line_dict["width"] = 0
+                    width = 0
 
-                lines.append(line_dict)
+                lines.append(Line(start, end, item_layer, width))
 
         return lines
 
-    def _getRects(self, layer=None) -> List[Dict[str, Any]]:
+    def _getRects(self, layer=None) -> List[Rect]:
         rects = []
-        for rect in self._getArray(self.sexpr_data, "fp_rect"):
-            rect_dict = {}
-            if self._hasValue(rect, layer) or layer is None:
-                a = self._getArray(rect, "start")[0]
-                rect_dict["start"] = {"x": a[1], "y": a[2]}
+        for rect in sexpr.find_all(self.sexpr_data, "fp_rect"):
+            if layer is None or self._hasValue(rect, layer):
+                a = sexpr.find_all(rect, "start")[0]
+                start = Point(a[1], a[2])
 
-                a = self._getArray(rect, "end")[0]
-                rect_dict["end"] = {"x": a[1], "y": a[2]}
+                a = sexpr.find_all(rect, "end")[0]
+                end = Point(a[1], a[2])
 
                 try:
-                    a = self._getArray(rect, "layer")[0]
-                    rect_dict["layer"] = a[1]
+                    a = sexpr.find_all(rect, "layer")[0]
+                    item_layer = a[1]
                 except IndexError:
-                    rect_dict["layer"] = ""
+                    item_layer = ""
 
                 try:
-                    a = self._getArray(rect, "width")[0]
-                    rect_dict["width"] = a[1]
+                    a = self._getWidth(rect)[0]
+                    width = a[1]
                 except IndexError:
-                    rect_dict["width"] = 0
+                    width = 0
 
-                rects.append(rect_dict)
+                rects.append(Rect(start, end, item_layer, width))
 
         return rects
 
-    def _getCircles(self, layer=None) -> List[Dict[str, Any]]:
+    def _getCircles(self, layer=None) -> List[Circle]:
         circles = []
-        for circle in self._getArray(self.sexpr_data, "fp_circle"):
-            circle_dict = {}
+        for circle in sexpr.find_all(self.sexpr_data, "fp_circle"):
             # filter layers, None = all layers
-            if self._hasValue(circle, layer) or layer is None:
-                a = self._getArray(circle, "center")[0]
-                circle_dict["center"] = {"x": a[1], "y": a[2]}
+            if layer is None or self._hasValue(circle, layer):
+                a = sexpr.find_all(circle, "center")[0]
+                center = Point(a[1], a[2])
 
-                a = self._getArray(circle, "end")[0]
-                circle_dict["end"] = {"x": a[1], "y": a[2]}
+                a = sexpr.find_all(circle, "end")[0]
+                end = Point(a[1], a[2])
 
                 try:
-                    a = self._getArray(circle, "layer")[0]
-                    circle_dict["layer"] = a[1]
+                    a = sexpr.find_all(circle, "layer")[0]
+                    item_layer = a[1]
                 except IndexError:
-                    circle_dict["layer"] = ""
+                    item_layer = ""
 
                 try:
-                    a = self._getArray(circle, "width")[0]
-                    circle_dict["width"] = a[1]
+                    a = self._getWidth(circle)[0]
+                    width = a[1]
                 except IndexError:
-                    circle_dict["width"] = 0
+                    width = 0
 
-                circles.append(circle_dict)
+                circles.append(Circle(center, end, item_layer, width))
 
         return circles
 
-    def _getPolys(self, layer=None) -> List[Dict[str, Any]]:
+    def _getPolys(self, layer=None) -> List[Poly]:
         polys = []
-        for poly in self._getArray(self.sexpr_data, "fp_poly"):
-            poly_dict = {}
+        for poly in sexpr.find_all(self.sexpr_data, "fp_poly"):
             # filter layers, None = all layers
-            if self._hasValue(poly, layer) or layer is None:
+            if layer is None or self._hasValue(poly, layer):
                 points = []
-                pts = self._getArray(poly, "pts")[0]
-                for point in self._getArray(pts, "xy"):
-                    p = {}
-                    p["x"] = point[1]
-                    p["y"] = point[2]
-                    points.append(p)
-                poly_dict["points"] = points
+                pts = sexpr.find_all(poly, "pts")[0]
+                for point in sexpr.find_all(pts, "xy"):
+                    points.append(Point(point[1], point[2]))
 
                 try:
-                    a = self._getArray(poly, "layer")[0]
-                    poly_dict["layer"] = a[1]
+                    a = sexpr.find_all(poly, "layer")[0]
+                    item_layer = a[1]
                 except IndexError:
-                    poly_dict["layer"] = ""
+                    item_layer = ""
 
                 try:
-                    a = self._getArray(poly, "width")[0]
-                    poly_dict["width"] = a[1]
+                    a = self._getWidth(poly)[0]
+                    width = a[1]
                 except IndexError:
-                    poly_dict["width"] = ""
+                    width = ""
 
-                polys.append(poly_dict)
+                polys.append(Poly(points, item_layer, width))
 
         return polys
 
-    def _getArcs(self, layer=None) -> List[Dict[str, Any]]:
+    def _getArcs(self, layer=None) -> List[Arc]:
         arcs = []
-        for arc in self._getArray(self.sexpr_data, "fp_arc"):
-            arc_dict = {}
+        for arc in sexpr.find_all(self.sexpr_data, "fp_arc"):
             # filter layers, None = all layers
-            if self._hasValue(arc, layer) or layer is None:
-                a = self._getArray(arc, "start")[0]
-                arc_dict["start"] = {"x": a[1], "y": a[2]}
+            if layer is None or self._hasValue(arc, layer):
+                a = sexpr.find_all(arc, "start")[0]
+                start = Point(a[1], a[2])
 
-                a = self._getArray(arc, "end")[0]
-                arc_dict["end"] = {"x": a[1], "y": a[2]}
+                a = sexpr.find_all(arc, "end")[0]
+                end = Point(a[1], a[2])
 
-                a = self._getArray(arc, "mid")[0]
-                arc_dict["mid"] = {"x": a[1], "y": a[2]}
+                a = sexpr.find_all(arc, "mid")[0]
+                mid = Point(a[1], a[2])
 
                 # make readable names
-                p1x = arc_dict["start"]["x"]
-                p1y = arc_dict["start"]["y"]
-                p2x = arc_dict["mid"]["x"]
-                p2y = arc_dict["mid"]["y"]
-                p3x = arc_dict["end"]["x"]
-                p3y = arc_dict["end"]["y"]
-
-                if math.sqrt((p1x - p3x)**2 + (p1y - p3y)**2) < 1e-7:
-                    # start and end points match --> center is half way between
-                    # start(=end) and mid
-                    rx, ry = 0.5 * (p1x + p2x), 0.5 * (p1y + p2y)
+                p1x = start.x
+                p1y = start.y
+                p3x = end.x
+                p3y = end.y
+
+                center = arcCenter((p1x, p1y), (mid.x, mid.y), (p3x, p3y))
+                if center is None:
+                    # start, mid and end on a straight line
+                    Diff = 0.0
                 else:
-                    # make square names
-                    p1x_2 = p1x * p1x
-                    p1y_2 = p1y * p1y
-                    p2x_2 = p2x * p2x
-                    p2y_2 = p2y * p2y
-                    p3x_2 = p3x * p3x
-                    p3y_2 = p3y * p3y
-
-                    # Calculate coordinates of the Center (rx,ry) from the three points
-                    # using formula found on http://ambrsoft.com/TrigoCalc/Circle3D.htm
-                    A = 2 * (p1x * (p2y - p3y) - p1y * (p2x - p3x) + p2x * p3y - p3x * p2y)
-                    rx = (
-                        ((p1x_2 + p1y_2) * (p2y - p3y))
-                        + ((p2x_2 + p2y_2) * (p3y - p1y))
-                        + ((p3x_2 + p3y_2) * (p1y - p2y))
-                    ) / A
-                    ry = (
-                        ((p1x_2 + p1y_2) * (p3x - p2x))
-                        + ((p2x_2 + p2y_2) * (p1x - p3x))
-                        + ((p3x_2 + p3y_2) * (p2x - p1x))
-                    ) / A
-
-                # Then get diff between  vectors End-Center, Start-Center
-                Diff = math.atan2(p3y - ry, p3x - rx) - math.atan2(p1y - ry, p1x - rx)
-                # print ("\nangle =" , math.degrees( Diff ))
-
-                #  Diff is always the shorter angle, ignoring Mid. Need to adjust
-                if Diff < 0.0:
-                    Diff = 2 * math.pi + Diff
+                    (rx, ry) = center
+                    # Then get diff between  vectors End-Center, Start-Center
+                    Diff = math.atan2(p3y - ry, p3x - rx) - math.atan2(p1y - ry, p1x - rx)
+                    # print ("\nangle =" , math.degrees( Diff ))
+
+                    #  Diff is always the shorter angle, ignoring Mid. Need to adjust
+                    if Diff < 0.0:
+                        Diff = 2 * math.pi + Diff
 
                 # print ("\n corrected angle =" , math.degrees( Diff ))
 
-                arc_dict["angle"] = Diff
                 try:
-                    a = self._getArray(arc, "layer")[0]
-                    arc_dict["layer"] = a[1]
+                    a = sexpr.find_all(arc, "layer")[0]
+                    item_layer = a[1]
                 except IndexError:
-                    arc_dict["layer"] = ""
+                    item_layer = ""
 
                 try:
-                    a = self._getArray(arc, "width")[0]
-                    arc_dict["width"] = a[1]
+                    a = self._getWidth(arc)[0]
+                    width = a[1]
                 except IndexError:
-                    arc_dict["width"] = 0
+                    width = 0
 
-                arcs.append(arc_dict)
+                arcs.append(Arc(start, end, mid, Diff, item_layer, width))
 
         return arcs
 
-    def _getPads(self) -> List[Dict[str, Any]]:
+    def _getPads(self) -> List[Pad]:
         pads = []
-        for pad in self._getArray(self.sexpr_data, "pad"):
-            # number, type, shape
-            pad_dict = {"number": pad[1], "type": pad[2], "shape": pad[3]}
-
+        for pad in sexpr.find_all(self.sexpr_data, "pad"):
             # position
-            a = self._getArray(pad, "at")[0]
-            pad_dict["pos"] = {"x": a[1], "y": a[2], "orientation": 0}
-            if len(a) > 3:
-                pad_dict["pos"]["orientation"] = a[3]
+            a = sexpr.find_all(pad, "at")[0]
+            pos = Position(a[1], a[2], a[3] if len(a) > 3 else 0)
 
             # size
-            a = self._getArray(pad, "size")[0]
-            pad_dict["size"] = {"x": a[1], "y": a[2]}
+            a = sexpr.find_all(pad, "size")[0]
+            size = Point(a[1], a[2])
 
             # layers
-            a = self._getArray(pad, "layers")[0]
-            pad_dict["layers"] = a[1:]
+            a = sexpr.find_all(pad, "layers")[0]
+
+            # number, type, shape
+            pad_item = Pad(pad[1], pad[2], pad[3], pos, size, a[1:])
 
             # Property (fabrication property, e.g. pad_prop_heatsink)
-            pad_dict["property"] = None
-            a = self._getArray(pad, "property")
+            a = sexpr.find_all(pad, "property")
             if a:
-                pad_dict["property"] = a[0][1]
+                pad_item.property = a[0][1]
 
             # rect delta
-            pad_dict["rect_delta"] = {}
-            a = self._getArray(pad, "rect_delta")
+            a = sexpr.find_all(pad, "rect_delta")
             if a:
-                pad_dict["rect_delta"] = a[0][1:]
+                pad_item.rect_delta = a[0][1:]
 
-            pad_dict["roundrect_rratio"] = {}
-            a = self._getArray(pad, "roundrect_rratio")
+            a = sexpr.find_all(pad, "roundrect_rratio")
             if a:
-                pad_dict["roundrect_rratio"] = a[0][1]
+                pad_item.roundrect_rratio = a[0][1]
 
             # drill
-            pad_dict["drill"] = {}
-            drill = self._getArray(pad, "drill")
+            drill = sexpr.find_all(pad, "drill")
             if drill:
                 # there is only one drill per pad
                 drill = drill[0]
 
                 # offset
-                pad_dict["drill"]["offset"] = {}
-                offset = self._getArray(drill, "offset")
+                drill_offset = Point()
+                offset = sexpr.find_all(drill, "offset")
                 if offset:
                     offset = offset[0]
-                    pad_dict["drill"]["offset"] = {"x": offset[1], "y": offset[2]}
+                    drill_offset = Point(offset[1], offset[2])
                     drill.remove(offset)
 
                 # shape
                 if self._hasValue(drill, "oval"):
                     drill.remove("oval")
-                    pad_dict["drill"]["shape"] = "oval"
+                    drill_shape = "oval"
                 else:
-                    pad_dict["drill"]["shape"] = "circular"
+                    drill_shape = "circular"
 
                 # size
-                pad_dict["drill"]["size"] = {}
+                drill_size = Point()
                 if len(drill) > 1:
                     x = drill[1]
                     y = drill[2] if len(drill) > 2 else x
-                    pad_dict["drill"]["size"] = {"x": x, "y": y}
+                    drill_size = Point(x, y)
+
+                pad_item.drill = Drill(drill_shape, drill_size, drill_offset)
 
             # die length
-            pad_dict["die_length"] = {}
-            a = self._getArray(pad, "die_length")
+            a = sexpr.find_all(pad, "die_length")
             if a:
-                pad_dict["die_length"] = a[0][1]
+                pad_item.die_length = a[0][1]
 
             # clearances zones settings
             # clearance
-            pad_dict["clearance"] = {}
-            a = self._getArray(pad, "clearance")
+            a = sexpr.find_all(pad, "clearance")
             if a:
-                pad_dict["clearance"] = a[0][1]
+                pad_item.clearance = a[0][1]
             # solder mask margin
-            pad_dict["solder_mask_margin"] = {}
-            a = self._getArray(pad, "solder_mask_margin")
+            a = sexpr.find_all(pad, "solder_mask_margin")
             if a:
-                pad_dict["solder_mask_margin"] = a[0][1]
+                pad_item.solder_mask_margin = a[0][1]
             # solder paste margin
-            pad_dict["solder_paste_margin"] = {}
-            a = self._getArray(pad, "solder_paste_margin")
+            a = sexpr.find_all(pad, "solder_paste_margin")
             if a:
-                pad_dict["solder_paste_margin"] = a[0][1]
+                pad_item.solder_paste_margin = a[0][1]
             # solder paste margin ratio
-            pad_dict["solder_paste_margin_ratio"] = {}
-            a = self._getArray(pad, "solder_paste_margin_ratio")
+            a = sexpr.find_all(pad, "solder_paste_margin_ratio")
             if a:
-                pad_dict["solder_paste_margin_ratio"] = a[0][1]
+                pad_item.solder_paste_margin_ratio = a[0][1]
 
             # copper zones settings
             # zone connect
-            pad_dict["zone_connect"] = {}
-            a = self._getArray(pad, "zone_connect")
+            a = sexpr.find_all(pad, "zone_connect")
             if a:
-                pad_dict["zone_connect"] = a[0][1]
+                pad_item.zone_connect = a[0][1]
             # thermal width
-            pad_dict["thermal_width"] = {}
-            a = self._getArray(pad, "thermal_width")
+            a = sexpr.find_all(pad, "thermal_width")
             if a:
-                pad_dict["thermal_width"] = a[0][1]
+                pad_item.thermal_width = a[0][1]
             # thermal gap
-            pad_dict["thermal_gap"] = {}
-            a = self._getArray(pad, "thermal_gap")
+            a = sexpr.find_all(pad, "thermal_gap")
             if a:
-                pad_dict["thermal_gap"] = a[0][1]
+                pad_item.thermal_gap = a[0][1]
 
             # Custom pad shape settings
-            if pad_dict["shape"] == "custom":
+            if pad_item.shape == "custom":
                 # Get options
-                pad_dict["options"] = {"clearance": {}, "anchor": {}}
-                a = self._getArray(pad, "options")
-                c = self._getArray(a, "clearance")
+                pad_item.options = {"clearance": {}, "anchor": {}}
+                a = sexpr.find(pad, "options") or []
+                c = sexpr.find_all(a, "clearance")
                 if c:
-                    pad_dict["options"]["clearance"] = c[0][1]
-                c = self._getArray(a, "anchor")
+                    pad_item.options["clearance"] = c[0][1]
+                c = sexpr.find_all(a, "anchor")
                 if c:
-                    pad_dict["options"]["anchor"] = c[0][1]
+                    pad_item.options["anchor"] = c[0][1]
 
                 # Get primitives
-                pad_dict["primitives"] = []
-                a = self._getArray(pad, "primitives")
+                pad_item.primitives = []
+                a = sexpr.find_all(pad, "primitives")
                 if a:
                     for primitive in a[0][1:]:
                         p = {}
                         # Everything has a width
                         p["width"] = {}
-                        w = self._getArray(primitive, "width")
+                        w = self._getWidth(primitive)
                         if w:
                             p["width"] = w[0][1]
                         # Set primitive type
@@ -619,14 +1068,14 @@ class KicadMod:
                         if primitive[0] == "gr_poly":
                             # Read the polygon's points
                             p["pts"] = []
-                            pts = self._getArray(primitive, "pts")
+                            pts = sexpr.find_all(primitive, "pts")
                             for pt in pts[0][1:]:
                                 if pt[0] == "xy":
                                     p["pts"].append({"x": pt[1], "y": pt[2]})
                                 elif pt[0] == "arc":
                                     # in case there is an arc part of a polygon, add start/mid/end
                                     for name in ["start", "mid", "end"]:
-                                        s = self._getArray(pt, name)
+                                        s = sexpr.find_all(pt, name)
                                         if s:
                                             p["pts"].append({"x": s[0][1], "y": s[0][2]})
                                 else:
@@ -634,76 +1083,74 @@ class KicadMod:
                         elif primitive[0] == "gr_line":
                             # Read the line's start
                             p["start"] = {}
-                            s = self._getArray(primitive, "start")
+                            s = sexpr.find_all(primitive, "start")
                             if s:
                                 p["start"] = {"x": s[0][1], "y": s[0][2]}
                             # Read the line's end
                             p["end"] = {}
-                            e = self._getArray(primitive, "end")
+                            e = sexpr.find_all(primitive, "end")
                             if e:
                                 p["end"] = {"x": e[0][1], "y": e[0][2]}
                         elif primitive[0] == "gr_arc":
                             # Read the arc's start
                             p["start"] = {}
-                            s = self._getArray(primitive, "start")
+                            s = sexpr.find_all(primitive, "start")
                             if s:
                                 p["start"] = {"x": s[0][1], "y": s[0][2]}
                             # Read the arc's mid
                             p["mid"] = {}
-                            s = self._getArray(primitive, "mid")
+                            s = sexpr.find_all(primitive, "mid")
                             if s:
                                 p["mid"] = {"x": s[0][1], "y": s[0][2]}
                             # Read the arc's end
                             p["end"] = {}
-                            e = self._getArray(primitive, "end")
+                            e = sexpr.find_all(primitive, "end")
                             if e:
                                 p["end"] = {"x": e[0][1], "y": e[0][2]}
                         elif primitive[0] == "gr_circle":
                             # Read the line's start
                             p["center"] = {}
-                            c = self._getArray(primitive, "center")
+                            c = sexpr.find_all(primitive, "center")
                             if c:
                                 p["center"] = {"x": c[0][1], "y": c[0][2]}
                             # Read the line's end
                             p["end"] = {}
-                            e = self._getArray(primitive, "end")
+                            e = sexpr.find_all(primitive, "end")
                             if e:
                                 p["end"] = {"x": e[0][1], "y": e[0][2]}
 
-                        pad_dict["primitives"].append(p)
+                        pad_item.primitives.append(p)
 
-            pads.append(pad_dict)
+            pads.append(pad_item)
 
         return pads
 
-    def _getModels(self) -> List[Dict[str, Any]]:
-        models_array = self._getArray(self.sexpr_data, "model")
+    def _getModels(self) -> List[Model]:
+        models_array = sexpr.find_all(self.sexpr_data, "model")
 
         models = []
         for model in models_array:
-            model_dict = {"file": model[1]}
-
             # position
-            offset = self._getArray(model, "at")
+            offset = sexpr.find_all(model, "at")
             if len(offset) < 1:
-                offset = self._getArray(model, "offset")
-            xyz = self._getArray(offset, "xyz")[0]
-            model_dict["pos"] = {"x": xyz[1], "y": xyz[2], "z": xyz[3]}
+                offset = sexpr.find_all(model, "offset")
+            xyz = sexpr.find_all(offset[0], "xyz")[0]
+            pos = Point3D(xyz[1], xyz[2], xyz[3])
 
             # scale
-            xyz = self._getArray(self._getArray(model, "scale"), "xyz")[0]
-            model_dict["scale"] = {"x": xyz[1], "y": xyz[2], "z": xyz[3]}
+            xyz = sexpr.find(model, "scale", "xyz")
+            scale = Point3D(xyz[1], xyz[2], xyz[3])
 
             # rotate
-            xyz = self._getArray(self._getArray(model, "rotate"), "xyz")[0]
-            model_dict["rotate"] = {"x": xyz[1], "y": xyz[2], "z": xyz[3]}
+            xyz = sexpr.find(model, "rotate", "xyz")
+            rotate = Point3D(xyz[1], xyz[2], xyz[3])
 
-            models.append(model_dict)
+            models.append(Model(model[1], pos, scale, rotate))
 
         return models
 
     def _getAttributes(self):
-        attribs = self._getArray(self.sexpr_data, "attr")
+        attribs = sexpr.find_all(self.sexpr_data, "attr")
 
         # Note : see pcb_parser.cpp in KiCad source
 
@@ -733,24 +1180,13 @@ class KicadMod:
         scale: Tuple[float, float, float] = (1.0, 1.0, 1.0),
         rotate: Tuple[float, float, float] = (0.0, 0.0, 0.0),
     ) -> None:
-        model_dict = {"file": filename}
-        # position
-        model_dict["pos"] = {"x": pos[0], "y": pos[1], "z": pos[2]}
-        # scale
-        model_dict["scale"] = {"x": scale[0], "y": scale[1], "z": scale[2]}
-        # rotate
-        model_dict["rotate"] = {"x": rotate[0], "y": rotate[1], "z": rotate[2]}
-        self.models.append(model_dict)
+        model = Model(filename, Point3D(*pos), Point3D(*scale), Point3D(*rotate))
+        self.models.append(model)
 
     def addLine(
         self, start: List[float], end: List[float], layer: str, width: float
     ) -> None:
-        line = {
-            "start": {"x": start[0], "y": start[1]},
-            "end": {"x": end[0], "y": end[1]},
-            "layer": layer,
-            "width": width,
-        }
+        line = Line(Point(start[0], start[1]), Point(end[0], end[1]), layer, width)
         self.lines.append(line)
 
     def addRectangle(
@@ -806,6 +1242,8 @@ class KicadMod:
             model["pos"]["x"] -= anchor_point[0] / 25.4
             model["pos"]["y"] += anchor_point[1] / 25.4
 
+        self.invalidateCaches()
+
     def rotateFootprint(self, degrees: float):
         # change reference position
         self.reference["pos"] = _rotatePoint(self.reference["pos"], degrees)
@@ -842,77 +1280,48 @@ class KicadMod:
             model["pos"] = _rotatePoint(model["pos"], -degrees)
             model["rotate"]["z"] = model["rotate"]["z"] - degrees
 
-    def filterLines(self, layer: str) -> List[Dict[str, Any]]:
-        lines = []
-        for line in self.lines:
-            if line["layer"] == layer:
-                lines.append(line)
+        self.invalidateCaches()
 
-        return lines
+    # the filter functions look up the items in an index by layer, which is
+    # built on first use and cached (see invalidateCaches())
+    def filterLines(self, layer: str) -> List[Line]:
+        return self._itemsOnLayer("lines", layer)
 
-    def filterRectsAsLines(self, layer: str) -> List[Dict[str, Any]]:
+    def filterRectsAsLines(self, layer: str) -> List[Line]:
         lines = []
-        for rect in self.rects:
-            if rect["layer"] == layer:
-                # convert the rect to 4 lines
-                l0 = copy.deepcopy(rect)
-                l1 = copy.deepcopy(rect)
-                l2 = copy.deepcopy(rect)
-                l3 = copy.deepcopy(rect)
-                l0["end"]["x"] = rect["start"]["x"]
-                l1["end"]["y"] = rect["start"]["y"]
-                l2["start"]["x"] = rect["end"]["x"]
-                l3["start"]["y"] = rect["end"]["y"]
-                lines.extend([l0, l1, l2, l3])
+        for rect in self.filterRects(layer):
+            # convert the rect to 4 lines
+            (x0, y0) = (rect["start"]["x"], rect["start"]["y"])
+            (x1, y1) = (rect["end"]["x"], rect["end"]["y"])
+            (rect_layer, width) = (rect["layer"], rect["width"])
+            lines.append(Line(Point(x0, y0), Point(x0, y1), rect_layer, width))
+            lines.append(Line(Point(x0, y0), Point(x1, y0), rect_layer, width))
+            lines.append(Line(Point(x1, y0), Point(x1, y1), rect_layer, width))
+            lines.append(Line(Point(x0, y1), Point(x1, y1), rect_layer, width))
 
         return lines
 
-    def filterPolysAsLines(self, layer: str) -> List[Dict[str, Any]]:
+    def filterPolysAsLines(self, layer: str) -> List[Line]:
         lines = []
-        for poly in self.polys:
-            if poly["layer"] == layer:
-                for i in range(len(poly["points"])):
-                    lines.append(
-                        {
-                            "start": copy.copy(poly["points"][i]),
-                            "end": copy.copy(poly["points"][i - 1]),
-                            "layer": copy.copy(poly["layer"]),
-                            "width": copy.copy(poly["width"]),
-                        }
-                    )
+        for poly in self.filterPolys(layer):
+            points = poly["points"]
+            for i in range(len(points)):
+                lines.append(
+                    Line(copy.copy(points[i]), copy.copy(points[i - 1]), poly["layer"], poly["width"])
+                )
         return lines
 
-    def filterRects(self, layer: str) -> List[Dict[str, Any]]:
-        rects = []
-        for rect in self.rects:
-            if rect["layer"] == layer:
-                rects.append(rect)
-
-        return rects
-
-    def filterCircles(self, layer: str) -> List[Dict[str, Any]]:
-        circles = []
-        for circle in self.circles:
-            if circle["layer"] == layer:
-                circles.append(circle)
-
-        return circles
+    def filterRects(self, layer: str) -> List[Rect]:
+        return self._itemsOnLayer("rects", layer)
 
-    def filterPolys(self, layer: str) -> List[Dict[str, Any]]:
-        polys = []
-        for poly in self.polys:
-            if poly["layer"] == layer:
-                polys.append(poly)
-
-        return polys
+    def filterCircles(self, layer: str) -> List[Circle]:
+        return self._itemsOnLayer("circles", layer)
 
-    def filterArcs(self, layer: str) -> List[Dict[str, Any]]:
-        arcs = []
-        for arc in self.arcs:
-            if arc["layer"] == layer:
-                arcs.append(arc)
+    def filterPolys(self, layer: str) -> List[Poly]:
+        return self._itemsOnLayer("polys", layer)
 
-        return arcs
+    def filterArcs(self, layer: str) -> List[Arc]:
+        return self._itemsOnLayer("arcs", layer)
 
     # Return the geometric bounds for a given layer
     # Includes lines, arcs, circles, rects
@@ -955,43 +1364,13 @@ class KicadMod:
         # Add all arcs
         arcs = self.filterArcs(layer)
         for c in arcs:
-            cx = c["start"]["x"]
-            cy = c["start"]["y"]
-            ex = c["end"]["x"]
-            ey = c["end"]["y"]
-
-            dx = ex - cx
-            dy = ey - cy
-
-            r = math.sqrt(dx * dx + dy * dy)
-
-            dalpha = 1
-            alphaend = c["angle"]
-            if math.fabs(alphaend) < 1:
-                dalpha = math.fabs(alphaend) / 5
-            if alphaend < 0:
-                dalpha = -dalpha
-            if math.fabs(alphaend) > 0:
-                a = 0
-                c0 = [ex - cx, ey - cy]
-                # print("c0 = ",c0)
-                while (alphaend > 0 and a <= alphaend) or (
-                    alphaend < 0 and a >= alphaend
-                ):
-                    c1 = [0, 0]
-                    c1[0] = (
-                        math.cos(a / 180 * 3.1415) * c0[0]
-                        - math.sin(a / 180 * 3.1415) * c0[1]
-                    )
-                    c1[1] = (
-                        math.sin(a / 180 * 3.1415) * c0[0]
-                        + math.cos(a / 180 * 3.1415) * c0[1]
-                    )
-
-                    bb.addPoint(cx + c1[0], cy + c1[1])
-                    a = a + dalpha
-
-            bb.addPoint(ex, None)
+            (xmin, ymin, xmax, ymax) = arcBoundingBox(
+                (c["start"]["x"], c["start"]["y"]),
+                (c["mid"]["x"], c["mid"]["y"]),
+                (c["end"]["x"], c["end"]["y"]),
+            )
+            bb.addPoint(xmin, ymin)
+            bb.addPoint(xmax, ymax)
 
         return bb
 
@@ -1004,48 +1383,81 @@ class KicadMod:
             + self.filterArcs(layer)
         )
 
-    def getPadsByNumber(self, pad_number: Union[str, int]) -> List[Dict[str, Any]]:
+    def getPadsByNumber(self, pad_number: Union[str, int]) -> List[Pad]:
         pads = []
         for pad in self.pads:
-            if str(pad["number"]).upper() == str(pad_number).upper():
+            if str(pad.number).upper() == str(pad_number).upper():
                 pads.append(pad)
 
         return pads
 
-    def filterPads(self, pad_type: str) -> List[Dict[str, Any]]:
+    def filterPads(self, pad_type: str) -> List[Pad]:
         pads = []
         for pad in self.pads:
-            if pad["type"] == pad_type:
+            if pad.type == pad_type:
                 pads.append(pad)
 
-        pads = sorted(pads, key=lambda p: str(p["number"]))
+        pads = sorted(pads, key=lambda p: str(p.number))
 
         return pads
 
     # Get the middle position between pads
     # Use the outer dimensions of pads to handle footprints with pads of different sizes
     def padMiddlePosition(
-        self, pads: Optional[List[Dict[str, Any]]] = None
+        self, pads: Optional[List[Pad]] = None
     ) -> Dict[str, float]:
 
         bb = self.overpadsBounds(pads)
         return bb.center
 
-    def padsBounds(self, pads: Optional[List[Dict[str, Any]]] = None) -> BoundingBox:
+    def getPadTable(self) -> "PadTable":
+        """
+        Returns a columnar table of the pads, see `kicad_mod_table`.
+
+        Needs NumPy. The table is cached like the graphic items by layer.
+        """
+        # kicad_mod_table depends on this module
+        from kicad_mod_table import PadTable
+
+        return self._cached("padTable", PadTable, self.pads)
+
+    # the pad table of the pads, or None for a few pads or without NumPy
+    def _padTable(self, pads: List[Pad]) -> Optional["PadTable"]:
+        if not pads or len(pads) < self.PAD_TABLE_MIN_PADS:
+            return None
+
+        # kicad_mod_table depends on this module
+        import kicad_mod_table
+
+        if not kicad_mod_table.NUMPY_AVAILABLE:
+            return None
+        if pads is self.pads:
+            return self.getPadTable()
+        return kicad_mod_table.PadTable(pads)
+
+    def padsBounds(self, pads: Optional[List[Pad]] = None) -> BoundingBox:
 
         bb = BoundingBox()
 
         if pads is None:
             pads = self.pads
 
+        # only worth it for the cached table of all pads
+        table = self._padTable(pads) if pads is self.pads else None
+        if table is not None:
+            # the first minimum and maximum, like addPoint() for each pad
+            bb.addPoint(pads[int(table.x.argmin())].pos.x, pads[int(table.y.argmin())].pos.y)
+            bb.addPoint(pads[int(table.x.argmax())].pos.x, pads[int(table.y.argmax())].pos.y)
+            return bb
+
         for pad in pads:
-            pos = pad["pos"]
-            bb.addPoint(pos["x"], pos["y"])
+            pos = pad.pos
+            bb.addPoint(pos.x, pos.y)
 
         return bb
 
     def overpadsBounds(
-        self, pads: Optional[List[Dict[str, Any]]] = None
+        self, pads: Optional[List[Pad]] = None
     ) -> BoundingBox:
 
         bb = BoundingBox()
@@ -1053,29 +1465,36 @@ class KicadMod:
         if pads is None:
             pads = self.pads
 
-        for pad in pads:
-            pos = pad["pos"]
-            px = pos["x"]
-            py = pos["y"]
+        table = self._padTable(pads)
+        if table is not None:
+            # the corners of all pads at once
+            (xs, ys) = table.corners()
+            bb.addPoint(float(xs.min()), float(ys.min()))
+            bb.addPoint(float(xs.max()), float(ys.max()))
 
-            # Pad outer dimensions
-            sx = pad["size"]["x"]
-            sy = pad["size"]["y"]
+        for pad in pads:
+            pos = pad.pos
+            px = pos.x
+            py = pos.y
 
-            angle = -pad["pos"]["orientation"]
+            angle = -pos.orientation
 
-            # Add each "corner" of the pad (even for oval shapes)
+            points = []
 
-            p1 = _rotatePoint({"x": -sx / 2, "y": -sy / 2}, angle)
-            p2 = _rotatePoint({"x": -sx / 2, "y": +sy / 2}, angle)
-            p3 = _rotatePoint({"x": +sx / 2, "y": +sy / 2}, angle)
-            p4 = _rotatePoint({"x": +sx / 2, "y": -sy / 2}, angle)
+            if table is None:
+                # Pad outer dimensions
+                sx = pad.size.x
+                sy = pad.size.y
 
-            points = [p1, p2, p3, p4]
+                # Add each "corner" of the pad (even for oval shapes)
+                points.append(_rotatePoint({"x": -sx / 2, "y": -sy / 2}, angle))
+                points.append(_rotatePoint({"x": -sx / 2, "y": +sy / 2}, angle))
+                points.append(_rotatePoint({"x": +sx / 2, "y": +sy / 2}, angle))
+                points.append(_rotatePoint({"x": +sx / 2, "y": -sy / 2}, angle))
 
             # Add more points for custom pad shapes
-            if pad["shape"] == "custom":
-                for p in pad["primitives"]:
+            if pad.shape == "custom":
+                for p in pad.primitives:
                     if p["type"] == "gr_poly":
                         # Add polygon points
                         for point in p["pts"]:
@@ -1361,6 +1780,38 @@ class KicadMod:
 
         se.endGroup(newline=True)
 
+    def saveSnapshot(self, filename: str) -> None:
+        """
+        Write a binary snapshot of the footprint, see `snapshot`. It is loaded with
+        `loadSnapshot` much faster than the footprint file.
+        """
+        snapshot.save(filename, self, "kicad_mod", _SNAPSHOT_CLASSES)
+
+    @classmethod
+    def loadSnapshot(cls, filename: str) -> "KicadMod":
+        """
+        Load a footprint from a snapshot written by `saveSnapshot`.
+
+        raises snapshot.SnapshotError if the file is no snapshot of a footprint
+        """
+        return snapshot.load(filename, "kicad_mod", _SNAPSHOT_CLASSES)
+
+    @property
+    def _snapshotState(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self._SNAPSHOT_ATTRIBUTES}
+
+    @classmethod
+    def _fromSnapshotState(cls, state: Dict[str, Any]) -> "KicadMod":
+        if not isinstance(state, dict) or state.keys() != set(cls._SNAPSHOT_ATTRIBUTES):
+            raise snapshot.SnapshotError("Invalid footprint in snapshot")
+        module = cls.__new__(cls)
+        module.__dict__.update(state)
+        # the s-expression is stored as plain lists, find() works without the index
+        # of the heads (it only pays off while the attributes are built)
+        module.sexpr_data = sexpr.SexprList(module.sexpr_data)
+        module.invalidateCaches()
+        return module
+
     def save(self, filename: Optional[str] = None):
         if not filename:
             filename = self.filename
@@ -1470,5 +1921,13 @@ class KicadMod:
         se.endGroup(True)
 
         with open(filename, "w", newline="\n") as f:
-            f.write(se.output)
+            se.write(f)
             f.write("\n")
+
+
+# a footprint is stored in snapshots with all of its attributes, the elements with
+# the fields that are set
+_SNAPSHOT_CLASSES = [snapshot.SnapshotClass(KicadMod, ["_snapshotState"], KicadMod._fromSnapshotState)] + [
+    snapshot.SnapshotClass(cls, ["_snapshotState"], cls._fromSnapshotState)
+    for cls in (Point, Position, Point3D, Font, Text, Line, Rect, Circle, Poly, Arc, Drill, Pad, Model)
+]
@@ -0,0 +1,111 @@
+"""
+Columnar table of the pads of a footprint.
+
+The table has one row per pad, with one NumPy array per attribute. The outlines
+and bounds of all pads are computed at once, instead of a Python loop per pad.
+The results are the same as the ones of the loops in `kicad_mod`.
+
+NumPy is an optional dependency, it is only needed to build the table.
+"""
+
+import math
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from kicad_mod import Pad
+
+NUMPY_AVAILABLE = True
+try:
+    import numpy as np
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def _cosSin(degrees: float) -> Tuple[float, float]:
+    # the same values as _rotatePoint()
+    radians = degrees * math.pi / 180
+    return (math.cos(radians), math.sin(radians))
+
+
+class PadTable:
+    """
+    The pads of a footprint, one row per pad in the order of the list.
+    """
+
+    def __init__(self, pads: List[Pad]):
+        if not NUMPY_AVAILABLE:
+            raise ImportError(
+                'The pad table needs NumPy. Try to install it using: "pip install numpy"'
+            )
+        self.pads: List[Pad] = pads
+
+        self.x = self._column(attrgetter("pos.x"), np.float64)
+        self.y = self._column(attrgetter("pos.y"), np.float64)
+        self.sizex = self._column(attrgetter("size.x"), np.float64)
+        self.sizey = self._column(attrgetter("size.y"), np.float64)
+        self.rotation = self._column(attrgetter("pos.orientation"), np.float64)
+        # the shape of a pad is shapeNames[shape], the same for the type
+        (self.shape, self.shapeNames) = self._codes(map(attrgetter("shape"), pads))
+        (self.type, self.typeNames) = self._codes(map(attrgetter("type"), pads))
+
+        # bit i of the layer mask is set if the pad is on layerNames[i], the mask
+        # is computed once per distinct list of layers
+        (layer_lists, values) = self._codes(tuple(pad.layers) for pad in pads)
+        layer_bits: Dict[str, int] = {}
+        for layers in values:
+            for layer in layers:
+                layer_bits.setdefault(layer, len(layer_bits))
+        self.layerNames: List[str] = list(layer_bits)
+        masks = [sum(1 << layer_bits[layer] for layer in set(layers)) for layers in values]
+        self.layers = np.array(masks, dtype=np.uint64 if len(layer_bits) <= 64 else object)[layer_lists]
+
+        # cos and sin of the rotation of the outline, computed once per distinct rotation
+        (rotations, values) = self._codes(map(attrgetter("pos.orientation"), pads))
+        trig = np.array([_cosSin(-value) for value in values], dtype=np.float64).reshape(-1, 2)
+        self._cos = trig[rotations, 0]
+        self._sin = trig[rotations, 1]
+
+    def __len__(self) -> int:
+        return len(self.pads)
+
+    def _column(self, get: Callable[[Pad], Any], dtype) -> "np.ndarray":
+        return np.fromiter(map(get, self.pads), dtype=dtype, count=len(self.pads))
+
+    def _codes(self, values: Iterable[Any]) -> Tuple["np.ndarray", List[Any]]:
+        # encode the values of a column as indexes into a list of the distinct values
+        codes: Dict[Any, int] = {}
+        column = np.fromiter(
+            (codes.setdefault(value, len(codes)) for value in values),
+            dtype=np.int32,
+            count=len(self.pads),
+        )
+        return (column, list(codes))
+
+    def onLayer(self, layer: str) -> "np.ndarray":
+        """
+        Returns a mask of the pads that list `layer` in their layers. Wildcards
+        like "*.Cu" are compared as they are, just like `layer in pad.layers`.
+        """
+        if layer not in self.layerNames:
+            return np.zeros(len(self), dtype=np.bool_)
+        bit = 1 << self.layerNames.index(layer)
+        if self.layers.dtype == object:
+            return np.array([mask & bit != 0 for mask in self.layers], dtype=np.bool_)
+        return (self.layers & np.uint64(bit)) != 0
+
+    def corners(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Returns the x and y coordinates of the 4 corners of the rotated outline of
+        each pad (even for oval shapes), as arrays with one row per pad.
+        """
+        half_x = self.sizex / 2
+        half_y = self.sizey / 2
+        # the corners before the rotation, in the order of KicadMod.overpadsBounds()
+        x = np.stack([-half_x, -half_x, half_x, half_x], axis=1)
+        y = np.stack([-half_y, half_y, half_y, -half_y], axis=1)
+        cos = self._cos[:, np.newaxis]
+        sin = self._sin[:, np.newaxis]
+        return (
+            self.x[:, np.newaxis] + (x * cos - y * sin),
+            self.y[:, np.newaxis] + (y * cos + x * sin),
+        )
@@ -2,15 +2,37 @@
 Library for processing KiCad's symbol files.
 """
 
+import bisect
+import dataclasses
+import gc
+import itertools
 import json
 import math
+import operator
+import os
 import re
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import sexpr
+import snapshot
+
+if TYPE_CHECKING:
+    from kicad_sym_table import LibraryTables
 
 
 class KicadFileFormatError(ValueError):
@@ -20,6 +42,12 @@ class KicadFileFormatError(ValueError):
 # KiCad can only handle multiples of 90 degrees
 VALID_ROTATIONS = frozenset({0, 90, 180, 270})
 
+# the many small objects of a library do not need a __dict__ (needs Python 3.10)
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# name of the units of a symbol: <symbol name>_<unit>_<demorgan>
+_unit_name_regex = re.compile(r"^(.*)_(\d+?)_(\d+?)$", re.DOTALL)
+
 
 def mil_to_mm(mil: float) -> float:
     return round(mil * 0.0254, 6)
@@ -30,7 +58,7 @@ def mm_to_mil(mm: float) -> float:
 
 
 def _parse_at(i):
-    sexpr_at = _get_array(i, "at")[0]
+    sexpr_at = sexpr.find_all(i, "at")[0]
     posx = sexpr_at[1]
     posy = sexpr_at[2]
     if len(sexpr_at) == 4:
@@ -66,11 +94,8 @@ def _get_array(
 
 
 def _get_array2(data, value):
-    ret = []
-    for i in data:
-        if isinstance(i, list) and i[0] == value:
-            ret.append(i)
-    return ret
+    """return the child arrays which have value as first element"""
+    return sexpr.find_all(data, value)
 
 
 def _get_color(sexpr) -> Optional["Color"]:
@@ -81,32 +106,30 @@ def _get_color(sexpr) -> Optional["Color"]:
     return col
 
 
-def _get_stroke(sexpr) -> Tuple[Optional[int], Optional["Color"]]:
+def _get_stroke(data) -> Tuple[Optional[int], Optional["Color"]]:
     width = None
     col = None
-    for i in sexpr:
-        if isinstance(i, list) and i[0] == "stroke":
-            width = _get_value_of(i, "width")
-            col = _get_color(i)
-            break
+    stroke = sexpr.find(data, "stroke")
+    if stroke is not None:
+        width = _get_value_of(stroke, "width")
+        col = _get_color(stroke)
     return (width, col)
 
 
-def _get_fill(sexpr) -> Tuple[Optional[Any], Optional["Color"]]:
+def _get_fill(data) -> Tuple[Optional[Any], Optional["Color"]]:
     fill = None
     col = None
-    for i in sexpr:
-        if isinstance(i, list) and i[0] == "fill":
-            fill = _get_value_of(i, "type")
-            col = _get_color(i)
-            break
+    fill_data = sexpr.find(data, "fill")
+    if fill_data is not None:
+        fill = _get_value_of(fill_data, "type")
+        col = _get_color(fill_data)
     return (fill, col)
 
 
-def _get_xy(sexpr, lookup) -> Tuple[float, float]:
-    for i in sexpr:
-        if isinstance(i, list) and i[0] == lookup:
-            return (i[1], i[2])
+def _get_xy(data, lookup) -> Tuple[float, float]:
+    found = sexpr.find(data, lookup)
+    if found is not None:
+        return (found[1], found[2])
     return (0.0, 0.0)
 
 
@@ -132,23 +155,38 @@ def _get_value_ofRecursively(data, path, item_to_get=False):
 
 def _get_value_of(data, lookup, default=None):
     """find the array which has lookup as first element, return its 2nd element"""
-    for i in data:
-        if isinstance(i, list) and i[0] == lookup:
-            return i[1]
+    found = sexpr.find(data, lookup)
+    if found is not None:
+        return found[1]
     return default
 
 
 def _has_value(data, lookup) -> bool:
     """return true if the lookup item exists"""
-    for i in data:
-        if isinstance(i, list) and i[0] == lookup:
-            return True
-    return False
+    return sexpr.find(data, lookup) is not None
+
+
+def _pin_boundingbox(pins: Iterable["Pin"]) -> Optional[Tuple[float, float, float, float]]:
+    """return the bounding box (maxx, maxy, minx, miny) of the pin positions"""
+    pins = list(pins)
+    if not pins:
+        return None
+    x = [pin.posx for pin in pins]
+    y = [pin.posy for pin in pins]
+    return (max(x), max(y), min(x), min(y))
+
+
+def _as_json_dict(obj) -> Any:
+    if dataclasses.is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    return obj.__dict__
 
 
 class KicadSymbolBase:
+    __slots__ = ()
+
     def as_json(self):
-        return json.dumps(self, default=lambda x: x.__dict__, indent=2)
+        return json.dumps(self, default=_as_json_dict, indent=2)
 
     def compare_pos(self, x, y):
         if hasattr(self, "posx") and hasattr(self, "posy"):
@@ -183,7 +221,7 @@ class KicadSymbolBase:
             )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Color(KicadSymbolBase):
     """Encode the color of an entiry. Currently not used in the kicad_sym format"""
 
@@ -196,7 +234,7 @@ class Color(KicadSymbolBase):
         return ["color", self.r, self.g, self.b, self.a]
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TextEffect(KicadSymbolBase):
     """Encode the text effect of an entiry"""
 
@@ -243,7 +281,7 @@ class TextEffect(KicadSymbolBase):
     def from_sexpr(cls, sexpr):
         if sexpr.pop(0) != "effects":
             return None
-        font = _get_array(sexpr, "font")[0]
+        font = _get_array2(sexpr, "font")[0]
         (sizex, sizey) = _get_xy(font, "size")
         is_italic = "italic" in font
         is_bold = "bold" in font
@@ -276,7 +314,7 @@ class TextEffect(KicadSymbolBase):
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class AltFunction(KicadSymbolBase):
     name: str
     etype: str
@@ -291,7 +329,7 @@ class AltFunction(KicadSymbolBase):
         return AltFunction(name, etype, shape)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Pin(KicadSymbolBase):
     name: str
     number: str
@@ -327,9 +365,9 @@ class Pin(KicadSymbolBase):
     @classmethod
     def _parse_name_or_number(cls, i, typ="name"):
         """Convert a sexpr pin-name or pin-number into a python dict"""
-        sexpr_n = _get_array(i, typ)[0]
+        sexpr_n = _get_array2(i, typ)[0]
         name = sexpr_n[1]
-        effects = TextEffect.from_sexpr(_get_array(sexpr_n, "effects")[0])
+        effects = TextEffect.from_sexpr(_get_array2(sexpr_n, "effects")[0])
         return (name, effects)
 
     def get_sexpr(self):
@@ -394,7 +432,7 @@ class Pin(KicadSymbolBase):
                 f" (must be one of {set(VALID_ROTATIONS)})"
             )
         altfuncs = []
-        alt_n = _get_array(sexpr, "alternate")
+        alt_n = _get_array2(sexpr, "alternate")
         for alt_sexpr in alt_n:
             altfuncs.append(AltFunction.from_sexpr(alt_sexpr))
         # we also need the pin-number as integer, try to convert it.
@@ -425,7 +463,7 @@ class Pin(KicadSymbolBase):
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Circle(KicadSymbolBase):
     centerx: float
     centery: float
@@ -476,7 +514,7 @@ class Circle(KicadSymbolBase):
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Arc(KicadSymbolBase):
     #  (arc (start -3.302 3.175) (mid -3.937 2.54) (end -3.302 1.905)
     #    (stroke (width 0.254) (type default) (color 0 0 0 0))
@@ -537,7 +575,7 @@ class Arc(KicadSymbolBase):
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Point(KicadSymbolBase):
     x: float
     y: float
@@ -550,7 +588,7 @@ class Point(KicadSymbolBase):
         return ["xy", self.x, self.y]
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Polyline(KicadSymbolBase):
     points: List[Point]
     stroke_width: float = 0.254
@@ -636,7 +674,7 @@ class Polyline(KicadSymbolBase):
         pts = []
         if sexpr.pop(0) != "polyline":
             return None
-        for p in _get_array(sexpr, "pts")[0]:
+        for p in _get_array2(sexpr, "pts")[0]:
             if "xy" in p:
                 pts.append(Point(p[1], p[2]))
 
@@ -645,7 +683,7 @@ class Polyline(KicadSymbolBase):
         return Polyline(pts, stroke, scolor, fill, fcolor, unit=unit, demorgan=demorgan)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Text(KicadSymbolBase):
     text: str
     posx: float
@@ -670,11 +708,11 @@ class Text(KicadSymbolBase):
             return None
         text = sexpr.pop(0)
         (posx, posy, rotation) = _parse_at(sexpr)
-        effects = TextEffect.from_sexpr(_get_array(sexpr, "effects")[0])
+        effects = TextEffect.from_sexpr(_get_array2(sexpr, "effects")[0])
         return Text(text, posx, posy, rotation, effects, unit=unit, demorgan=demorgan)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Rectangle(KicadSymbolBase):
     """
     Some v6 symbols use rectangles, newer ones encode them as polylines.
@@ -767,7 +805,7 @@ class Rectangle(KicadSymbolBase):
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Property(KicadSymbolBase):
     name: str
     value: str
@@ -812,7 +850,7 @@ class Property(KicadSymbolBase):
         value = sexpr.pop(0)
         idd = _get_value_of(sexpr, "id")
         (posx, posy, rotation) = _parse_at(sexpr)
-        effects = TextEffect.from_sexpr(_get_array(sexpr, "effects")[0])
+        effects = TextEffect.from_sexpr(_get_array2(sexpr, "effects")[0])
         return Property(name, value, idd, posx, posy, rotation, effects)
 
 
@@ -842,6 +880,62 @@ class KicadSymbol(KicadSymbolBase):
         if self.filename == "":
             raise ValueError("Filename can not be empty")
         self.libname = Path(self.filename).stem
+        self.invalidate_caches()
+
+    def invalidate_caches(self) -> None:
+        """
+        Drop the lookup indexes and the geometry cached for the symbol.
+
+        Adding, removing or replacing pins, properties, rectangles and
+        polylines is detected automatically. Call this after changing one
+        of them in place, e.g. after renaming or moving a pin, resizing a
+        rectangle or editing the points of a polyline.
+        """
+        self._cache: Dict[Any, Any] = {}
+        self._cache_state: Optional[Tuple[Any, ...]] = None
+
+    def _cached(self, key: Any, build: Callable[..., Any], *args: Any) -> Any:
+        # the cache is only valid for the element lists it was built from
+        lists = (self.pins, self.properties, self.rectangles, self.polylines)
+        state = self._cache_state
+        if (
+            state is None
+            or not all(map(operator.is_, state[0], lists))
+            or state[1:] != (tuple(map(len, lists)), self.unit_count, self.demorgan_count)
+        ):
+            self._cache = {}
+            self._cache_state = (
+                lists,
+                tuple(map(len, lists)),
+                self.unit_count,
+                self.demorgan_count,
+            )
+
+        if key not in self._cache:
+            self._cache[key] = build(*args)
+        return self._cache[key]
+
+    def _index(self, name: str) -> Dict[Any, Any]:
+        return self._cached(("index", name), self._build_index, name)
+
+    def _build_index(self, name: str) -> Dict[Any, Any]:
+        index: Dict[Any, Any] = {}
+        if name == "property":
+            for prop in reversed(self.properties):
+                index[prop.name] = prop
+        elif name == "number":
+            for pin in reversed(self.pins):
+                index[pin.number] = pin
+        else:
+            for pin in self.pins:
+                if name == "name":
+                    k = pin.name
+                elif name == "rotation":
+                    k = pin.rotation
+                else:
+                    k = (pin.unit, pin.demorgan)
+                index.setdefault(k, []).append(pin)
+        return index
 
     def get_sexpr(self) -> List[str]:
         # add header
@@ -869,53 +963,72 @@ class KicadSymbol(KicadSymbolBase):
         for prop in self.properties:
             sx.append(prop.get_sexpr())
 
+        # sort the elements into their units, in the order they are written
+        units: Dict[Tuple[int, int], List[Any]] = {}
+        for elements in (
+            self.arcs,
+            self.circles,
+            self.texts,
+            self.rectangles,
+            self.polylines,
+            self.pins,
+        ):
+            for element in elements:
+                units.setdefault((element.unit, element.demorgan), []).append(element)
+
         # add units
         for d in range(0, self.demorgan_count + 1):
             for u in range(0, self.unit_count + 1):
-                hdr = self.quoted_string("{}_{}_{}".format(self.name, u, d))
-                sx_i: list[Any] = ["symbol", hdr]
-                for pin in (
-                    self.arcs
-                    + self.circles
-                    + self.texts
-                    + self.rectangles
-                    + self.polylines
-                    + self.pins
-                ):
-                    if pin.is_unit(u, d):
-                        sx_i.append(pin.get_sexpr())
-
-                if len(sx_i) > 2:
+                unit_elements = units.get((u, d))
+                if unit_elements:
+                    hdr = self.quoted_string("{}_{}_{}".format(self.name, u, d))
+                    sx_i: list[Any] = ["symbol", hdr]
+                    sx_i.extend(element.get_sexpr() for element in unit_elements)
                     sx.append(sx_i)
 
         return sx
 
-    def get_center_rectangle(self, units: Optional[List[int]]=None) -> Optional[Polyline]:
-        # return a polyline for the requested unit that is a rectangle
-        # and is closest to the center
-        candidates = {}
-        # building a dict with floats as keys.. there needs to be a rule against that^^
+    def get_center_rectangle(self, units: Optional[List[int]] = None) -> Optional[Polyline]:
+        """
+        Returns the rectangle of the requested units that is closest to the center,
+        as a polyline.
+
+        If [units] is None, all units are considered. The result is cached.
+        """
+        key = None if units is None else tuple(units)
+        return self._cached(("center_rectangle", key), self._find_center_rectangle, units)
+
+    def _rectangles_by_distance(self) -> List[Tuple[float, Polyline]]:
+        # all rectangles with the distance of their center to the origin
         pl_rects = [i.as_polyline() for i in self.rectangles]
         pl_rects.extend(pl for pl in self.polylines if pl.is_rectangle())
+        candidates = []
         for pl in pl_rects:
-            if (units is None) or (pl.unit in units):
-                # extract the center, calculate the distance to origin
-                (x, y) = pl.get_center_of_boundingbox()
-                dist = math.sqrt(x * x + y * y)
-                candidates[dist] = pl
-
-        if candidates:
-            # sort the list return the first (smallest) item
-            return candidates[sorted(candidates.keys())[0]]
-        return None
-
-    def get_largest_area_rectangle(self, units: Optional[List[int]]=None) -> Optional[Polyline]:
+            (x, y) = pl.get_center_of_boundingbox()
+            candidates.append((math.sqrt(x * x + y * y), pl))
+        return candidates
+
+    def _find_center_rectangle(self, units: Optional[List[int]]) -> Optional[Polyline]:
+        center = None
+        min_dist = 0.0
+        for (dist, pl) in self._cached("rectangles", self._rectangles_by_distance):
+            # of rectangles with the same distance the last one is used
+            if ((units is None) or (pl.unit in units)) and (center is None or dist <= min_dist):
+                center = pl
+                min_dist = dist
+        return center
+
+    def get_largest_area_rectangle(self, units: Optional[List[int]] = None) -> Optional[Rectangle]:
         """
         From all the rectangles in the requested units,
         select the one rectangle with the largest area.
 
-        If [units] is None, all units are considered.
+        If [units] is None, all units are considered. The result is cached.
         """
+        key = None if units is None else tuple(units)
+        return self._cached(("largest_rectangle", key), self._find_largest_area_rectangle, units)
+
+    def _find_largest_area_rectangle(self, units: Optional[List[int]]) -> Optional[Rectangle]:
         largest_area = 0.0
         largest_rect = None
         for pl in self.rectangles:
@@ -926,18 +1039,57 @@ class KicadSymbol(KicadSymbolBase):
 
         return largest_rect
 
+    def get_pin_boundingbox(
+        self, units: Optional[List[int]] = None
+    ) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Returns the bounding box (maxx, maxy, minx, miny) of the pin positions in
+        the requested units, or None if there are no pins.
+
+        If [units] is None, all units are considered. The result is cached.
+        """
+        key = None if units is None else tuple(units)
+        return self._cached(("pin_boundingbox", key), self._build_pin_boundingbox, units)
+
+    def _build_pin_boundingbox(
+        self, units: Optional[List[int]]
+    ) -> Optional[Tuple[float, float, float, float]]:
+        if units is None:
+            pins = self.pins
+        else:
+            pins = [pin for unit in dict.fromkeys(units) for pin in self.get_pins_by_unit(unit)]
+        return _pin_boundingbox(pins)
+
+    def get_pin_extents(self, direction: str) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Returns the bounding box (maxx, maxy, minx, miny) of the positions of the
+        pins pointing into [direction] (see `filter_pins`), or None if there are
+        no such pins. The result is cached.
+        """
+        rotation = self.dir_to_rotation(direction)
+        return self._cached(("pin_extents", rotation), self._build_pin_extents, rotation)
+
+    def _build_pin_extents(self, rotation: int) -> Optional[Tuple[float, float, float, float]]:
+        return _pin_boundingbox(self._index("rotation").get(rotation, ()))
+
     def get_pinstacks(self) -> Dict[str, List[Pin]]:
-        stacks = {}
-        for pin in self.pins:
-            # if the unit is 0 that means this pin is common to all units
-            unit_list = [pin.unit]
-            if pin.unit == 0:
-                unit_list = list(range(1, self.unit_count + 1))
+        """
+        Returns the pins grouped by their position, unit and demorgan variant.
+        The keys have the form "x{posx}_y{posy}_u{unit}_d{demorgan}".
+
+        Pins common to all units or demorgan variants are in the stacks of
+        each of them. The result is cached, do not modify it.
+        """
+        return self._cached("pinstacks", self._build_pinstacks)
 
-            # if the unit is 0 that means this pin is common to all units
-            demorgan_list = [pin.demorgan]
-            if pin.demorgan == 0:
-                demorgan_list = list(range(1, self.demorgan_count + 1))
+    def _build_pinstacks(self) -> Dict[str, List[Pin]]:
+        stacks: Dict[str, List[Pin]] = {}
+        all_units = range(1, self.unit_count + 1)
+        all_demorgans = range(1, self.demorgan_count + 1)
+        for pin in self.pins:
+            # if the unit or demorgan is 0 that means this pin is common to all of them
+            unit_list = all_units if pin.unit == 0 else (pin.unit,)
+            demorgan_list = all_demorgans if pin.demorgan == 0 else (pin.demorgan,)
 
             # add the pin to the correct stack
             for demorgan in demorgan_list:
@@ -952,11 +1104,7 @@ class KicadSymbol(KicadSymbolBase):
         return stacks
 
     def get_property(self, pname: str) -> Optional[Property]:
-        for p in self.properties:
-            if p.name == pname:
-                return p
-
-        return None
+        return self._index("property").get(pname)
 
     def add_default_properties(self) -> None:
         defaults = [
@@ -1019,18 +1167,24 @@ class KicadSymbol(KicadSymbolBase):
         return self.get_property("ki_locked") is not None
 
     def get_pins_by_name(self, name: str) -> List[Pin]:
-        pins = []
-        for pin in self.pins:
-            if pin.name == name:
-                pins += [pin]
-        return pins
+        return list(self._index("name").get(name, ()))
 
     def get_pins_by_number(self, num) -> Optional[Pin]:
-        for pin in self.pins:
-            # @todo num does not exist in pin...
-            if pin.num == str(num):
-                return pin
-        return None
+        return self._index("number").get(str(num))
+
+    def get_pins_by_unit(self, unit: int, demorgan: Optional[int] = None) -> List[Pin]:
+        """
+        Returns the pins of a unit. If [demorgan] is None, the pins of all
+        demorgan variants are returned.
+        """
+        index = self._index("unit")
+        if demorgan is not None:
+            return list(index.get((unit, demorgan), ()))
+        pins = []
+        for (u, _), unit_pins in index.items():
+            if u == unit:
+                pins.extend(unit_pins)
+        return pins
 
     def filter_pins(
         self,
@@ -1038,11 +1192,19 @@ class KicadSymbol(KicadSymbolBase):
         direction: Optional[str] = None,
         electrical_type: Optional[str] = None,
     ) -> List[Pin]:
+        rotation = self.dir_to_rotation(direction) if direction else None
+        if not electrical_type:
+            # a single criterion can be answered by an index
+            if name and rotation is None:
+                return self.get_pins_by_name(name)
+            if rotation is not None and not name:
+                return list(self._index("rotation").get(rotation, ()))
+
         pins = []
         for pin in self.pins:
             if (
                 (name and pin.name == name)
-                or (direction and pin.rotation == self.dir_to_rotation(direction))
+                or (rotation is not None and pin.rotation == rotation)
                 or (electrical_type and pin.etype == electrical_type)
             ):
                 pins.append(pin)
@@ -1064,6 +1226,99 @@ class KicadSymbol(KicadSymbolBase):
         return False
 
 
+class SymbolInheritance:
+    """
+    Index of the symbols of a library by name, and of the derived symbols by parent.
+    """
+
+    # attributes a derived symbol takes from the symbol it is derived from
+    INHERITED = (
+        "pins",
+        "rectangles",
+        "circles",
+        "arcs",
+        "polylines",
+        "texts",
+        "pin_names_offset",
+        "hide_pin_names",
+        "hide_pin_numbers",
+        "is_power",
+        "unit_count",
+        "demorgan_count",
+    )
+
+    def __init__(self, symbols: Iterable[KicadSymbol]):
+        self.symbols: Dict[str, KicadSymbol] = {}
+        self.children: Dict[str, List[KicadSymbol]] = {}
+        self._effective: Dict[str, KicadSymbol] = {}
+        for symbol in symbols:
+            self.symbols.setdefault(symbol.name, symbol)
+            if symbol.extends:
+                self.children.setdefault(symbol.extends, []).append(symbol)
+
+    def get_parent(self, symbol: KicadSymbol) -> Optional[KicadSymbol]:
+        if not symbol.extends:
+            return None
+        return self.symbols.get(symbol.extends)
+
+    def get_root(self, symbol: KicadSymbol) -> Optional[KicadSymbol]:
+        """
+        Returns the symbol that is not derived at the end of the chain of parents,
+        or None if a parent is missing or the chain is a loop.
+        """
+        seen = set()
+        while symbol.extends:
+            if symbol.name in seen:
+                return None
+            seen.add(symbol.name)
+            parent = self.get_parent(symbol)
+            if parent is None:
+                return None
+            symbol = parent
+        return symbol
+
+    def get_descendants(self, name: str) -> List[KicadSymbol]:
+        """
+        Returns the symbols derived from a symbol, directly or through other
+        derived symbols.
+        """
+        descendants = []
+        seen = {name}
+        pending = [name]
+        while pending:
+            for child in self.children.get(pending.pop(), ()):
+                if child.name not in seen:
+                    seen.add(child.name)
+                    descendants.append(child)
+                    pending.append(child.name)
+        return descendants
+
+    def get_effective_symbol(self, symbol: KicadSymbol) -> KicadSymbol:
+        """
+        Returns a view of a derived symbol with the pins and graphics of its root
+        symbol, see `INHERITED`. Other symbols are returned unchanged.
+
+        The view shares the lists of both symbols instead of copying them, do not
+        modify it. It is built once per index, so changes of other attributes of
+        the symbols in place are not seen by it.
+        """
+        if not symbol.extends or self.symbols.get(symbol.name) is not symbol:
+            return symbol
+
+        effective = self._effective.get(symbol.name)
+        if effective is None:
+            root = self.get_root(symbol)
+            if root is None:
+                return symbol
+            values = {
+                f.name: getattr(root if f.name in self.INHERITED else symbol, f.name)
+                for f in dataclasses.fields(KicadSymbol)
+            }
+            effective = KicadSymbol(**values)
+            self._effective[symbol.name] = effective
+        return effective
+
+
 @dataclass
 class KicadLibrary(KicadSymbolBase):
     """
@@ -1075,10 +1330,53 @@ class KicadLibrary(KicadSymbolBase):
     generator: str = "kicad-library-utils"
     version: str = "20220914"
 
+    def __post_init__(self):
+        self._inheritance: Optional[Tuple[List[KicadSymbol], int, SymbolInheritance]] = None
+
+    def get_inheritance(self) -> SymbolInheritance:
+        """
+        Returns the index of the symbols by name and by parent.
+
+        The index is cached until symbols are added, removed or replaced.
+        """
+        cached = self._inheritance
+        if cached is None or cached[0] is not self.symbols or cached[1] != len(self.symbols):
+            cached = (self.symbols, len(self.symbols), SymbolInheritance(self.symbols))
+            self._inheritance = cached
+        return cached[2]
+
     def write(self) -> None:
-        lib_file = open(self.filename, "w")
-        lib_file.write(self.get_sexpr())
-        lib_file.close()
+        """
+        Write the library to its file.
+
+        The library is written to a temporary file first, which then replaces the
+        library file. So the file is never left half-written.
+        """
+        (directory, name) = os.path.split(os.path.abspath(self.filename))
+        tmp_filename = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_filename, "x") as lib_file:
+                self.write_sexpr(lib_file)
+            if os.path.exists(self.filename):
+                shutil.copymode(self.filename, tmp_filename)
+            os.replace(tmp_filename, self.filename)
+        except BaseException:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
+
+    def write_sexpr(self, f) -> None:
+        """
+        Write the s-expression of the library to a file object, one symbol at a time.
+
+        The output is the same as `get_sexpr`.
+        """
+        f.write("(kicad_symbol_lib")
+        for item in (["version", self.version], ["generator", self.generator]):
+            f.write("\n  " + sexpr.build_sexp(item, indent="    "))
+        for sym in self.symbols:
+            f.write("\n  " + sexpr.build_sexp(sym.get_sexpr(), indent="    "))
+        f.write(")")
 
     def get_sexpr(self) -> str:
         sx = [
@@ -1090,6 +1388,32 @@ class KicadLibrary(KicadSymbolBase):
             sx.append(sym.get_sexpr())
         return sexpr.build_sexp(sx)
 
+    def save_snapshot(self, path: str) -> None:
+        """
+        Write a binary snapshot of the library, see `snapshot`. It is loaded with
+        `load_snapshot` much faster than the library file.
+
+        The symbols of a library opened with `open_lazy` are parsed first.
+        """
+        # kicad_sym_index depends on this module
+        from kicad_sym_index import LazySymbol
+
+        library = self
+        if any(isinstance(symbol, LazySymbol) for symbol in self.symbols):
+            symbols = [symbol.load() if isinstance(symbol, LazySymbol) else symbol for symbol in self.symbols]
+            library = dataclasses.replace(self, symbols=symbols)
+        snapshot.save(path, library, "kicad_sym", _SNAPSHOT_CLASSES)
+
+    @classmethod
+    def load_snapshot(cls, path: str) -> "KicadLibrary":
+        """
+        Load a library from a snapshot written by `save_snapshot`.
+
+        raises snapshot.SnapshotError if the file is no snapshot of a library, or
+        if the symbol classes changed since it was written
+        """
+        return snapshot.load(path, "kicad_sym", _SNAPSHOT_CLASSES)
+
     def check_extends_order(self):
         """
         Check if every parent symbol exists & appears before every
@@ -1109,13 +1433,60 @@ class KicadLibrary(KicadSymbolBase):
                 )
             already_seen.add(symbol.name)
 
+    def get_tables(self) -> "LibraryTables":
+        """
+        Returns columnar tables of the pins, rectangles and polylines of all symbols.
+
+        Needs NumPy, see `kicad_sym_table`.
+        """
+        # kicad_sym_table depends on this module
+        from kicad_sym_table import LibraryTables
+
+        return LibraryTables.from_library(self)
+
+    @classmethod
+    def open_lazy(cls, filename: str) -> "KicadLibrary":
+        """
+        Open a symbol library without parsing its symbols.
+
+        The symbols are read-only proxies (see `kicad_sym_index.LazySymbol`) which
+        are parsed on first access. Their name and `extends` are known without
+        parsing. Call their `load()` to get the `KicadSymbol`, e.g. to change it.
+
+        raises KicadFileFormatError in case of problems
+        """
+        # kicad_sym_index depends on this module
+        from kicad_sym_index import LazySymbol, SymbolIndex
+
+        try:
+            index = SymbolIndex(filename)
+            header = sexpr.parse_sexp(index.get_header() + ")")
+        except KicadFileFormatError:
+            raise
+        except ValueError as exc:
+            raise KicadFileFormatError(f"Problem while parsing the s-expr file: {exc}") from None
+
+        version = _get_value_of(header, "version")
+        if str(version) != "20231120":
+            raise KicadFileFormatError(f'Version of symbol file is "{version}", not "20231120"')
+
+        return KicadLibrary(filename, symbols=[LazySymbol(index, entry) for entry in index])
+
     @classmethod
-    def from_file(cls, filename: str, data=None) -> "KicadLibrary":
+    def from_file(cls, filename: str, data=None, workers: int = 1) -> "KicadLibrary":
         """
         Parse a symbol library from a file.
 
+        With `workers` > 1, the symbols are parsed in that many processes. The
+        result is the same.
+
         raises KicadFileFormatError in case of problems
         """
+        if workers > 1 and not data:
+            library = cls._from_file_parallel(filename, workers)
+            if library is not None:
+                return library
+
         library = KicadLibrary(filename)
 
         # read the s-expression data
@@ -1123,12 +1494,11 @@ class KicadLibrary(KicadSymbolBase):
             if data:
                 sexpr_data = sexpr.parse_sexp(data)
             else:
-                with open(filename) as f:
-                    # parse s-expr
-                    sexpr_data = sexpr.parse_sexp(f.read())
+                # parse s-expr
+                sexpr_data = sexpr.parse_sexp_file(filename)
         except ValueError as exc:
             raise KicadFileFormatError(f"Problem while parsing the s-expr file: {exc}") from None
-        sym_list = _get_array(sexpr_data, "symbol", max_level=2)
+        sym_list = _get_array2(sexpr_data, "symbol")
 
         # Because of the various file format changes in the development of kicad v6 and v7, we want
         # to ensure that this parser is only used with v6 files. Any other version will most likely
@@ -1138,120 +1508,268 @@ class KicadLibrary(KicadSymbolBase):
             raise KicadFileFormatError(f'Version of symbol file is "{version}", not "20231120"')
 
         # for tracking derived symbols we need another dict
-        symbol_names = {}
+        symbol_names: Dict[str, KicadSymbol] = {}
 
         # itertate over symbol
         for item in sym_list:
-            item_type = item.pop(0)
-            if item_type != "symbol":
-                raise KicadFileFormatError(f"Unexpected token found: {item_type}")
-            # retrieving the `partname`, even if formatted as `libname:partname` (legacy format)
-            partname = str(item.pop(0).split(":")[-1])
-
-            # we found a new part, extract the symbol name
-            symbol = KicadSymbol(partname, libname=filename, filename=filename)
-
-            # build a dict of symbolname -> symbol
-            if partname in symbol_names:
-                raise KicadFileFormatError(f"Duplicate symbols: {partname}")
-            symbol_names[partname] = symbol
-
-            # extract extends property
-            extends = _get_array2(item, "extends")
-            if extends:
-                symbol.extends = extends[0][1]
-
-            # extract properties
-            for prop in _get_array(item, "property"):
+            library.symbols.append(_symbol_from_sexpr(item, filename, symbol_names))
+
+        return library
+
+    @classmethod
+    def _from_file_parallel(cls, filename: str, workers: int) -> Optional["KicadLibrary"]:
+        """
+        Parse the symbols of a library in a process pool, in batches of consecutive
+        symbols. Returns None if the file is unusual and should be parsed in one go.
+        """
+        with open(filename, "rb") as f:
+            data = f.read()
+        # a few batches per worker even out the load
+        cuts = _split_symbols(data, 4 * workers)
+        if cuts is None or len(cuts) < 3:
+            return None
+
+        # the file without the symbols contains the header and must be valid as well
+        try:
+            header = sexpr.parse_sexp((data[: cuts[0]] + data[cuts[-1] :]).decode("utf-8"))
+        except ValueError as exc:
+            raise KicadFileFormatError(f"Problem while parsing the s-expr file: {exc}") from None
+        version = _get_value_of(header, "version")
+        if str(version) != "20231120":
+            raise KicadFileFormatError(f'Version of symbol file is "{version}", not "20231120"')
+
+        batches = [data[start:end] for (start, end) in zip(cuts, cuts[1:])]
+        library = KicadLibrary(filename)
+        symbol_names: Set[str] = set()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # unpickling the symbols creates lots of objects but no garbage
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for symbols in executor.map(parse_symbols, [filename] * len(batches), batches):
+                    for symbol in symbols:
+                        if symbol.name in symbol_names:
+                            raise KicadFileFormatError(f"Duplicate symbols: {symbol.name}")
+                        symbol_names.add(symbol.name)
+                    library.symbols.extend(symbols)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        return library
+
+
+def _symbol_from_sexpr(item: List[Any], filename: str, symbol_names: Dict[str, KicadSymbol]) -> KicadSymbol:
+    """
+    Build a symbol from its (symbol ...) node and add it to `symbol_names`, the
+    symbols of the library by name.
+    """
+    item_type = item.pop(0)
+    if item_type != "symbol":
+        raise KicadFileFormatError(f"Unexpected token found: {item_type}")
+    # retrieving the `partname`, even if formatted as `libname:partname` (legacy format)
+    partname = str(item.pop(0).split(":")[-1])
+
+    # we found a new part, extract the symbol name
+    symbol = KicadSymbol(partname, libname=filename, filename=filename)
+
+    # build a dict of symbolname -> symbol
+    if partname in symbol_names:
+        raise KicadFileFormatError(f"Duplicate symbols: {partname}")
+    symbol_names[partname] = symbol
+
+    # sort the children by their keyword, in a single pass
+    properties = []
+    subsymbols = []
+    # of the other keywords, only the first occurrence is used
+    first_of: Dict[Any, List[Any]] = {}
+    for child in item:
+        if isinstance(child, list) and child:
+            head = child[0]
+            if head == "property":
+                properties.append(child)
+            elif head == "symbol":
+                subsymbols.append(child)
+            elif head not in first_of:
+                first_of[head] = child
+
+    # extract extends property
+    if "extends" in first_of:
+        symbol.extends = first_of["extends"][1]
+
+    # extract properties
+    for prop in properties:
+        try:
+            # TODO: do not append the new property, if it is None
+            symbol.properties.append(Property.from_sexpr(prop))
+        except ValueError as exc:
+            raise KicadFileFormatError(
+                f"Failed to import '{partname}': {exc}"
+            ) from exc
+
+    # get flags
+    symbol.in_bom = first_of.get("in_bom", [None, "no"])[1] == "yes"
+    symbol.on_board = first_of.get("on_board", [None, "no"])[1] == "yes"
+    if "power" in first_of:
+        symbol.is_power = True
+
+    # get pin-numbers properties
+    pin_numbers_info = first_of.get("pin_numbers")
+    if pin_numbers_info:
+        if "hide" in pin_numbers_info:
+            symbol.hide_pin_numbers = True
+
+    # get pin-name properties
+    pin_names_info = first_of.get("pin_names")
+    if pin_names_info:
+        if "hide" in pin_names_info:
+            symbol.hide_pin_names = True
+        # sometimes the pin_name_offset value does not exist, then use 20mil as default
+        symbol.pin_names_offset = _get_value_of(
+            pin_names_info, "offset", 0.508
+        )
+
+    # get the actual geometry information
+    # it is split over units
+    for unit_data in subsymbols:
+        # we found a new 'subpart' (no clue how to call it properly)
+        subpart_type = unit_data.pop(0)
+        if subpart_type != "symbol":
+            raise KicadFileFormatError(
+                f"Unexpected token found as 'subsymbol' of {item_type}: {subpart_type}"
+            )
+        name = unit_data.pop(0)
+
+        # split the name
+        m1 = _unit_name_regex.match(name)
+        if not m1 or m1.group(1) != partname:
+            raise KicadFileFormatError(
+                f"Failed to parse subsymbol due to invalid name: {name}"
+            )
+
+        (unit_idx, demorgan_idx) = (m1.group(2), m1.group(3))
+        unit_idx = int(unit_idx)
+        demorgan_idx = int(demorgan_idx)
+
+        # update the amount of units, alternative-styles (demorgan)
+        symbol.unit_count = max(unit_idx, symbol.unit_count)
+        symbol.demorgan_count = max(demorgan_idx, symbol.demorgan_count)
+
+        # extract pins and graphical items
+        for child in unit_data:
+            if not isinstance(child, list) or not child:
+                continue
+            head = child[0]
+            if head == "pin":
                 try:
-                    # TODO: do not append the new property, if it is None
-                    symbol.properties.append(Property.from_sexpr(prop))
-                except ValueError as exc:
+                    symbol.pins.append(Pin.from_sexpr(child, unit_idx, demorgan_idx))
+                except ValueError as valexc:
                     raise KicadFileFormatError(
-                        f"Failed to import '{partname}': {exc}"
-                    ) from exc
-
-            # get flags
-            symbol.in_bom = _get_value_of(item, "in_bom", "no") == "yes"
-            symbol.on_board = _get_value_of(item, "on_board", "no") == "yes"
-            if _has_value(item, "power"):
-                symbol.is_power = True
-
-            # get pin-numbers properties
-            pin_numbers_info = _get_array2(item, "pin_numbers")
-            if pin_numbers_info:
-                if "hide" in pin_numbers_info[0]:
-                    symbol.hide_pin_numbers = True
-
-            # get pin-name properties
-            pin_names_info = _get_array2(item, "pin_names")
-            if pin_names_info:
-                if "hide" in pin_names_info[0]:
-                    symbol.hide_pin_names = True
-                # sometimes the pin_name_offset value does not exist, then use 20mil as default
-                symbol.pin_names_offset = _get_value_of(
-                    pin_names_info[0], "offset", 0.508
+                        f"Failed to parse symbol {partname}: {valexc}"
+                    ) from None
+            elif head == "circle":
+                symbol.circles.append(
+                    Circle.from_sexpr(child, unit_idx, demorgan_idx)
                 )
+            elif head == "arc":
+                symbol.arcs.append(Arc.from_sexpr(child, unit_idx, demorgan_idx))
+            elif head == "rectangle":
+                # symbol.polylines.append(
+                #     Rectangle.from_sexpr(rect, unit, demorgan).as_polyline()
+                # )
+                symbol.rectangles.append(
+                    Rectangle.from_sexpr(child, unit_idx, demorgan_idx)
+                )
+            elif head == "polyline":
+                symbol.polylines.append(
+                    Polyline.from_sexpr(child, unit_idx, demorgan_idx)
+                )
+            elif head == "text":
+                symbol.texts.append(Text.from_sexpr(child, unit_idx, demorgan_idx))
+
+    return symbol
+
+
+# the classes that are stored in snapshots of libraries
+_SNAPSHOT_CLASSES = [
+    *map(
+        snapshot.SnapshotClass.from_dataclass,
+        [
+            Color,
+            TextEffect,
+            AltFunction,
+            Pin,
+            Circle,
+            Arc,
+            Point,
+            Polyline,
+            Text,
+            Rectangle,
+            Property,
+            KicadSymbol,
+            KicadLibrary,
+        ],
+    ),
+]
+
+
+def _split_symbols(data: bytes, count: int) -> Optional[List[int]]:
+    """
+    Returns offsets in the data of a library file that split its top level nodes
+    into about `count` parts of the same size: the start of the first symbol, the
+    starts of some of the following symbols and the end of the last node.
 
-            # get the actual geometry information
-            # it is split over units
-            subsymbols = _get_array2(item, "symbol")
-            for unit_data in subsymbols:
-                # we found a new 'subpart' (no clue how to call it properly)
-                subpart_type = unit_data.pop(0)
-                if subpart_type != "symbol":
-                    raise KicadFileFormatError(
-                        f"Unexpected token found as 'subsymbol' of {item_type}: {subpart_type}"
-                    )
-                name = unit_data.pop(0)
-
-                # split the name
-                m1 = re.match(r"^" + re.escape(partname) + r"_(\d+?)_(\d+?)$", name)
-                if not m1:
-                    raise KicadFileFormatError(
-                        f"Failed to parse subsymbol due to invalid name: {name}"
-                    )
+    Returns None for files with escaped quotes, CR line endings (which the parser
+    translates) or unbalanced parentheses.
+    """
+    if b'\\"' in data or b"\r" in data:
+        return None
+    # the parentheses outside of strings, without any Python loop over the file
+    parts = data.split(b'"')
+    outside = b"".join(parts[0::2])
+    if len(parts) % 2 == 0 or outside.count(b"(") != outside.count(b")"):
+        return None
+    outside_ends = list(itertools.accumulate(map(len, parts[0::2])))
+    inside_ends = list(itertools.accumulate(map(len, parts[1::2])))
+
+    def file_offset(position: int) -> int:
+        # parts before the one with the position, and the quotes between them
+        i = bisect.bisect_right(outside_ends, position)
+        if i == 0:
+            return position
+        return position + inside_ends[i - 1] + 2 * i
+
+    cuts = []
+    depth = 0
+    position = 0
+    for target in range(0, len(outside), len(outside) // count + 1):
+        # the next symbol after the target, but not the last one again
+        candidate = outside.find(b"(symbol", max(target, position + 1 if cuts else 0))
+        while candidate >= 0:
+            depth += outside.count(b"(", position, candidate) - outside.count(b")", position, candidate)
+            position = candidate
+            if depth == 1 and outside[candidate + 7 : candidate + 8].isspace():
+                cuts.append(file_offset(candidate))
+                break
+            candidate = outside.find(b"(symbol", candidate + 1)
+
+    if not cuts:
+        return None
+    cuts.append(data.rindex(b")"))
+    return cuts
 
-                (unit_idx, demorgan_idx) = (m1.group(1), m1.group(2))
-                unit_idx = int(unit_idx)
-                demorgan_idx = int(demorgan_idx)
-
-                # update the amount of units, alternative-styles (demorgan)
-                symbol.unit_count = max(unit_idx, symbol.unit_count)
-                symbol.demorgan_count = max(demorgan_idx, symbol.demorgan_count)
-
-                # extract pins and graphical items
-                for pin in _get_array(unit_data, "pin"):
-                    try:
-                        symbol.pins.append(Pin.from_sexpr(pin, unit_idx, demorgan_idx))
-                    except ValueError as valexc:
-                        raise KicadFileFormatError(
-                            f"Failed to parse symbol {partname}: {valexc}"
-                        ) from None
-                for circle in _get_array(unit_data, "circle"):
-                    symbol.circles.append(
-                        Circle.from_sexpr(circle, unit_idx, demorgan_idx)
-                    )
-                for arc in _get_array(unit_data, "arc"):
-                    symbol.arcs.append(Arc.from_sexpr(arc, unit_idx, demorgan_idx))
-                for rect in _get_array(unit_data, "rectangle"):
-                    # symbol.polylines.append(
-                    #     Rectangle.from_sexpr(rect, unit, demorgan).as_polyline()
-                    # )
-                    symbol.rectangles.append(
-                        Rectangle.from_sexpr(rect, unit_idx, demorgan_idx)
-                    )
-                for poly in _get_array(unit_data, "polyline"):
-                    symbol.polylines.append(
-                        Polyline.from_sexpr(poly, unit_idx, demorgan_idx)
-                    )
-                for text in _get_array(unit_data, "text"):
-                    symbol.texts.append(Text.from_sexpr(text, unit_idx, demorgan_idx))
 
-            # add it to the list of symbols
-            library.symbols.append(symbol)
+def parse_symbols(filename: str, data: bytes) -> List[KicadSymbol]:
+    """
+    Parse the (symbol ...) nodes in a part of a library file.
 
-        return library
+    raises KicadFileFormatError in case of problems
+    """
+    try:
+        items = sexpr.parse_sexp("(" + data.decode("utf-8") + ")")
+    except ValueError as exc:
+        raise KicadFileFormatError(f"Problem while parsing the s-expr file: {exc}") from None
+    symbol_names: Dict[str, KicadSymbol] = {}
+    return [_symbol_from_sexpr(item, filename, symbol_names) for item in _get_array2(items, "symbol")]
 
 
 if __name__ == "__main__":
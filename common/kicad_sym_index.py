@@ -0,0 +1,301 @@
+"""
+Index of the top level symbols of a .kicad_sym file.
+
+The index is built by scanning the file once for parentheses and quotes, without
+parsing it. It allows to access single symbols of large libraries.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+import sexpr
+from kicad_sym import KicadFileFormatError, KicadLibrary, KicadSymbol, parse_symbols
+
+_paren_regex = re.compile(rb"[()]")
+
+
+@dataclass
+class SymbolIndexEntry:
+    name: str
+    # byte range of the (symbol ...) node, end is exclusive
+    start: int
+    end: int
+    # line range of the node, 0-based and end is exclusive
+    start_line: int
+    end_line: int
+    extends: Optional[str]
+    # SHA-1 of the bytes of the node
+    hash: str
+    # digest of the parsed node, see SymbolIndex.get_fingerprint()
+    fingerprint: Optional[str] = None
+
+
+class SymbolIndex:
+    def __init__(self, filename: str):
+        self.filename: str = filename
+        self.entries: Dict[str, SymbolIndexEntry] = {}
+        # the library header (version, generator, ...) ends at the first symbol
+        self.header_end: int = 0
+        # all reads of symbols share one handle, opened on the first read
+        self._file: Optional[BinaryIO] = None
+
+        with open(filename, "rb") as f:
+            data = f.read()
+
+        for entry in self._scan(data):
+            if entry.name in self.entries:
+                raise KicadFileFormatError(f"Duplicate symbols: {entry.name}")
+            self.entries[entry.name] = entry
+
+        if self.entries:
+            self.header_end = next(iter(self.entries.values())).start
+        else:
+            self.header_end = max(data.rfind(b")"), 0)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __getitem__(self, name: str) -> SymbolIndexEntry:
+        return self.entries[name]
+
+    def __iter__(self) -> Iterator[SymbolIndexEntry]:
+        return iter(self.entries.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_file"] = None
+        return state
+
+    def close(self) -> None:
+        """
+        Close the file handle of the index. It is opened again by the next read.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_range(self, start: int, end: int) -> bytes:
+        if self._file is None:
+            self._file = open(self.filename, "rb")
+        self._file.seek(start)
+        return self._file.read(end - start)
+
+    @staticmethod
+    def _scan(data: bytes) -> Iterator[SymbolIndexEntry]:
+        depth = 0
+        position = 0
+        line = 0
+        line_position = 0
+        in_string = False
+
+        # the top level symbol that is currently scanned
+        start = start_line = 0
+        name = None
+        extends = None
+        # the string that follows a "(symbol" or "(extends" keyword, and its parts
+        capture = None
+        parts: List[bytes] = []
+
+        for segment in data.split(b'"'):
+            if in_string:
+                if capture is not None:
+                    parts.append(segment)
+                # a quote preceded by a backslash does not end the string
+                if segment.endswith(b"\\"):
+                    if capture is not None:
+                        parts[-1] += b'"'
+                else:
+                    in_string = False
+                    if capture is not None:
+                        value = b"".join(parts).replace(b'\\"', b'"').decode("utf-8")
+                        if capture == "symbol":
+                            # the name might be formatted as `libname:partname` (legacy format)
+                            name = value.split(":")[-1]
+                        else:
+                            extends = value
+                        capture = None
+                        parts = []
+                position += len(segment) + 1
+                continue
+
+            closes = segment.count(b")")
+            if depth - closes > 1 and b"extends" not in segment:
+                # nothing of interest in here, the nesting level stays inside of a symbol
+                depth += segment.count(b"(") - closes
+            else:
+                for match in _paren_regex.finditer(segment):
+                    if match.group() == b"(":
+                        depth += 1
+                        if depth == 2:
+                            start = position + match.start()
+                            line += data.count(b"\n", line_position, start)
+                            line_position = start
+                            start_line = line
+                            name = extends = None
+                            if segment[match.end():].strip() == b"symbol":
+                                capture = "symbol"
+                        elif depth == 3 and name is not None:
+                            if segment[match.end():].strip() == b"extends":
+                                capture = "extends"
+                    else:
+                        if depth == 2 and name is not None:
+                            end = position + match.end()
+                            line += data.count(b"\n", line_position, end)
+                            line_position = end
+                            yield SymbolIndexEntry(
+                                name=name,
+                                start=start,
+                                end=end,
+                                start_line=start_line,
+                                end_line=line + 1,
+                                extends=extends,
+                                hash=hashlib.sha1(data[start:end]).hexdigest(),
+                            )
+                            name = None
+                        depth -= 1
+
+            in_string = True
+            position += len(segment) + 1
+
+    def get_header(self) -> str:
+        """
+        Returns the text of the library up to the first symbol.
+        """
+        return self._read_range(0, self.header_end).decode("utf-8")
+
+    def _read(self, entry: SymbolIndexEntry) -> bytes:
+        return self._read_range(entry.start, entry.end)
+
+    def get_text(self, name: str) -> str:
+        """
+        Returns the s-expression text of a symbol.
+        """
+        return self._read(self.entries[name]).decode("utf-8")
+
+    def get_fingerprint(self, name: str) -> str:
+        """
+        Returns a digest of the s-expression of a symbol that does not depend on its
+        formatting (see `sexpr.fingerprint`). Symbols with the same fingerprint
+        are equal.
+        """
+        entry = self.entries[name]
+        if entry.fingerprint is None:
+            entry.fingerprint = sexpr.fingerprint(self._read(entry))
+        return entry.fingerprint
+
+    def load_symbols(self, names: Iterable[str]) -> KicadLibrary:
+        """
+        Load only the given symbols of the library.
+
+        The symbols are the same as if the whole library had been loaded with
+        `KicadLibrary.from_file`.
+
+        raises KicadFileFormatError in case of problems
+        """
+        entries = sorted((self.entries[name] for name in set(names)), key=lambda entry: entry.start)
+
+        parts = [self._read_range(0, self.header_end)]
+        for entry in entries:
+            parts.append(self._read(entry))
+            parts.append(b"\n")
+        parts.append(b")\n")
+
+        return KicadLibrary.from_file(self.filename, data=b"".join(parts).decode("utf-8"))
+
+    def parse_symbol(self, name: str) -> KicadSymbol:
+        """
+        Parse a single symbol, without the library header. The header has to be
+        checked by the caller, like `KicadLibrary.open_lazy` does.
+
+        raises KicadFileFormatError in case of problems
+        """
+        symbols = parse_symbols(self.filename, self._read(self.entries[name]))
+        if len(symbols) != 1:
+            raise KicadFileFormatError(f"Unexpected content in symbol {name}")
+        return symbols[0]
+
+
+class LazySymbol:
+    """
+    Read-only proxy for a symbol of a library opened with `KicadLibrary.open_lazy`.
+
+    The name, parent and file of the symbol are taken from the index, the
+    `KicadSymbol` is only parsed when any other attribute is read, or by `load`.
+    All proxies of a library read their symbols through the file handle of the
+    shared index.
+
+    The proxy is no `KicadSymbol`. Attributes can not be set on it, change the
+    symbol returned by `load` instead.
+    """
+
+    __slots__ = ("index_entry", "_index", "_symbol")
+
+    def __init__(self, index: SymbolIndex, entry: SymbolIndexEntry, symbol: Optional[KicadSymbol] = None):
+        object.__setattr__(self, "index_entry", entry)
+        object.__setattr__(self, "_index", index)
+        object.__setattr__(self, "_symbol", symbol)
+
+    def __reduce__(self):
+        # copies and pickles must not be created without calling __init__
+        return (LazySymbol, (self._index, self.index_entry, self._symbol))
+
+    def load(self) -> KicadSymbol:
+        """
+        Returns the symbol, it is parsed on the first call.
+
+        raises KicadFileFormatError in case of problems
+        """
+        if self._symbol is None:
+            symbol = self._index.parse_symbol(self.index_entry.name)
+            object.__setattr__(self, "_symbol", symbol)
+        return self._symbol
+
+    @property
+    def name(self) -> str:
+        if self._symbol is None:
+            return self.index_entry.name
+        return self._symbol.name
+
+    @property
+    def extends(self) -> Optional[str]:
+        if self._symbol is None:
+            return self.index_entry.extends
+        return self._symbol.extends
+
+    @property
+    def libname(self) -> str:
+        if self._symbol is None:
+            return Path(self._index.filename).stem
+        return self._symbol.libname
+
+    @property
+    def filename(self) -> str:
+        if self._symbol is None:
+            return self._index.filename
+        return self._symbol.filename
+
+    @property
+    def fingerprint(self) -> str:
+        return self._index.get_fingerprint(self.index_entry.name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"can not set {name} of a lazily loaded symbol, set it on the symbol returned by load()")
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazySymbol):
+            other = other.load()
+        return self.load() == other
+
+    def __repr__(self) -> str:
+        if self._symbol is None:
+            return f"LazySymbol({self.index_entry.name!r})"
+        return repr(self._symbol)
@@ -0,0 +1,214 @@
+"""
+Columnar tables of the pins and graphic items of a symbol library.
+
+Every table has one row per element of all symbols of a library, with one NumPy
+array per attribute. Checks that look at each element on its own can be evaluated
+for a whole library at once, instead of a Python loop per element.
+
+NumPy is an optional dependency, it is only needed to build the tables.
+"""
+
+from functools import cached_property
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+from kicad_sym import KicadLibrary, KicadSymbol, Pin
+
+NUMPY_AVAILABLE = True
+try:
+    import numpy as np
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class ElementTable:
+    """
+    Base class of the tables, one row per element in the list `attribute` of
+    each symbol. The rows of a symbol are consecutive and in the order of the list.
+    """
+
+    attribute = ""
+
+    def __init__(self, symbols: List[KicadSymbol]):
+        self.symbols: List[KicadSymbol] = symbols
+        self._symbol_index: Dict[int, int] = {id(sym): i for (i, sym) in enumerate(symbols)}
+        # keep the lists to detect changes of a symbol after the table was built
+        self._lists: List[List[Any]] = [getattr(sym, self.attribute) for sym in symbols]
+        self.elements: List[Any] = [e for elements in self._lists for e in elements]
+
+        self._counts: List[int] = list(map(len, self._lists))
+        counts = np.array(self._counts, dtype=np.intp)
+        # rows of the symbol i are offsets[i]:offsets[i + 1]
+        self.offsets = np.zeros(len(symbols) + 1, dtype=np.intp)
+        np.cumsum(counts, out=self.offsets[1:])
+
+        self.symbol = np.repeat(np.arange(len(symbols), dtype=np.int32), counts)
+        self.unit = self._column("unit", np.int32)
+        self.demorgan = self._column("demorgan", np.int32)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def _column(self, attribute: str, dtype) -> "np.ndarray":
+        return np.fromiter(map(attrgetter(attribute), self.elements), dtype=dtype, count=len(self.elements))
+
+    def _codes(self, attribute: str) -> Tuple["np.ndarray", List[Any]]:
+        # encode the values of a column as indexes into a list of the distinct values
+        codes: Dict[Any, int] = {}
+        column = np.fromiter(
+            (codes.setdefault(getattr(e, attribute), len(codes)) for e in self.elements),
+            dtype=np.int32,
+            count=len(self.elements),
+        )
+        return (column, list(codes))
+
+    def symbol_index(self, symbol: KicadSymbol) -> Optional[int]:
+        """
+        Returns the index of a symbol, or None if the symbol is not in the table
+        or its elements were added or removed since the table was built.
+        """
+        i = self._symbol_index.get(id(symbol))
+        if i is None:
+            return None
+        elements = getattr(symbol, self.attribute)
+        if elements is not self._lists[i] or len(elements) != self._counts[i]:
+            return None
+        return i
+
+    def rows(self, symbol: KicadSymbol) -> Optional[slice]:
+        """
+        Returns the rows of a symbol, or None if it is not in the table.
+        """
+        i = self.symbol_index(symbol)
+        if i is None:
+            return None
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def group_by_symbol(self, mask: "np.ndarray") -> Dict[int, List[Any]]:
+        """
+        Returns the elements of the rows selected by a mask, by symbol index.
+        """
+        groups: Dict[int, List[Any]] = {}
+        for row in np.flatnonzero(mask).tolist():
+            groups.setdefault(int(self.symbol[row]), []).append(self.elements[row])
+        return groups
+
+
+class PinTable(ElementTable):
+    attribute = "pins"
+
+    def __init__(self, symbols: List[KicadSymbol]):
+        super().__init__(symbols)
+        self.posx = self._column("posx", np.float64)
+        self.posy = self._column("posy", np.float64)
+        self.rotation = self._column("rotation", np.int32)
+        self.length = self._column("length", np.float64)
+        # the electrical type of a pin is etype_names[etype]
+        (self.etype, self.etype_names) = self._codes("etype")
+        self.hidden = self._column("is_hidden", np.bool_)
+        self._selected: Dict[Any, Dict[int, List[Pin]]] = {}
+
+    def off_grid(self, gridspacing) -> "np.ndarray":
+        """
+        Returns a mask of the pins that are not on a grid of `gridspacing` mil.
+
+        `gridspacing` is a number, or an array with the grid of each symbol.
+        """
+        gridspacing = np.asarray(gridspacing)
+        if gridspacing.ndim:
+            gridspacing = gridspacing[self.symbol]
+        # same rounding as mm_to_mil()
+        posx = np.rint(self.posx / 0.0254)
+        posy = np.rint(self.posy / 0.0254)
+        return (posx % gridspacing != 0) | (posy % gridspacing != 0)
+
+    def unusual_length(self, min_length: int, max_length: int = 300, multiple: int = 50) -> "np.ndarray":
+        """
+        Returns a mask of the pins with a length (in mil) that is not zero, but at
+        most `min_length`, longer than `max_length` or no multiple of `multiple`.
+        """
+        length = np.rint(self.length / 0.0254)
+        return (length != 0) & (
+            (length <= min_length) | (length > max_length) | (length % multiple != 0)
+        )
+
+    def get_selected(self, symbol: KicadSymbol, mask: str, *args: Any) -> Optional[List[Pin]]:
+        """
+        Returns the pins of a symbol selected by the mask method `mask` called with
+        `args`, or None if the symbol is not in the table.
+
+        The mask is computed once for all pins of the table.
+        """
+        i = self.symbol_index(symbol)
+        if i is None:
+            return None
+        key = (mask, args)
+        selected = self._selected.get(key)
+        if selected is None:
+            selected = self._selected[key] = self.group_by_symbol(getattr(self, mask)(*args))
+        return list(selected.get(i, ()))
+
+
+class RectangleTable(ElementTable):
+    attribute = "rectangles"
+
+    def __init__(self, symbols: List[KicadSymbol]):
+        super().__init__(symbols)
+        self.startx = self._column("startx", np.float64)
+        self.starty = self._column("starty", np.float64)
+        self.endx = self._column("endx", np.float64)
+        self.endy = self._column("endy", np.float64)
+        self.stroke_width = self._column("stroke_width", np.float64)
+        (self.fill_type, self.fill_type_names) = self._codes("fill_type")
+
+
+class PolylineTable(ElementTable):
+    attribute = "polylines"
+
+    def __init__(self, symbols: List[KicadSymbol]):
+        super().__init__(symbols)
+        self.stroke_width = self._column("stroke_width", np.float64)
+        (self.fill_type, self.fill_type_names) = self._codes("fill_type")
+
+        # the points of the polyline i are x/y[point_offsets[i]:point_offsets[i + 1]]
+        counts = np.fromiter(
+            (len(pl.points) for pl in self.elements), dtype=np.intp, count=len(self.elements)
+        )
+        self.point_offsets = np.zeros(len(self.elements) + 1, dtype=np.intp)
+        np.cumsum(counts, out=self.point_offsets[1:])
+        n_points = int(self.point_offsets[-1])
+        self.x = np.fromiter(
+            (p.x for pl in self.elements for p in pl.points), dtype=np.float64, count=n_points
+        )
+        self.y = np.fromiter(
+            (p.y for pl in self.elements for p in pl.points), dtype=np.float64, count=n_points
+        )
+
+
+class LibraryTables:
+    """
+    The tables of a library, each one is built on first access.
+    """
+
+    def __init__(self, symbols: List[KicadSymbol]):
+        if not NUMPY_AVAILABLE:
+            raise ImportError(
+                'The symbol tables need NumPy. Try to install it using: "pip install numpy"'
+            )
+        self.symbols: List[KicadSymbol] = symbols
+
+    @classmethod
+    def from_library(cls, library: KicadLibrary) -> "LibraryTables":
+        return cls(list(library.symbols))
+
+    @cached_property
+    def pins(self) -> PinTable:
+        return PinTable(self.symbols)
+
+    @cached_property
+    def rectangles(self) -> RectangleTable:
+        return RectangleTable(self.symbols)
+
+    @cached_property
+    def polylines(self) -> PolylineTable:
+        return PolylineTable(self.symbols)
@@ -1,45 +1,69 @@
 """
 Library for parsing a library table file (e.g. used for project-specific library settings files).
 """
-import re
-from typing import Dict, List
+from typing import BinaryIO, Dict, List
+
+from sexpr import iter_sexp_events
+
+
+def _lines(f: BinaryIO, start: int, end: int) -> str:
+    """
+    Returns the lines of the file that contain the bytes from start to end.
+    """
+    while start > 0:
+        f.seek(start - 1)
+        if f.read(1) == b"\n":
+            break
+        start -= 1
+    f.seek(start)
+    return (f.read(end + 1 - start) + f.readline()).decode("utf-8")
 
 
 class LibTable:
     def __init__(self, filename: str):
 
-        RE_NAME = r'\(name "?([^\)"]*)"?\)'
-        RE_TYPE = r'\(type "?([^\)"]*)"?\)'
-        RE_URI = r'\(uri "?([^\)"]*)"?\)'
-        RE_OPT = r'\(options "?([^\)"]*)"?\)'
-        RE_DESC = r'\(descr "?([^\)"]*)"?'
+        # keys of the entries for the fields of a (lib ...) node
+        FIELDS = {"name": "name", "type": "type", "uri": "uri", "options": "opt", "descr": "desc"}
 
         self.entries: List[Dict[str, str]] = []
         self.errors: List[str] = []
 
-        with open(filename, "r") as lib_table_file:
-
-            for line in lib_table_file:
-
-                # Skip lines that do not define a library
-                if "(lib " not in line:
-                    continue
+        with open(filename, "rb") as lib_table_file:
 
-                re_name = re.search(RE_NAME, line)
-                re_type = re.search(RE_TYPE, line)
-                re_uri = re.search(RE_URI, line)
-                re_opt = re.search(RE_OPT, line)
-                re_desc = re.search(RE_DESC, line)
+            incomplete = []
+            depth = 0
+            entry = None
+            field = None
+            start = 0
+            for event, value, offset in iter_sexp_events(lib_table_file, raw_atoms=True):
+                if event == "open":
+                    depth += 1
+                    if depth == 2 and value == "lib":
+                        entry = {}
+                        start = offset
+                    elif depth == 3 and entry is not None:
+                        field = FIELDS.get(value)
+                        if field is not None and field in entry:
+                            # only the first value of a field is used
+                            field = None
 
-                if re_name and re_type and re_uri and re_opt and re_desc:
-                    entry = {}
-                    entry["name"] = re_name.groups()[0]
-                    entry["type"] = re_type.groups()[0]
-                    entry["uri"] = re_uri.groups()[0]
-                    entry["opt"] = re_opt.groups()[0]
-                    entry["desc"] = re_desc.groups()[0]
+                elif event == "close":
+                    depth -= 1
+                    if depth == 2:
+                        if field is not None:
+                            # a field without a value is empty
+                            entry.setdefault(field, "")
+                        field = None
+                    elif depth == 1 and entry is not None:
+                        if len(entry) == len(FIELDS):
+                            self.entries.append(entry)
+                        else:
+                            incomplete.append((start, offset))
+                        entry = None
 
-                    self.entries.append(entry)
+                elif field is not None and field not in entry:
+                    entry[field] = value
 
-                else:
-                    self.errors.append(line)
+            # report the lines of the libraries with missing fields
+            for start, end in incomplete:
+                self.errors.append(_lines(lib_table_file, start, end))
@@ -0,0 +1,172 @@
+"""
+Cache of loaded symbol libraries and footprints in a directory.
+
+The entries are keyed by the content of the file and by the version of the
+parser code (all modules of this directory), so a changed file or an update of
+the parser never returns a stale result. When the cache grows larger than its
+size limit, the least recently used entries are removed.
+
+The entries are snapshots (see `snapshot`), so loading them never executes code
+from the cache directory.
+"""
+
+import gc
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import kicad_sym
+from kicad_mod import KicadMod
+from kicad_sym import KicadLibrary
+
+# increase when the cached data changes in a way that is not visible in the
+# source code of the parser modules
+CACHE_FORMAT = 1
+
+DEFAULT_MAX_SIZE = 1 << 30
+
+
+def _code_version() -> str:
+    """
+    Returns a hash of the source code of all modules in the directory of the
+    parser modules. The loaders only import modules from there (sexpr, geometry,
+    boundingbox, ...), so the hash changes with any code that builds the cached
+    objects.
+    """
+    h = hashlib.sha1(str(CACHE_FORMAT).encode("ascii"))
+    for path in sorted(Path(kicad_sym.__file__).parent.glob("*.py")):
+        h.update(path.name.encode("utf-8"))
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _file_hash(filename: str) -> str:
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ParseCache:
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory: str = directory
+        # maximum size of all cache files in bytes
+        self.max_size: int = max_size
+        self.version: str = _code_version()
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, kind: str, filename: str) -> str:
+        key = hashlib.sha1(f"{kind}:{self.version}:{_file_hash(filename)}".encode("ascii"))
+        return os.path.join(self.directory, key.hexdigest() + ".snapshot")
+
+    def _load(
+        self,
+        kind: str,
+        filename: str,
+        build: Callable[[], Any],
+        load: Callable[[str], Any],
+        save: Callable[[Any, str], None],
+    ) -> Any:
+        path = self._entry_path(kind, filename)
+        try:
+            # loading creates lots of objects but no garbage
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                result = load(path)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            # the modification time tracks the last use of an entry
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # broken entry (e.g. a partial write), build it again
+            self._remove(path)
+
+        result = build()
+        self._store(path, result, save)
+        return result
+
+    def _store(self, path: str, value: Any, save: Callable[[Any, str], None]) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            save(value, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            # the cache is optional, a read-only or full cache directory is no error
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits into `max_size`.
+        """
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".snapshot"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        entries.sort()
+        for (_, size, path) in entries:
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def load_library(self, filename: str, workers: int = 1) -> KicadLibrary:
+        """
+        Returns the same as `KicadLibrary.from_file(filename, workers=workers)`.
+        """
+        library = self._load(
+            "kicad_sym",
+            filename,
+            lambda: KicadLibrary.from_file(filename, workers=workers),
+            KicadLibrary.load_snapshot,
+            KicadLibrary.save_snapshot,
+        )
+        # the entry might have been created for a file with the same content at another path
+        library.filename = filename
+        for symbol in library.symbols:
+            symbol.filename = filename
+            symbol.libname = Path(filename).stem
+        return library
+
+    def load_footprint(self, filename: str) -> KicadMod:
+        """
+        Returns the same as `KicadMod(filename)`.
+        """
+        module = self._load(
+            "kicad_mod", filename, lambda: KicadMod(filename), KicadMod.loadSnapshot, KicadMod.saveSnapshot
+        )
+        module.filename = filename
+        return module
+
+
+def open_cache(directory: Optional[str]) -> Optional[ParseCache]:
+    """
+    Returns a cache in the given directory, or None if no directory is given.
+    """
+    if not directory:
+        return None
+    return ParseCache(directory)
@@ -2,8 +2,12 @@
 code extracted from: http://rosettacode.org/wiki/S-Expressions
 """
 
+import gc
+import hashlib
+import mmap
+import os
 import re
-from typing import Any, Optional
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Pattern, Tuple
 
 dbg: bool = False
 
@@ -22,7 +26,632 @@ class SexprError(ValueError):
     pass
 
 
-def parse_sexp(sexp: str) -> Any:
+class _Syntax(NamedTuple):
+    """
+    Tokens and patterns used by the fast parser, for either str or bytes input.
+    """
+
+    lparen: Any
+    rparen: Any
+    quote: Any
+    escaped_quote: Any
+    backslash: Any
+    newline: Any
+    # quoted strings are replaced by this marker
+    marker: Any
+    spaced_marker: Any
+    # characters that are treated differently by `term_regex` and `split()`
+    unsupported: Tuple[Any, ...]
+    # an opening quote directly following an atom (e.g. `abc"def"`) is part of that atom
+    quote_in_atom: Pattern
+
+
+def _make_syntax(convert) -> _Syntax:
+    return _Syntax(
+        lparen=convert("("),
+        rparen=convert(")"),
+        quote=convert('"'),
+        escaped_quote=convert('\\"'),
+        backslash=convert("\\"),
+        newline=convert("\n"),
+        marker=convert("\x00"),
+        spaced_marker=convert(" \x00 "),
+        unsupported=tuple(convert(char) for char in "^\x1c\x1d\x1e\x1f"),
+        quote_in_atom=re.compile(convert(r"\x00(?<=[^\s()^\x00]\x00)")),
+    )
+
+
+_STR_SYNTAX = _make_syntax(str)
+_BYTES_SYNTAX = _make_syntax(lambda text: text.encode("ascii"))
+
+# numbers are only recognized if followed by a space, newline or closing parenthesis,
+# the other characters that end a token for `split()` are translated to a tab and the
+# digits to "0", so that a number followed by one of them contains b"0\t"
+_number_table = bytes.maketrans(b"123456789(\r\x0b\x0c", b"000000000\t\t\t\t")
+
+_float_regex = re.compile(r"[+-]?\d+\.\d+")
+_int_regex = re.compile(r"-?\d+")
+_term_regex = re.compile(term_regex)
+
+# the text is tokenized in chunks of roughly this size, to keep the token lists small
+_CHUNK_SIZE = 1 << 20
+
+_OPEN = object()
+_CLOSE = object()
+_QUOTED = object()
+
+
+def parse_sexp(sexp: str, index_heads: bool = False) -> Any:
+    """
+    Parse an s-expression into nested lists of strings, ints and floats.
+
+    The result is identical to `parse_sexp_regex`, but the text is scanned in a
+    single pass and the tree is built with an explicit stack. Unusual parts of the
+    input (unbalanced quotes or stray characters, numbers not followed by whitespace
+    or a parenthesis, ...) are tokenized with `term_regex`. Invalid input is handed
+    over to `parse_sexp_regex`, which reports the error.
+
+    With `index_heads`, the lists are `SexprList`s, which can be searched with
+    `find` and `find_all` without scanning them.
+    """
+    result = _build_tree(_lex(sexp, _STR_SYNTAX), index_heads)
+    if result is None:
+        result = parse_sexp_regex(sexp)
+        if index_heads:
+            result = _with_heads(result)
+    return result
+
+
+def parse_sexp_file(filename: str, index_heads: bool = False) -> Any:
+    """
+    Parse the s-expression in the given file.
+
+    The result is the same as `parse_sexp(open(filename).read())`, but the file is
+    memory-mapped and only the strings and atoms that end up in the tree are
+    decoded, so the whole file is never held in memory as a str.
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SexprError('No or empty expression')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # open() would translate the line endings, also inside of strings
+            if data.find(b"\r") < 0:
+                result = _build_tree(_lex(data, _BYTES_SYNTAX), index_heads)
+                if result is not None:
+                    return result
+
+            # unusual input, use the str parser
+            text = str(data[:], "utf-8")
+    return parse_sexp(text.replace("\r\n", "\n").replace("\r", "\n"), index_heads)
+
+
+def _split_quoted(text, syntax: _Syntax) -> Optional[Tuple[List[Any], List[Any]]]:
+    """
+    Split the text into the parts outside and inside of quoted strings.
+
+    Returns None if the quotes are unbalanced.
+    """
+    segments = text.split(syntax.quote)
+    if syntax.escaped_quote not in text:
+        if len(segments) % 2 == 0:
+            return None
+        return (segments[0::2], segments[1::2])
+
+    # a quote preceded by a backslash does not end a string
+    outside = [segments[0]]
+    strings = []
+    i = 1
+    while i < len(segments):
+        quoted = segments[i]
+        while quoted.endswith(syntax.backslash) and i + 1 < len(segments):
+            i += 1
+            quoted += syntax.quote + segments[i]
+        if i + 1 >= len(segments):
+            return None
+        strings.append(quoted.replace(syntax.escaped_quote, syntax.quote))
+        outside.append(segments[i + 1])
+        i += 2
+    return (outside, strings)
+
+
+def _atom_value(token: str) -> Any:
+    if _float_regex.fullmatch(token):
+        return float(token)
+    if _int_regex.fullmatch(token):
+        return int(token)
+    return token
+
+
+class _Converted(dict):
+    """
+    Maps tokens to their values, every distinct token is converted only once.
+    """
+
+    def __init__(self, convert, initial=()):
+        super().__init__(initial)
+        self.convert = convert
+
+    def __missing__(self, token):
+        value = self[token] = self.convert(token)
+        return value
+
+
+def _regex_values(text: str, final: bool) -> Optional[List[Any]]:
+    """
+    Tokenize the text with `term_regex`, like `parse_sexp_regex` does.
+
+    Returns the values of the tokens, with `_OPEN` and `_CLOSE` for the parentheses.
+    Returns None if the text is not the end of the input and a quote is part of an
+    atom, since the text might then end inside of a quoted string.
+    """
+    values: List[Any] = []
+    append = values.append
+    for match in _term_regex.finditer(text):
+        lparen, rparen, float_num, integer_num, quoted_str, bare_str = match.groups()
+        if lparen:
+            append(_OPEN)
+        elif rparen:
+            append(_CLOSE)
+        elif bare_str is not None:
+            if not final and '"' in bare_str:
+                return None
+            append(bare_str)
+        elif quoted_str is not None:
+            append(quoted_str.replace('\\"', '"'))
+        elif float_num:
+            append(float(float_num))
+        elif integer_num:
+            append(int(integer_num))
+    return values
+
+
+def _lex(data, syntax: _Syntax) -> Iterator[Tuple[List[Any], Optional[Dict[Any, Any]], Iterator[str]]]:
+    """
+    Split the text (a str, or bytes/mmap with `_BYTES_SYNTAX`) into tokens, chunk by chunk.
+
+    Yields the tokens of each chunk, a dict mapping them to their values and an
+    iterator over the quoted strings. Chunks that `split()` would tokenize
+    differently than `term_regex` are tokenized with `_regex_values` instead, the
+    dict is then None and the tokens are their values.
+    """
+    decode = syntax is _BYTES_SYNTAX
+    values = _Converted(
+        (lambda token: _atom_value(token.decode("ascii"))) if decode else _atom_value,
+        {syntax.lparen: _OPEN, syntax.rparen: _CLOSE, syntax.marker: _QUOTED},
+    )
+    strings_cache = _Converted((lambda string: string.decode("utf-8")) if decode else str)
+
+    size = len(data)
+    start = 0
+    while start < size:
+        # tokens never contain a newline, so chunks end after one (outside of any string)
+        chunk_start = start
+        end = data.find(syntax.newline, start + _CHUNK_SIZE)
+        while True:
+            end = size if end < 0 else end + 1
+            chunk = data[start:end]
+            if end >= size or (chunk.count(syntax.quote) - chunk.count(syntax.escaped_quote)) % 2 == 0:
+                break
+            end = data.find(syntax.newline, end)
+        start = end
+
+        split = None if syntax.marker in chunk else _split_quoted(chunk, syntax)
+        if split is not None:
+            (outside_parts, strings) = split
+            # every quoted string is replaced by a marker
+            outside = syntax.marker.join(outside_parts)
+            if (
+                outside.isascii()
+                and not outside[-1:].isdigit()
+                and not any(char in outside for char in syntax.unsupported)
+                and not syntax.quote_in_atom.search(outside)
+                and b"0\t" not in (outside if decode else outside.encode("ascii")).translate(_number_table)
+            ):
+                tokens = (
+                    syntax.spaced_marker.join(outside_parts)
+                    .replace(syntax.lparen, b" ( " if decode else " ( ")
+                    .replace(syntax.rparen, b" ) " if decode else " ) ")
+                    .split()
+                )
+                yield (tokens, values, map(strings_cache.__getitem__, strings))
+                continue
+
+        # unusual input, tokenized like `parse_sexp_regex` does
+        tokens = _regex_values(str(chunk, "utf-8") if decode else chunk, end >= size)
+        if tokens is None:
+            # the chunk might end inside of a quoted string, take the rest of the input
+            rest = data[chunk_start:]
+            tokens = _regex_values(str(rest, "utf-8") if decode else rest, True)
+            start = size
+        yield (tokens, None, iter(()))
+
+
+class SexprList(list):
+    """
+    A list of a tree parsed with `index_heads`.
+
+    `heads` maps the first element of the child lists to the child lists, in
+    their order. It is None for lists without child lists. Modifying the list
+    drops the index, the list itself is searched from then on. Changes to the
+    child lists (e.g. replacing their first element) are not noticed.
+    """
+
+    heads: Optional[Dict[Any, List["SexprList"]]] = None
+
+
+def _dropping_heads(name: str):
+    method = getattr(list, name)
+
+    def modify(self, *args, **kwargs):
+        self.heads = None
+        return method(self, *args, **kwargs)
+
+    modify.__name__ = name
+    return modify
+
+
+# the methods that change the elements of the list
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(SexprList, _name, _dropping_heads(_name))
+
+
+def _add_head(parent: SexprList, child: List[Any]) -> None:
+    if child and not isinstance(child[0], list):
+        if parent.heads is None:
+            parent.heads = {}
+        parent.heads.setdefault(child[0], []).append(child)
+
+
+def _with_heads(sexp: Any) -> Any:
+    """
+    Convert nested lists into `SexprList`s.
+    """
+    if not isinstance(sexp, list):
+        return sexp
+    result = SexprList(map(_with_heads, sexp))
+    for child in result:
+        if isinstance(child, list):
+            _add_head(result, child)
+    return result
+
+
+def find_all(node: List[Any], head: Any) -> List[Any]:
+    """
+    Returns the child lists of the node that start with `head`.
+    """
+    heads = getattr(node, "heads", None)
+    if heads is not None:
+        return list(heads.get(head, ()))
+    return [child for child in node if isinstance(child, list) and child and child[0] == head]
+
+
+def find(node: Optional[List[Any]], *heads: Any) -> Optional[List[Any]]:
+    """
+    Returns the first child list of the node that starts with the first head,
+    then its first child list that starts with the second head and so on.
+    For example `find(text, "effects", "font")`.
+
+    Returns None if there is no such list.
+    """
+    for head in heads:
+        if node is None:
+            return None
+        index = getattr(node, "heads", None)
+        if index is not None:
+            children = index.get(head)
+            node = children[0] if children else None
+        else:
+            node = next(
+                (child for child in node if isinstance(child, list) and child and child[0] == head), None
+            )
+    return node
+
+
+def _build_tree(chunks, index_heads: bool = False) -> Any:
+    """
+    Build the tree from the output of `_lex`.
+
+    Returns None for invalid input, whose error is reported by `parse_sexp_regex`.
+    """
+    # the tree has no reference cycles, the garbage collector would only walk the
+    # lists built so far over and over again
+    collect = gc.isenabled()
+    gc.disable()
+    try:
+        return _build_lists(chunks, index_heads)
+    finally:
+        if collect:
+            gc.enable()
+
+
+def _build_lists(chunks, index_heads: bool) -> Any:
+    tree: List[Any] = SexprList() if index_heads else []
+    current = tree
+    stack: List[List[Any]] = []
+    push = stack.append
+    pop = stack.pop
+    # SexprList.append() would drop the index that is built here
+    append = list.append
+
+    for (tokens, values, quoted) in chunks:
+        token_values = iter(tokens) if values is None else map(values.__getitem__, tokens)
+        for value in token_values:
+            if value is _OPEN:
+                child: List[Any] = SexprList() if index_heads else []
+                append(current, child)
+                push(current)
+                current = child
+            elif value is _CLOSE:
+                if not stack:
+                    # the expression ends here, anything after it is an error
+                    if next(token_values, None) is not None or any(rest for (rest, _, _) in chunks):
+                        return None
+                    break
+                if index_heads:
+                    _add_head(stack[-1], current)
+                current = pop()
+            elif value is _QUOTED:
+                append(current, next(quoted))
+            else:
+                append(current, value)
+
+    # lists that are not closed at the end of the input
+    while index_heads and stack:
+        _add_head(stack[-1], current)
+        current = pop()
+
+    if len(tree) == 0:
+        raise SexprError('No or empty expression')
+
+    if len(tree) > 1:
+        raise SexprError('Missing initial opening parenthesis')
+
+    return tree[0]
+
+
+_event_regex = re.compile(
+    rb"""(?x)
+    \s*(?:
+        (\()|
+        (\))|
+        ([+-]?\d+\.\d+(?=[\ \)\r\n]))|
+        (\-?\d+(?=[\ \)\r\n]))|
+        "((?:[^"]|(?<=\\)")*)"|
+        ([^(^)\s]+)
+       )"""
+)
+
+
+# bytes that end an unquoted atom, a quote directly following one of them opens a string
+_separators = b"()^ \t\n\r\x0b\x0c"
+_closing_quote_regex = re.compile(rb'(?<!\\)"')
+
+
+class _ChunkScanner:
+    """
+    Finds the positions up to which a growing buffer can be tokenized by
+    `_event_regex` with the same result as the whole input. The state (quoted
+    string or not) is kept across chunks, so every byte is only scanned once.
+    """
+
+    def __init__(self):
+        # the buffer is scanned up to this position
+        self.scanned = 0
+        # start of a quoted string that is not closed yet
+        self.string_start: Optional[int] = None
+        # end of the last closed quoted string, -1 if there is none
+        self.string_end = -1
+
+    def _opens_string(self, buffer: bytes, quote: int) -> bool:
+        # a quote in an unquoted atom (e.g. `abc"def"`) is part of that atom
+        return quote == 0 or quote == self.string_end or buffer[quote - 1] in _separators
+
+    def safe_end(self, buffer: bytes) -> int:
+        """
+        Returns a position in the buffer that no token spans, or 0 if there is none.
+        """
+        position = self.scanned
+        if self.string_start is not None:
+            position = self.string_start + 1
+        while True:
+            if self.string_start is None:
+                quote = buffer.find(b'"', position)
+                if quote < 0:
+                    break
+                if not self._opens_string(buffer, quote):
+                    position = quote + 1
+                    continue
+                self.string_start = quote
+                position = quote + 1
+            match = _closing_quote_regex.search(buffer, position)
+            if match is None:
+                break
+            self.string_start = None
+            position = self.string_end = match.end()
+        self.scanned = len(buffer)
+
+        # cut after the last separator or string that is not part of a quoted string
+        limit = len(buffer) if self.string_start is None else self.string_start
+        start = max(self.string_end, 0)
+        end = max(buffer.rfind(separator, start, limit) for separator in _separators) + 1
+        return max(end, self.string_end, 0)
+
+    def trim(self, end: int) -> None:
+        """
+        The first `end` bytes were removed from the buffer.
+        """
+        self.scanned -= end
+        if self.string_start is not None:
+            self.string_start -= end
+        self.string_end = self.string_end - end if self.string_end >= end else -1
+
+
+def iter_sexp_events(
+    source, chunk_size: int = 1 << 16, raw_atoms: bool = False
+) -> Iterator[Tuple[str, Any, int]]:
+    """
+    Read an s-expression incrementally, without building the nested lists.
+
+    `source` is a file opened in binary mode or an iterable of bytes. Yields
+    (event, value, offset) tuples, where offset is the byte offset of the token:
+
+    - ("open", keyword, offset) for an opening parenthesis, keyword is the first
+      element of the list if that is not a list itself (otherwise None)
+    - ("atom", value, offset) for every other string, int or float
+    - ("close", None, offset) for a closing parenthesis
+
+    With `raw_atoms`, numbers are not converted and every value is the text of the
+    token as a string (without the quotes of quoted strings).
+
+    Lists that are still open at the end of the input are closed at its end.
+    """
+    if hasattr(source, "read"):
+        chunks = iter(lambda: source.read(chunk_size), b"")
+    else:
+        chunks = iter(source)
+
+    buffer = b""
+    scanner = _ChunkScanner()
+    offset = 0
+    depth = 0
+    # offset of an opening parenthesis whose keyword is not known yet
+    pending = None
+    eof = False
+    while not eof:
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            end = len(buffer)
+        else:
+            buffer += chunk
+            end = scanner.safe_end(buffer)
+            if end == 0:
+                continue
+
+        for match in _event_regex.finditer(buffer, 0, end):
+            lparen, rparen, float_num, integer_num, quoted_str, bare_str = match.groups()
+            position = offset + match.start(match.lastindex)
+
+            if lparen:
+                if pending is not None:
+                    yield ("open", None, pending)
+                pending = position
+                depth += 1
+                continue
+
+            if rparen:
+                if pending is not None:
+                    yield ("open", None, pending)
+                    pending = None
+                if depth == 0:
+                    raise SexprError(f'Unbalanced closing parenthesis at position {position}')
+                depth -= 1
+                yield ("close", None, position)
+                continue
+
+            if bare_str is not None:
+                value = bare_str.decode("utf-8")
+            elif quoted_str is not None:
+                value = quoted_str.replace(b'\\"', b'"').decode("utf-8")
+                position -= 1
+            elif raw_atoms:
+                value = (float_num or integer_num).decode("utf-8")
+            elif float_num:
+                value = float(float_num)
+            else:
+                value = int(integer_num)
+
+            if pending is not None:
+                yield ("open", value, pending)
+                pending = None
+            else:
+                yield ("atom", value, position)
+
+        offset += end
+        buffer = buffer[end:]
+        scanner.trim(end)
+
+    if pending is not None:
+        yield ("open", None, pending)
+    for _ in range(depth):
+        yield ("close", None, offset)
+
+
+def parse_sexp_range(f, start: int, end: int) -> Any:
+    """
+    Parse a part of a file opened in binary mode, e.g. from the offset of an "open"
+    event up to the offset of its "close" event (see `iter_sexp_events`).
+    """
+    f.seek(start)
+    return parse_sexp(f.read(end + 1 - start).decode("utf-8"))
+
+
+def fingerprint(sexp) -> str:
+    """
+    Returns a digest of an s-expression (str, bytes or mmap) that only depends on
+    its parsed content.
+
+    The formatting makes no difference: neither whitespace, nor the quoting of
+    strings, nor the representation of numbers (`1.27` and `1.270`, `0` and `0.0`).
+    """
+    h = hashlib.sha1()
+    syntax = _STR_SYNTAX if isinstance(sexp, str) else _BYTES_SYNTAX
+    encoded: Dict[Any, bytes] = {}
+    for (tokens, values, strings) in _lex(sexp, syntax):
+        parts = []
+        for token in tokens:
+            if values is None:
+                parts.append(_fingerprint_value(token))
+                continue
+            value = values[token]
+            if value is _QUOTED:
+                parts.append(_fingerprint_atom(next(strings)))
+                continue
+            part = encoded.get(token)
+            if part is None:
+                part = encoded[token] = _fingerprint_value(value)
+            parts.append(part)
+        h.update(b"".join(parts))
+    return h.hexdigest()
+
+
+def _fingerprint_value(value: Any) -> bytes:
+    if value is _OPEN:
+        return b"("
+    if value is _CLOSE:
+        return b")"
+    return _fingerprint_atom(value)
+
+
+def _fingerprint_atom(value: Any) -> bytes:
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        return b"s%d:%s" % (len(data), data)
+    # equal numbers have the same digest, independent of their type (but huge ints
+    # can not be represented as float)
+    number = float(value) + 0.0
+    if number != value:
+        return b"i%d;" % value
+    return b"n%s;" % repr(number).encode("ascii")
+
+
+def parse_sexp_regex(sexp: str) -> Any:
+    """
+    Reference implementation of `parse_sexp`, based on `term_regex`.
+    """
     re_iter = re.finditer(term_regex, sexp)
     rv = list(_parse_sexp_internal(re_iter))
 
@@ -88,22 +717,40 @@ def SexprItem(val: Any, key: Optional[str] = None) -> str:
 
 
 class SexprBuilder:
-    def __init__(self, key):
+    def __init__(self, key, out=None):
+        """
+        The text is written to the file object `out`, or collected for `output` and
+        `write` if not given.
+        """
         self.indent: int = 0
-        self.output: str = ""
+        self._chunks: List[str] = []
+        self._write = self._chunks.append if out is None else out.write
         self.items = []
         if key is not None:
             self.startGroup(key, newline=False)
 
+    @property
+    def output(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks[:] = ["".join(self._chunks)]
+        return "".join(self._chunks)
+
+    def write(self, f) -> None:
+        """
+        Write the collected text to a file object.
+        """
+        f.writelines(self._chunks)
+
     def _indent(self) -> None:
-        self.output += " " * 2 * self.indent
+        self._write(" " * 2 * self.indent)
 
     def _newline(self) -> None:
-        self.output += "\n"
+        self._write("\n")
 
     def _addItems(self) -> None:
-        self.output += " ".join(str(i) for i in self.items)
-        self.items = []
+        if self.items:
+            self._write(" ".join(str(i) for i in self.items))
+            self.items = []
 
     def startGroup(
         self, key: Optional[Any] = None, newline: bool = True, indent: bool = False
@@ -114,9 +761,9 @@ class SexprBuilder:
         if newline:
             self._newline()
             self._indent()
-        self.output += "("
+        self._write("(")
         if key:
-            self.output += str(key) + " "
+            self._write(str(key) + " ")
 
     def endGroup(self, newline: bool = True) -> None:
         self._addItems()
@@ -125,7 +772,7 @@ class SexprBuilder:
             if self.indent > 0:
                 self.indent -= 1
             self._indent()
-        self.output += ")"
+        self._write(")")
 
     def addOptItem(self, key, item, newline: bool = True, indent: bool = False):
         if item in [None, 0, False]:
@@ -166,19 +813,33 @@ class SexprBuilder:
             self.indent -= 1
 
 
+# characters that require a string to be quoted, the same as the regex class [\s()]
+_QUOTE_CHARS = frozenset(
+    "() \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2028\u2029\u202f\u205f\u3000"
+    + "".join(chr(c) for c in range(0x2000, 0x200B))
+)
+
+
 def build_sexp(exp, indent='  ') -> str:
     # Special case for multi-values
     if isinstance(exp, list):
-        joined = '('
+        parts = ['(']
+        length = 1
+        child_indent = f'{indent}  '
         for i, elem in enumerate(exp):
-            if 1 <= i <= 5 and len(joined) < 120 and not isinstance(elem, list):
-                joined += ' '
-            elif i >= 1:
-                joined += '\n' + indent
-            joined += build_sexp(elem, indent=f'{indent}  ')
-        return joined + ')'
-
-    if isinstance(exp, str) and (len(exp) == 0 or re.search(r"[\s\(\)]", exp)):
+            if i == 0:
+                separator = ''
+            elif i <= 5 and length < 120 and not isinstance(elem, list):
+                separator = ' '
+            else:
+                separator = '\n' + indent
+            part = separator + build_sexp(elem, indent=child_indent)
+            parts.append(part)
+            length += len(part)
+        parts.append(')')
+        return ''.join(parts)
+
+    if isinstance(exp, str) and (len(exp) == 0 or not _QUOTE_CHARS.isdisjoint(exp)):
         return '"%s"' % exp.replace('"', r'\"')
     elif isinstance(exp, float):
         return str(exp)
@@ -197,39 +858,60 @@ def build_sexp(exp, indent='  ') -> str:
             return str(exp)
 
 
-def format_sexp(sexp: str, indentation_size: int = 2, max_nesting: int = 2) -> str:
-    out = ''
+def format_sexp(sexp: str, indentation_size: int = 2, max_nesting: int = 2, out=None) -> Optional[str]:
+    """
+    Format an s-expression, with every list up to `max_nesting` on its own line.
+
+    The text is written to the file object `out` if given (and None is returned).
+    """
+    chunks: List[str] = []
+    write = chunks.append if out is None else out.write
+    # the last character written, the space after an atom is only written
+    # once it is clear that it is not stripped
+    last = ''
+    space = False
     n = 0
     for match in re.finditer(term_regex, sexp):
-        indentation = "" if out[-1:] != ")" else " "
+        tail = ' ' if space else last
+        indentation = "" if tail != ")" else " "
         lparen, rparen, float_num, integer_num, quoted_str, bare_str = match.groups()
         if lparen:
-            if out:
+            if tail:
                 if n <= max_nesting:
-                    if out[-1] == ' ':
-                        out = out[:-1]
+                    space = False
                     indentation = '\n' + (' ' * indentation_size * n)
-                else:
-                    if out[-1] == ')':
-                        out += ' '
+                elif tail == ')':
+                    write(' ')
             n += 1
-            out += indentation + '('
+            token = '('
         elif rparen:
-            if out and out[-1] == ' ':
-                out = out[:-1]
+            space = False
             n -= 1
-            out += indentation + ')'
+            token = ')'
         elif float_num:
-            out += indentation + float_num + ' '
+            token = float_num
         elif integer_num:
-            out += indentation + integer_num + ' '
+            token = integer_num
         elif quoted_str is not None:
-            out += f'{indentation}"{quoted_str}" '
+            token = f'"{quoted_str}"'
         elif bare_str is not None:
-            out += indentation + bare_str + ' '
+            token = bare_str
+        else:
+            continue
+
+        if space:
+            write(' ')
+        write(indentation + token)
+        last = token[-1]
+        space = not (lparen or rparen)
+
+    if space:
+        write(' ')
+    write('\n')
 
-    out += '\n'
-    return out
+    if out is None:
+        return ''.join(chunks)
+    return None
 
 
 if __name__ == "__main__":
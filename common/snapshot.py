@@ -0,0 +1,407 @@
+"""
+Binary snapshots of loaded libraries and footprints.
+
+A snapshot stores the objects of a loaded file in a compact binary form, which
+loads much faster than parsing the s-expression file again. Loading a snapshot
+never executes code from the file: it only contains numbers, strings, lists,
+dicts and the fields of the classes that the caller allows.
+
+The values are stored by column, e.g. the x coordinates of all pins of a library
+are one array of doubles. Lists and dicts are stored as the lengths of all lists
+plus one column with all items, values of different types are split into one
+column per type. So loading runs a few Python operations per column and not per
+value.
+
+The file starts with a magic string, the format version and the SHA-256 of the
+rest of the file, so damaged snapshots are rejected instead of loading wrong
+objects.
+
+All numbers are little-endian. A column is a kind byte, the number of values
+(uint32) and the data of its kind:
+
+- `Z`: None values, no data
+- `F`, `I`, `B`: float64, int64 and bool (uint8) values
+- `J`: string ids of the decimal digits of ints that do not fit into int64
+- `S`: string ids (int32), -1 is None
+- `R`: string id of the class name, object ids of the class (int32), -1 is None
+- `L`, `T`: lengths of lists or tuples (uint32), followed by the column of items
+- `K`: lengths of dicts (uint32), followed by the columns of keys and values
+- `M`: number of columns, index of the column of each value (uint8), followed
+  by the columns of the values by type
+"""
+
+import dataclasses
+import hashlib
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+MAGIC = b"KLUSNAP\n"
+
+# increase when the layout of the file changes
+FORMAT_VERSION = 2
+
+_DIGEST_SIZE = hashlib.sha256().digest_size
+
+_u32 = struct.Struct("<I")
+_i32 = struct.Struct("<i")
+
+_SCALARS = frozenset((type(None), bool, int, float, str))
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class SnapshotClass:
+    """
+    A class whose objects can be stored in a snapshot, as the values of `fields`.
+
+    The objects are created again with `build(*values)`, by default with the class
+    itself. A snapshot can only be loaded if the fields did not change.
+    """
+
+    def __init__(self, cls: type, fields: Sequence[str], build: Optional[Callable[..., Any]] = None):
+        self.cls: type = cls
+        self.name: str = cls.__name__
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.build: Callable[..., Any] = build or cls
+
+    @classmethod
+    def from_dataclass(cls, dataclass: type) -> "SnapshotClass":
+        """
+        Stores the fields that are arguments of the constructor.
+        """
+        return cls(dataclass, [f.name for f in dataclasses.fields(dataclass) if f.init])
+
+
+def _array(typecode: str, values: Any) -> bytes:
+    a = array(typecode, values)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a.tobytes()
+
+
+def _normal_type(t: type) -> type:
+    # subclasses of list and dict (e.g. sexpr.SexprList) are loaded as their base
+    if t is not list and issubclass(t, list):
+        return list
+    if t is not dict and issubclass(t, dict):
+        return dict
+    return t
+
+
+class _Writer:
+    def __init__(self, classes: Sequence[SnapshotClass]):
+        self.classes: Dict[type, SnapshotClass] = {c.cls: c for c in classes}
+        self.strings: Dict[str, int] = {}
+        # objects by class, and the index of each object by id()
+        self.objects: Dict[type, List[Any]] = {}
+        self.object_ids: Dict[int, int] = {}
+        # the classes referenced by the fields of each class (a dict as ordered set)
+        self.references: Dict[type, Dict[type, None]] = {}
+
+    def _string(self, s: str) -> int:
+        i = self.strings.get(s)
+        if i is None:
+            i = self.strings[s] = len(self.strings)
+        return i
+
+    def _collect(self, root: Any) -> None:
+        # find all objects of the registered classes
+        stack = [root]
+        while stack:
+            value = stack.pop()
+            t = type(value)
+            if t in self.classes:
+                if id(value) not in self.object_ids:
+                    objects = self.objects.setdefault(t, [])
+                    self.object_ids[id(value)] = len(objects)
+                    objects.append(value)
+                    for f in self.classes[t].fields:
+                        item = getattr(value, f)
+                        if type(item) not in _SCALARS:
+                            stack.append(item)
+            elif isinstance(value, (list, tuple)):
+                stack.extend(item for item in value if type(item) not in _SCALARS)
+            elif isinstance(value, dict):
+                stack.extend(value.keys())
+                stack.extend(value.values())
+
+    def _column(self, values: List[Any], out: bytearray, owner: Optional[type]) -> None:
+        # in the order of their first value, so the same objects give the same file
+        raw_types = dict.fromkeys(map(type, values))
+        types = set(map(_normal_type, raw_types))
+        count = _u32.pack(len(values))
+
+        # None among strings or objects is the id -1
+        if len(types) == 2 and type(None) in types:
+            t = (types - {type(None)}).pop()
+            if t is str:
+                ids = [-1 if v is None else self._string(v) for v in values]
+                out += b"S" + count + _array("i", ids)
+                return
+            if t in self.classes:
+                self._objects(t, values, out, owner)
+                return
+
+        if len(types) > 1:
+            groups: Dict[type, int] = {}
+            tag_of = {t: groups.setdefault(_normal_type(t), len(groups)) for t in raw_types}
+            tags = bytes(map(tag_of.__getitem__, map(type, values)))
+            out += b"M" + count + bytes((len(groups),)) + tags
+            for group in range(len(groups)):
+                self._column([v for (v, tag) in zip(values, tags) if tag == group], out, owner)
+            return
+
+        t = types.pop() if types else type(None)
+        if t is type(None):
+            out += b"Z" + count
+        elif t is float:
+            out += b"F" + count + _array("d", values)
+        elif t is int:
+            try:
+                data = _array("q", values)
+                out += b"I" + count + data
+            except OverflowError:
+                out += b"J" + count + _array("i", [self._string(str(v)) for v in values])
+        elif t is bool:
+            out += b"B" + count + bytes(values)
+        elif t is str:
+            out += b"S" + count + _array("i", map(self._string, values))
+        elif t in (list, tuple):
+            out += (b"L" if t is list else b"T") + count + _array("I", map(len, values))
+            self._column([item for value in values for item in value], out, owner)
+        elif t is dict:
+            out += b"K" + count + _array("I", map(len, values))
+            self._column([key for value in values for key in value.keys()], out, owner)
+            self._column([item for value in values for item in value.values()], out, owner)
+        elif t in self.classes:
+            self._objects(t, values, out, owner)
+        else:
+            raise SnapshotError(f"Objects of type {t.__name__} can not be stored in a snapshot")
+
+    def _objects(self, t: type, values: List[Any], out: bytearray, owner: Optional[type]) -> None:
+        if owner is not None:
+            self.references[owner][t] = None
+        ids = [-1 if v is None else self.object_ids[id(v)] for v in values]
+        out += b"R" + _u32.pack(len(values)) + _i32.pack(self._string(self.classes[t].name))
+        out += _array("i", ids)
+
+    def write(self, root: Any, kind: str) -> bytes:
+        self._collect(root)
+
+        tables = {}
+        for (t, objects) in self.objects.items():
+            snapshot_class = self.classes[t]
+            self.references[t] = {}
+            table = bytearray()
+            table += _i32.pack(self._string(snapshot_class.name))
+            table += _u32.pack(len(snapshot_class.fields))
+            table += _array("i", map(self._string, snapshot_class.fields))
+            table += _u32.pack(len(objects))
+            for f in snapshot_class.fields:
+                self._column([getattr(obj, f) for obj in objects], table, t)
+            tables[t] = table
+
+        body = bytearray(_u32.pack(len(tables)))
+        for t in self._class_order():
+            body += tables[t]
+        self._column([root], body, None)
+
+        strings = list(self.strings)
+        text = "".join(strings).encode("utf-8")
+        kind_data = kind.encode("utf-8")
+        content = bytearray(_u32.pack(len(kind_data)) + kind_data)
+        content += _u32.pack(len(strings)) + _array("I", map(len, strings))
+        content += _u32.pack(len(text)) + text
+        content += body
+        return MAGIC + _u32.pack(FORMAT_VERSION) + hashlib.sha256(content).digest() + content
+
+    def _class_order(self) -> List[type]:
+        # the referenced classes have to be loaded first
+        order: List[type] = []
+        done: Set[type] = set()
+        visiting: Set[type] = set()
+
+        def visit(t: type) -> None:
+            if t in done:
+                return
+            if t in visiting:
+                raise SnapshotError(f"Objects of class {t.__name__} reference each other")
+            visiting.add(t)
+            for r in self.references[t]:
+                visit(r)
+            visiting.discard(t)
+            done.add(t)
+            order.append(t)
+
+        for t in self.objects:
+            visit(t)
+        return order
+
+
+class _Reader:
+    def __init__(self, data: bytes, classes: Sequence[SnapshotClass]):
+        self.data = memoryview(data)
+        self.position: int = 0
+        self.classes: Dict[str, SnapshotClass] = {c.name: c for c in classes}
+        self.strings: List[Any] = []
+        # the objects of each class, with None as last item for the id -1
+        self.objects: Dict[str, List[Any]] = {}
+
+    def _read(self, size: int) -> memoryview:
+        start = self.position
+        self.position += size
+        if self.position > len(self.data):
+            raise SnapshotError("Snapshot is truncated")
+        return self.data[start:self.position]
+
+    def _u32(self) -> int:
+        return _u32.unpack(self._read(4))[0]
+
+    def _array(self, typecode: str, count: int) -> List[Any]:
+        a = array(typecode)
+        a.frombytes(self._read(count * a.itemsize))
+        if sys.byteorder != "little":
+            a.byteswap()
+        return a.tolist()
+
+    def _string_ids(self, count: int) -> List[Any]:
+        try:
+            return list(map(self.strings.__getitem__, self._array("i", count)))
+        except IndexError:
+            raise SnapshotError("Invalid string in snapshot") from None
+
+    def _column(self) -> List[Any]:
+        kind = bytes(self._read(1))
+        count = self._u32()
+        if kind == b"Z":
+            return [None] * count
+        if kind == b"F":
+            return self._array("d", count)
+        if kind == b"I":
+            return self._array("q", count)
+        if kind == b"J":
+            return [int(s) for s in self._string_ids(count)]
+        if kind == b"B":
+            return [b != 0 for b in self._read(count)]
+        if kind == b"S":
+            return self._string_ids(count)
+        if kind == b"R":
+            name = self._string_ids(1)[0]
+            if name not in self.objects:
+                raise SnapshotError(f"Invalid class in snapshot: {name}")
+            try:
+                return list(map(self.objects[name].__getitem__, self._array("i", count)))
+            except IndexError:
+                raise SnapshotError("Invalid object in snapshot") from None
+        if kind in (b"L", b"T", b"K"):
+            lengths = self._array("I", count)
+            offsets = [0, *accumulate(lengths)]
+            ranges = zip(offsets, offsets[1:])
+            items = self._column()
+            if kind == b"K":
+                values = self._column()
+                if len(items) != offsets[-1] or len(values) != offsets[-1]:
+                    raise SnapshotError("Invalid dicts in snapshot")
+                return [dict(zip(items[a:b], values[a:b])) for (a, b) in ranges]
+            if len(items) != offsets[-1]:
+                raise SnapshotError("Invalid lists in snapshot")
+            if kind == b"T":
+                return [tuple(items[a:b]) for (a, b) in ranges]
+            return [items[a:b] for (a, b) in ranges]
+        if kind == b"M":
+            group_count = self._read(1)[0]
+            tags = self._read(count).tolist()
+            groups = [iter(self._column()) for _ in range(group_count)]
+            try:
+                return [next(groups[tag]) for tag in tags]
+            except (IndexError, StopIteration):
+                raise SnapshotError("Invalid mixed values in snapshot") from None
+        raise SnapshotError(f"Invalid column in snapshot: {kind!r}")
+
+    def read(self, kind: str) -> Any:
+        if bytes(self._read(len(MAGIC))) != MAGIC:
+            raise SnapshotError("Not a snapshot file")
+        version = self._u32()
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"Snapshot format is version {version}, not {FORMAT_VERSION}")
+        digest = bytes(self._read(_DIGEST_SIZE))
+        if hashlib.sha256(self.data[self.position:]).digest() != digest:
+            raise SnapshotError("Snapshot is damaged")
+        file_kind = str(self._read(self._u32()), "utf-8")
+        if file_kind != kind:
+            raise SnapshotError(f'Snapshot contains "{file_kind}", not "{kind}"')
+
+        lengths = self._array("I", self._u32())
+        text = str(self._read(self._u32()), "utf-8")
+        offsets = [0, *accumulate(lengths)]
+        self.strings = [text[a:b] for (a, b) in zip(offsets, offsets[1:])]
+        # the id -1 is None
+        self.strings.append(None)
+
+        for _ in range(self._u32()):
+            name = self._string_ids(1)[0]
+            fields = tuple(self._string_ids(self._u32()))
+            snapshot_class = self.classes.get(name)
+            if snapshot_class is None:
+                raise SnapshotError(f"Objects of class {name} can not be loaded from a snapshot")
+            if fields != snapshot_class.fields:
+                raise SnapshotError(
+                    f"Fields of class {name} changed since the snapshot was written"
+                )
+            count = self._u32()
+            columns = [self._column() for _ in fields]
+            if any(len(column) != count for column in columns):
+                raise SnapshotError(f"Invalid objects of class {name} in snapshot")
+            if columns:
+                objects = list(map(snapshot_class.build, *columns))
+            else:
+                objects = [snapshot_class.build() for _ in range(count)]
+            objects.append(None)
+            self.objects[name] = objects
+
+        root = self._column()
+        if len(root) != 1 or self.position != len(self.data):
+            raise SnapshotError("Invalid snapshot")
+        return root[0]
+
+
+def dumps(root: Any, kind: str, classes: Sequence[SnapshotClass]) -> bytes:
+    """
+    Returns the snapshot of `root`, which may contain objects of `classes`.
+
+    `kind` names the content, it has to match when the snapshot is loaded.
+    Objects of the classes that are referenced more than once are stored
+    once, lists and dicts are stored as often as they are referenced.
+    """
+    return _Writer(classes).write(root, kind)
+
+
+def loads(data: bytes, kind: str, classes: Sequence[SnapshotClass]) -> Any:
+    """
+    Returns the root object of a snapshot.
+
+    raises SnapshotError if the data is no valid snapshot of this kind and classes
+    """
+    return _Reader(data, classes).read(kind)
+
+
+def save(filename: str, root: Any, kind: str, classes: Sequence[SnapshotClass]) -> None:
+    """
+    Write the snapshot of `root` to a file, see `dumps`.
+    """
+    data = dumps(root, kind, classes)
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+def load(filename: str, kind: str, classes: Sequence[SnapshotClass]) -> Any:
+    """
+    Returns the root object of a snapshot file, see `loads`.
+    """
+    with open(filename, "rb") as f:
+        return loads(f.read(), kind, classes)
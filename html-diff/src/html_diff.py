@@ -7,7 +7,6 @@ import traceback
 import warnings
 import sys
 import os
-import re
 import argparse
 import subprocess
 from pathlib import Path
@@ -25,6 +24,7 @@ except ImportError:
     if (common := Path(__file__).parent.parent.with_name('common').absolute()) not in sys.path:
         sys.path.insert(0, str(common))
 import kicad_sym
+from kicad_sym_index import SymbolIndex
 
 import print_fp_properties
 import print_sym_properties
@@ -116,22 +116,8 @@ def build_symlib_index(libfile):
     if not libfile.is_file():
         return
 
-    text = Path(libfile).read_text()
-    lineno = 0
-    last_start, last_name = 1, None
-    for match in re.finditer(r'\(\W*symbol\W*\s"(\S+)"\s|(\r?\n)', text, re.MULTILINE):
-        symbol_name, newline = match.groups()
-
-        if symbol_name and not re.fullmatch(r'.*_[0-9]+_[0-9]+', symbol_name):
-            if last_name:
-                yield last_name, (last_start, lineno)
-            last_name, last_start = symbol_name, lineno
-
-        # newlines might be embedded in between the symbol def, e.g. (symbol\n"FOO"
-        lineno += match.group(0).count('\n')
-
-    if last_name:
-        yield last_name, (last_start, lineno)
+    for entry in SymbolIndex(libfile):
+        yield entry.name, (entry.start_line, entry.end_line)
 
 
 def render_symbol_kicad_cli(libfile, symname, outdir):
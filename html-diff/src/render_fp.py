@@ -15,6 +15,7 @@ except ImportError:
         sys.path.insert(0, str(common))
 
 from kicad_mod import KicadMod
+from geometry import arcBoundingBox
 from svg_util import Tag, setup_svg, point_line_distance, bbox, add_bboxes
 
 
@@ -125,9 +126,7 @@ def render_arc(arc, **style):
     # Note: KiCad only supports clockwise arcs.
     r = math.hypot(cx-x1, cy-y1)
     d = f'M {x1:.6f} {y1:.6f} A {r:.6f} {r:.6f} 0 {large_arc} 1 {x2:.6f} {y2:.6f}'
-    # We just approximate the bbox here with that of a circle. Calculating precise arc bboxes is
-    # hairy, and unnecessary for our purposes.
-    yield (cx-r, cy-r, cx+r, cy+r), Tag('path', **style, d=d)
+    yield arcBoundingBox((x1, y1), (cx, cy), (x2, y2)), Tag('path', **style, d=d)
 
 
 def render_pad_circle(pad, layer, **style):
@@ -12,8 +12,8 @@ common = os.path.abspath(
 if common not in sys.path:
     sys.path.insert(0, common)
 
-from kicad_mod import KicadMod
 from print_color import PrintColor
+from sexpr import iter_sexp_events
 
 
 class Config:
@@ -210,20 +210,62 @@ class LibraryChecker:
         self.invalid_model_path = 0
         self.unused_wrl = 0
 
+    def read_footprint(self, filename):
+        """
+        Returns the first 3D model file and the attribute of a footprint.
+
+        Only the top level nodes of the footprint are looked at, the file is not
+        fully parsed.
+        """
+        model = None
+        version = 0
+        attribs = None
+
+        with open(filename, "rb") as f:
+            depth = 0
+            keyword = None
+            for event, value, _ in iter_sexp_events(f):
+                if event == "open":
+                    depth += 1
+                    if depth == 2:
+                        keyword = value
+                        if keyword == "attr":
+                            attribs = []
+                elif event == "close":
+                    depth -= 1
+                    if depth < 2:
+                        keyword = None
+                elif depth == 2:
+                    if keyword == "version":
+                        version = value
+                    elif keyword == "attr":
+                        attribs.append(value)
+                    elif keyword == "model" and model is None:
+                        model = value
+
+        # Note : see pcb_parser.cpp in KiCad source (and KicadMod._getAttributes)
+        attribute = "virtual"
+        if attribs is not None:
+            for tok in attribs:
+                if tok in ["smd", "through_hole"]:
+                    attribute = tok
+        elif version < 20200826:
+            attribute = "through_hole"
+
+        return (model, attribute)
+
     def parse_footprint(self, filename):
 
         # logger.info('Footprint: {f:s}'.format(f=os.path.basename(filename)))
         try:
-            footprint = KicadMod(filename)
+            (long_reference, attribute) = self.read_footprint(filename)
         except FileNotFoundError:
             logger.fatal(
                 "EXIT: problem reading footprint file {fn:s}".format(fn=filename)
             )
             sys.exit(1)
-        try:
-            long_reference = footprint.models[0]["file"]
-        except IndexError:
-            if footprint.attribute == "virtual":
+        if long_reference is None:
+            if attribute == "virtual":
                 # count as model found
                 self.model_found += 1
             else:
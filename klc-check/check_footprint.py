@@ -15,12 +15,19 @@ if common not in sys.path:
     sys.path.insert(0, common)
 
 from kicad_mod import KicadMod
+from parse_cache import open_cache
 from print_color import PrintColor
 from rulebase import Verbosity, logError
 from rules_footprint import get_all_footprint_rules
 from rules_footprint.rule import KLCRule
 
 
+def load_footprint(filename: str) -> KicadMod:
+    if cache:
+        return cache.load_footprint(filename)
+    return KicadMod(filename)
+
+
 def check_library(filename: str, rules, metrics: List[str], args) -> Tuple[int, int]:
     """
     Returns (error count, warning count)
@@ -35,10 +42,10 @@ def check_library(filename: str, rules, metrics: List[str], args) -> Tuple[int,
         return (1, 0)
 
     if args.errors:
-        module = KicadMod(filename)
+        module = load_footprint(filename)
     else:
         try:
-            module = KicadMod(filename)
+            module = load_footprint(filename)
         except Exception as e:
             printer.red("Could not parse footprint: %s. (%s)" % (filename, e))
             if args.verbose:
@@ -213,12 +220,18 @@ parser.add_argument(
 parser.add_argument(
     "-m", "--metrics", help="generate a metrics.txt file", action="store_true"
 )
+parser.add_argument(
+    "--cache-dir",
+    help="Directory to cache the parsed footprints in, to speed up checking unchanged files."
+    " Broken entries are parsed again, loading an entry never runs code from it",
+)
 
 args = parser.parse_args()
 if args.fixmore:
     args.fix = True
 
 printer = PrintColor(use_color=not args.nocolor)
+cache = open_cache(args.cache_dir)
 
 # Set verbosity globally
 verbosity: Verbosity = Verbosity.NONE
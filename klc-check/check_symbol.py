@@ -19,6 +19,8 @@ if common not in sys.path:
     sys.path.insert(0, common)
 
 from kicad_sym import KicadFileFormatError, KicadLibrary
+from kicad_sym_table import NUMPY_AVAILABLE
+from parse_cache import open_cache
 from print_color import PrintColor
 from rulebase import Verbosity, logError
 from rules_symbol import get_all_symbol_rules
@@ -36,6 +38,8 @@ class SymbolCheck:
         no_warnings: bool = False,
         silent: bool = False,
         log: bool = False,
+        cache_dir: Optional[str] = None,
+        parse_workers: int = 1,
     ):
         self.footprints = footprints
         self.printer = PrintColor(use_color=use_color)
@@ -46,6 +50,11 @@ class SymbolCheck:
         self.silent: bool = silent
         self.error_count: int = 0
         self.warning_count: int = 0
+        self.cache = open_cache(cache_dir)
+        # number of processes to parse a single library with
+        self.parse_workers: int = parse_workers
+        self.library_tables = None
+        self.library_inheritance = None
 
         # build a list of rules to work with
         self.rules: List[KLCRule] = []
@@ -68,6 +77,8 @@ class SymbolCheck:
         unittest_descrp = m.group(3)  # noqa: F841
         for rule in self.rules:
             rule.footprints_dir = self.footprints
+            rule.library_tables = self.library_tables
+            rule.library_inheritance = self.library_inheritance
             rule = rule(symbol)
             if unittest_rule == rule.name:
                 rule.check()
@@ -97,6 +108,8 @@ class SymbolCheck:
         first = True
         for rule in self.rules:
             rule.footprints_dir = self.footprints
+            rule.library_tables = self.library_tables
+            rule.library_inheritance = self.library_inheritance
             rule = rule(symbol)
 
             if self.verbosity.value > Verbosity.HIGH.value:
@@ -151,9 +164,25 @@ class SymbolCheck:
         )
         return (symbol_error_count, symbol_warning_count)
 
+    def use_library(self, library: KicadLibrary, tables: bool = True) -> None:
+        """
+        Provide the rules with data of the whole library of the next checked symbols.
+
+        Only with `tables` are all symbols of a lazily opened library parsed.
+        """
+        self.library_inheritance = library.get_inheritance()
+        # checks that support it are evaluated for all symbols of the library at once
+        self.library_tables = None
+        if tables and NUMPY_AVAILABLE:
+            self.library_tables = library.get_tables()
+
     @lru_cache(maxsize=None)
-    def _load_library(self, filename):
-        return KicadLibrary.from_file(filename)
+    def _load_library(self, filename, lazy: bool = False):
+        if lazy:
+            return KicadLibrary.open_lazy(filename)
+        if self.cache:
+            return self.cache.load_library(filename, workers=self.parse_workers)
+        return KicadLibrary.from_file(filename, workers=self.parse_workers)
 
     def check_library(
         self, filename: str, component=None, pattern=None, is_unittest: bool = False
@@ -170,7 +199,8 @@ class SymbolCheck:
             return (1, 0)
 
         try:
-            library = self._load_library(filename)
+            # only parse the symbols that are going to be checked
+            library = self._load_library(filename, lazy=bool(component or pattern))
         except KicadFileFormatError as e:
             self.printer.red("Could not parse library: %s. (%s)" % (filename, e))
             if self.verbosity:
@@ -178,6 +208,8 @@ class SymbolCheck:
                 traceback.print_exc()
             return (1, 0)
 
+        self.use_library(library, tables=not (component or pattern))
+
         for symbol in library.symbols:
             if component:
                 if component.lower() != symbol.name.lower():
@@ -217,6 +249,7 @@ def worker(
     footprints,
     args,
     i=0,
+    parse_workers: int = 1,
 ):
     # have one instance of SymbolCheck per worker
     c = SymbolCheck(
@@ -228,6 +261,8 @@ def worker(
         no_warnings=args.nowarnings,
         silent=args.silent,
         log=args.log,
+        cache_dir=args.cache_dir,
+        parse_workers=parse_workers,
     )
     c.printer.buffered = True
 
@@ -331,6 +366,11 @@ if __name__ == "__main__":
             ' "~/kicad/footprints/"'
         ),
     )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to cache the parsed libraries in, to speed up checking unchanged files."
+        " Broken entries are parsed again, loading an entry never runs code from it",
+    )
     args = parser.parse_args()
 
     #
@@ -382,7 +422,10 @@ if __name__ == "__main__":
 
     # create the workers
     lock = Lock()
-    for i in range(int(args.multiprocess) if args.multiprocess else 1):
+    n_workers = int(args.multiprocess) if args.multiprocess else 1
+    # with fewer files than workers, the libraries are parsed in parallel as well
+    parse_workers = max(1, n_workers // len(files))
+    for i in range(n_workers):
         p = Process(
             target=worker,
             args=(
@@ -395,6 +438,7 @@ if __name__ == "__main__":
                 footprints,
                 args,
                 i,
+                parse_workers,
             ),
         )
         jobs.append(p)
@@ -28,6 +28,7 @@ if common not in sys.path:
 
 import check_symbol
 from kicad_sym import KicadLibrary
+from parse_cache import open_cache
 from print_color import PrintColor
 from rulebase import Verbosity
 from sexpr import build_sexp, format_sexp
@@ -103,9 +104,15 @@ parser.add_argument(
         ' "~/kicad/footprints/"'
     ),
 )
+parser.add_argument(
+    "--cache-dir",
+    help="Directory to cache the parsed libraries in, to speed up checking unchanged files."
+    " Broken entries are parsed again, loading an entry never runs code from it",
+)
 
 (args, extra) = parser.parse_known_args()
 printer = PrintColor(use_color=not args.nocolor)
+cache = open_cache(args.cache_dir)
 
 if not args.new:
     ExitError("New file(s) not supplied")
@@ -153,7 +160,6 @@ sym_check = check_symbol.SymbolCheck(
 # iterate over all new libraries
 for lib_name in new_libs:
     lib_path = new_libs[lib_name]
-    new_lib = KicadLibrary.from_file(lib_path)
 
     # If library checksums match, we can skip entire library check
     if lib_name in old_libs:
@@ -168,6 +174,11 @@ for lib_name in new_libs:
             printer.light_green("Created library '{lib}'".format(lib=lib_name))
 
         # Check all the components!
+        if cache:
+            new_lib = cache.load_library(lib_path)
+        else:
+            new_lib = KicadLibrary.from_file(lib_path)
+        sym_check.use_library(new_lib)
         for sym in new_lib.symbols:
             if args.check:
                 (ec, wc) = sym_check.do_rulecheck(sym)
@@ -176,8 +187,11 @@ for lib_name in new_libs:
         continue
 
     # Library has been updated - check each component to see if it has been changed
+    # (symbols are only parsed if they have been changed)
     old_lib_path = old_libs[lib_name]
-    old_lib = KicadLibrary.from_file(old_lib_path)
+    new_lib = KicadLibrary.open_lazy(lib_path)
+    old_lib = KicadLibrary.open_lazy(old_lib_path)
+    inheritance = new_lib.get_inheritance()
 
     new_sym = {}
     old_sym = {}
@@ -216,6 +230,14 @@ for lib_name in new_libs:
                 )
             )
 
+        # an unchanged s-expression text means an unchanged symbol
+        if new_sym[symname].index_entry.hash == old_sym[symname].index_entry.hash:
+            continue
+        # a different formatting of the same content (whitespace, numbers, quotes)
+        # does not change the symbol either, there is no need to parse it
+        if new_sym[symname].fingerprint == old_sym[symname].fingerprint:
+            continue
+
         if new_sym[symname] != old_sym[symname]:
             if args.verbose:
                 printer.yellow(f"Changed '{lib_name}:{symname}'{derived_sym_info}")
@@ -230,13 +252,23 @@ for lib_name in new_libs:
 
                 printer.end_fold_section("symbol_diff")
 
+            # derived symbols change with their parent
+            affected = [(symname, derived_sym_info)]
+            if args.check_derived:
+                for child in inheritance.get_descendants(symname):
+                    affected.append((child.name, f" derived from {child.extends}"))
+                    if args.verbose:
+                        printer.yellow(
+                            f"Changed '{lib_name}:{child.name}' through its parent {symname}"
+                        )
+
             if args.design_breaking_changes:
                 pins_moved = 0
                 nc_pins_moved = 0
                 pins_missing = 0
                 nc_pins_missing = 0
                 for pin_old in old_sym[symname].pins:
-                    pin_new = new_sym[symname].get_pin_by_number(pin_old.num)
+                    pin_new = new_sym[symname].get_pins_by_number(pin_old.number)
                     if pin_new is None:
                         if pin_old.etype == "no_connect":
                             nc_pins_missing += 1
@@ -254,19 +286,22 @@ for lib_name in new_libs:
                             pins_moved += 1
 
                 if pins_moved > 0 or pins_missing > 0:
-                    design_breaking_changes += 1
-                    printer.light_purple(
-                        "Pins have been moved, renumbered or removed in symbol"
-                        f" '{lib_name}:{symname}'{derived_sym_info}"
-                    )
+                    for name, info in affected:
+                        design_breaking_changes += 1
+                        printer.light_purple(
+                            "Pins have been moved, renumbered or removed in symbol"
+                            f" '{lib_name}:{name}'{info}"
+                        )
                 elif nc_pins_moved > 0 or nc_pins_missing > 0:
-                    design_breaking_changes += 1
-                    printer.purple(
-                        "Normal pins ok but NC pins have been moved, renumbered or"
-                        f" removed in symbol '{lib_name}:{symname}'{derived_sym_info}"
-                    )
+                    for name, info in affected:
+                        design_breaking_changes += 1
+                        printer.purple(
+                            "Normal pins ok but NC pins have been moved, renumbered or"
+                            f" removed in symbol '{lib_name}:{name}'{info}"
+                        )
 
             if args.check:
+                sym_check.use_library(new_lib, tables=False)
                 (ec, wc) = sym_check.do_rulecheck(new_sym[symname])
                 if ec != 0:
                     errors += 1
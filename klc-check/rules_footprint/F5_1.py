@@ -122,48 +122,46 @@ class Rule(KLCRule):
                 pass
             elif "center" in graph:
                 for pad in self.module.pads:
-                    padComplex = complex(pad["pos"]["x"], pad["pos"]["y"])
+                    padComplex = complex(pad.pos.x, pad.pos.y)
                     padOffset = 0 + 0j
-                    if "offset" in pad["drill"]:
-                        if "x" in pad["drill"]["offset"]:
-                            padOffset = complex(
-                                pad["drill"]["offset"]["x"], pad["drill"]["offset"]["y"]
-                            )
+                    offset = pad.drill.get("offset")
+                    if offset:
+                        padOffset = complex(offset.x, offset.y)
 
                     edgesPad = {}
                     edgesPad[0] = (
-                        complex(pad["size"]["x"] / 2.0, pad["size"]["y"] / 2.0)
+                        complex(pad.size.x / 2.0, pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
                     edgesPad[1] = (
-                        complex(-pad["size"]["x"] / 2.0, -pad["size"]["y"] / 2.0)
+                        complex(-pad.size.x / 2.0, -pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
                     edgesPad[2] = (
-                        complex(pad["size"]["x"] / 2.0, -pad["size"]["y"] / 2.0)
+                        complex(pad.size.x / 2.0, -pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
                     edgesPad[3] = (
-                        complex(-pad["size"]["x"] / 2.0, pad["size"]["y"] / 2.0)
+                        complex(-pad.size.x / 2.0, pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
 
-                    vectorR = cmath.rect(1, cmath.pi / 180 * pad["pos"]["orientation"])
+                    vectorR = cmath.rect(1, cmath.pi / 180 * pad.pos.orientation)
                     for i in range(4):
                         edgesPad[i] = (edgesPad[i] - padComplex) * vectorR + padComplex
 
-                    centerComplex = complex(graph["center"]["x"], graph["center"]["y"])
-                    endComplex = complex(graph["end"]["x"], graph["end"]["y"])
+                    centerComplex = complex(graph.center.x, graph.center.y)
+                    endComplex = complex(graph.end.x, graph.end.y)
                     radius = abs(endComplex - centerComplex)
-                    if "circle" in pad["shape"]:
-                        distance = radius + pad["size"]["x"] / 2.0 + 0.075
+                    if "circle" in pad.shape:
+                        distance = radius + pad.size.x / 2.0 + 0.075
                         if abs(centerComplex - padComplex) < distance and abs(
                             centerComplex - padComplex
-                        ) > abs(-radius + pad["size"]["x"] / 2.0 + 0.075):
+                        ) > abs(-radius + pad.size.x / 2.0 + 0.075):
                             self.intersections.append({"pad": pad, "graph": graph})
                     else:
                         # if there are edges inside and outside the circle, we have an intersection
@@ -180,45 +178,43 @@ class Rule(KLCRule):
                 for pad in self.module.pads:
 
                     # Skip checks on NPTH and Connect holes
-                    if pad["type"] in ["np_thru_hole", "connect"]:
+                    if pad.type in ["np_thru_hole", "connect"]:
                         continue
 
-                    padComplex = complex(pad["pos"]["x"], pad["pos"]["y"])
+                    padComplex = complex(pad.pos.x, pad.pos.y)
                     padOffset = 0 + 0j
-                    if "offset" in pad["drill"]:
-                        if "x" in pad["drill"]["offset"]:
-                            padOffset = complex(
-                                pad["drill"]["offset"]["x"], pad["drill"]["offset"]["y"]
-                            )
+                    offset = pad.drill.get("offset")
+                    if offset:
+                        padOffset = complex(offset.x, offset.y)
 
                     edgesPad = {}
                     edgesPad[0] = (
-                        complex(pad["size"]["x"] / 2.0, pad["size"]["y"] / 2.0)
+                        complex(pad.size.x / 2.0, pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
                     edgesPad[1] = (
-                        complex(-pad["size"]["x"] / 2.0, -pad["size"]["y"] / 2.0)
+                        complex(-pad.size.x / 2.0, -pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
                     edgesPad[2] = (
-                        complex(pad["size"]["x"] / 2.0, -pad["size"]["y"] / 2.0)
+                        complex(pad.size.x / 2.0, -pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
                     edgesPad[3] = (
-                        complex(-pad["size"]["x"] / 2.0, pad["size"]["y"] / 2.0)
+                        complex(-pad.size.x / 2.0, pad.size.y / 2.0)
                         + padComplex
                         + padOffset
                     )
 
-                    vectorR = cmath.rect(1, cmath.pi / 180 * pad["pos"]["orientation"])
+                    vectorR = cmath.rect(1, cmath.pi / 180 * pad.pos.orientation)
                     for i in range(4):
                         edgesPad[i] = (edgesPad[i] - padComplex) * vectorR + padComplex
 
-                    startComplex = complex(graph["start"]["x"], graph["start"]["y"])
-                    endComplex = complex(graph["end"]["x"], graph["end"]["y"])
+                    startComplex = complex(graph.start.x, graph.start.y)
+                    endComplex = complex(graph.end.x, graph.end.y)
                     if endComplex.imag > startComplex.imag:
                         vector = endComplex - startComplex
                         padComplex = padComplex - startComplex
@@ -236,9 +232,9 @@ class Rule(KLCRule):
                     for i in range(4):
                         edgesPad[i] = edgesPad[i] * vectorR
 
-                    if "circle" in pad["shape"]:
+                    if "circle" in pad.shape:
                         distance = cmath.sqrt(
-                            (pad["size"]["x"] / 2.0) ** 2 - (padComplex.imag) ** 2
+                            (pad.size.x / 2.0) ** 2 - (padComplex.imag) ** 2
                         ).real
                         padMinX = padComplex.real - distance
                         padMaxX = padComplex.real + distance
@@ -269,8 +265,8 @@ class Rule(KLCRule):
                         or (padMaxX < length and padMaxX > 0)
                         or (padMaxX > length and padMinX < 0)
                     ):
-                        if "circle" in pad["shape"]:
-                            distance = pad["size"]["x"] / 2.0
+                        if "circle" in pad.shape:
+                            distance = pad.size.x / 2.0
                             padMin = padComplex.imag - distance
                             padMax = padComplex.imag + distance
                         else:
@@ -266,11 +266,7 @@ class Rule(KLCRule):
         # ensure all variables are set correctly
         if self.no3DModel:
             # model (default)
-            model_dict = {"file": self.model3D_expectedFullPath}
-            model_dict["pos"] = {"x": 0, "y": 0, "z": 0}
-            model_dict["scale"] = {"x": 1, "y": 1, "z": 1}
-            model_dict["rotate"] = {"x": 0, "y": 0, "z": 0}
-            module.models.append(model_dict)
+            module.addModel(self.model3D_expectedFullPath, (0, 0, 0), (1, 1, 1), (0, 0, 0))
             self.info(
                 "added default model '{model}' to footprint.".format(
                     model=self.model3D_expectedFullPath
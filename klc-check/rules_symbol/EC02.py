@@ -36,19 +36,21 @@ class Rule(KLCRule):
 
         (maxx, top, minx, bottom) = ctr.get_boundingbox()
 
+        # bounding boxes (maxx, maxy, minx, miny) of the pins on the top and bottom side
+        top_pins = self.component.get_pin_extents("D")
+        bottom_pins = self.component.get_pin_extents("U")
+
         # reference checking
 
         # If there is no pin in the top, the recommended position to ref is at top-center,
         # horizontally centered.
-        if not self.component.filter_pins(direction="D"):
+        if top_pins is None:
             self.recommended_ref_pos = {"posx": 0, "posy": (top + mil_to_mm(125))}
             self.recommended_ref_alignment = "center"
 
         # otherwise, the recommended is put it before the first pin x position, right-aligned
         else:
-            x = min(
-                [i.posx for i in self.component.filter_pins(direction="D")]
-            ) - mil_to_mm(100)
+            x = top_pins[2] - mil_to_mm(100)
             self.recommended_ref_pos = {"posx": x, "posy": (top + mil_to_mm(125))}
             self.recommended_ref_alignment = "right"
 
@@ -77,15 +79,13 @@ class Rule(KLCRule):
 
         # If there is no pin in the top, the recommended position to name is at top-center,
         # horizontally centered.
-        if not self.component.filter_pins(direction="D"):
+        if top_pins is None:
             self.recommended_name_pos = {"posx": 0, "posy": (top + mil_to_mm(50))}
             self.recommended_name_alignment = "center"
 
         # otherwise, the recommended is put it before the first pin x position, right-aligned
         else:
-            x = min(
-                [i.posx for i in self.component.filter_pins(direction="D")]
-            ) - mil_to_mm(100)
+            x = top_pins[2] - mil_to_mm(100)
             self.recommended_name_pos = {"posx": x, "posy": (top + mil_to_mm(50))}
             self.recommended_name_alignment = "right"
 
@@ -112,15 +112,13 @@ class Rule(KLCRule):
 
         # If there is no pin in the bottom, the recommended position to footprint is at
         # bottom-center, horizontally centered.
-        if not self.component.filter_pins(direction="U"):
+        if bottom_pins is None:
             self.recommended_fp_pos = {"posx": 0, "posy": (bottom - mil_to_mm(50))}
             self.recommended_fp_alignment = "center"
 
         # otherwise, the recommended is put it after the last pin x position, left-aligned
         else:
-            x = max(
-                [i.posx for i in self.component.filter_pins(direction="U")]
-            ) + mil_to_mm(50)
+            x = bottom_pins[0] + mil_to_mm(50)
             self.recommended_fp_pos = {"posx": x, "posy": (bottom - mil_to_mm(50))}
             self.recommended_fp_alignment = "left"
 
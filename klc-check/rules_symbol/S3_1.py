@@ -27,18 +27,13 @@ class Rule(KLCRule):
             if center_pl is not None:
                 (x, y) = center_pl.get_center_of_boundingbox()
             else:
-                pins = [pin for pin in self.component.pins if (pin.unit in [unit, 0])]
+                bbox = self.component.get_pin_boundingbox([0, unit])
 
                 # No pins? Ignore check.
                 # This can be improved to include graphical items too...
-                if not pins:
+                if bbox is None:
                     continue
-                x_pos = [pin.posx for pin in pins]
-                y_pos = [pin.posy for pin in pins]
-                x_min = min(x_pos)
-                x_max = max(x_pos)
-                y_min = min(y_pos)
-                y_max = max(y_pos)
+                (x_max, y_max, x_min, y_min) = bbox
 
                 # Center point average
                 x = (x_min + x_max) / 2
@@ -20,21 +20,20 @@ class Rule(KLCRule):
             * center_rect_polyline
         """
 
-        # no checks for power-symbols, graphical symbols or derived symbols
-        if (
-            self.component.is_power_symbol()
-            or self.component.is_graphic_symbol()
-            or self.component.extends is not None
-        ):
+        # derived symbols are checked with the body of the symbol they are derived from
+        component = self.get_effective_component()
+
+        # no checks for power-symbols or graphical symbols
+        if component.is_power_symbol() or component.is_graphic_symbol():
             return False
 
         # check if component has just one rectangle, if not, skip checking
-        self.center_rect_polyline = self.component.get_center_rectangle()
+        self.center_rect_polyline = component.get_center_rectangle()
         if self.center_rect_polyline is None:
             return False
 
         rectangle_need_fix = False
-        if self.component.is_small_component_heuristics():
+        if component.is_small_component_heuristics():
             if not math.isclose(self.center_rect_polyline.stroke_width, mil_to_mm(10)):
                 self.warning(
                     "Component outline is thickness {0}mil, recommended is {1}mil for"
@@ -63,7 +62,7 @@ class Rule(KLCRule):
                     self.center_rect_polyline.fill_type, "background"
                 )
             )
-            if self.component.is_small_component_heuristics():
+            if component.is_small_component_heuristics():
                 self.warning(msg)
                 self.warningExtra(
                     "exceptions are allowed for small symbols like resistor,"
@@ -12,10 +12,21 @@ class Rule(KLCRule):
 
         self.violating_pins: List[Pin] = []
 
+    def preselectPins(self, mask: str, *args) -> List[Pin]:
+        """
+        Returns the pins selected by a mask of the pin table of the library (see
+        `kicad_sym_table.PinTable`), or all pins if there is no table.
+        """
+        if self.library_tables is not None:
+            pins = self.library_tables.pins.get_selected(self.component, mask, *args)
+            if pins is not None:
+                return pins
+        return self.component.pins
+
     def checkPinOrigin(self, gridspacing: int = 100) -> bool:
         self.violating_pins = []
         err = False
-        for pin in self.component.pins:
+        for pin in self.preselectPins("off_grid", gridspacing):
             posx = mm_to_mil(pin.posx)
             posy = mm_to_mil(pin.posy)
             if (posx % gridspacing) != 0 or (posy % gridspacing) != 0:
@@ -48,7 +59,7 @@ class Rule(KLCRule):
     ) -> bool:
         self.violating_pins = []
 
-        for pin in self.component.pins:
+        for pin in self.preselectPins("unusual_length", warningPinLength):
             length = mm_to_mil(pin.length)
 
             err = False
@@ -35,14 +35,13 @@ class Rule(KLCRule):
         return min_pin_number
 
     def check(self) -> bool:
-        # no need to check this for a derived symbols
-        if self.component.extends is not None:
-            return False
+        # derived symbols are checked with the pins of the symbol they are derived from
+        component = self.get_effective_component()
 
         possible_power_pin_stacks = []
 
         # iterate over pinstacks
-        for (pos, pins) in self.component.get_pinstacks().items():
+        for (pos, pins) in component.get_pinstacks().items():
             # skip stacks with only one pin
             if len(pins) == 1:
                 continue
@@ -136,7 +135,7 @@ class Rule(KLCRule):
         # check the possible power pin_stacks
         special_stack_err = False
         for pos in possible_power_pin_stacks:
-            pins = self.component.get_pinstacks()[pos]
+            pins = component.get_pinstacks()[pos]
             min_pin_number = self.get_smallest_pin_number(pins)
 
             # 1. consists only of output and passive pins
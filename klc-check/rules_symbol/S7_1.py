@@ -88,6 +88,7 @@ class Rule(KLCRule):
                 newname = self.component.name[1:]
             self.info("FIX: change pin name to '" + newname + "'")
             self.component.pins[0].name = newname
+            self.component.invalidate_caches()
         if self.fixNoFootprint:
             self.info("FIX empty footprint association and FPFilters")
             self.component.get_property("Footprint").value = ""
@@ -1,4 +1,7 @@
-from kicad_sym import KicadSymbol, Pin, mm_to_mil
+from typing import Optional
+
+from kicad_sym import KicadSymbol, Pin, SymbolInheritance, mm_to_mil
+from kicad_sym_table import LibraryTables
 from rulebase import KLCRuleBase, Verbosity
 
 
@@ -32,7 +35,19 @@ class KLCRule(KLCRuleBase):
     """
 
     verbosity: Verbosity = Verbosity.NONE
+    # columnar tables and inheritance index of the library of the component, if available
+    library_tables: Optional[LibraryTables] = None
+    library_inheritance: Optional[SymbolInheritance] = None
 
     def __init__(self, component: KicadSymbol):
         super().__init__()
         self.component: KicadSymbol = component
+
+    def get_effective_component(self) -> KicadSymbol:
+        """
+        Returns the component, with the pins and graphics of its parent if it is
+        a derived symbol (see `SymbolInheritance.get_effective_symbol`).
+        """
+        if self.library_inheritance is None:
+            return self.component
+        return self.library_inheritance.get_effective_symbol(self.component)
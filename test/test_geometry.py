@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Tests of the arc geometry in common/geometry.py.
+
+The bounds of arcs are compared with the bounds of points sampled along the arc.
+
+Example usage:
+python3 test/test_geometry.py
+"""
+
+import math
+import os
+import random
+import sys
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+common = os.path.join(BASE_DIR, "common")
+
+if common not in sys.path:
+    sys.path.insert(0, common)
+
+from geometry import arcBoundingBox, arcCenter
+from kicad_mod import KicadMod
+
+
+def _pointOnCircle(center, r, angle):
+    return (center[0] + r * math.cos(angle), center[1] + r * math.sin(angle))
+
+
+def _sampledBounds(center, r, a_start, sweep, n):
+    points = [_pointOnCircle(center, r, a_start + sweep * k / n) for k in range(n + 1)]
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+class ArcGeometryTest(unittest.TestCase):
+    def assertBoundsAlmostEqual(self, bounds, expected, delta=1e-9):
+        for (a, b) in zip(bounds, expected):
+            self.assertAlmostEqual(a, b, delta=delta, msg=f"{bounds} != {expected}")
+
+    def test_sampled_arcs(self):
+        rng = random.Random(1)
+        n = 2000
+        for _ in range(500):
+            center = (rng.uniform(-50, 50), rng.uniform(-50, 50))
+            r = rng.uniform(0.01, 30)
+            a_start = rng.uniform(-7, 7)
+            sweep = rng.uniform(0.01, 2 * math.pi - 0.01) * rng.choice([1, -1])
+            start = _pointOnCircle(center, r, a_start)
+            mid = _pointOnCircle(center, r, a_start + 0.5 * sweep)
+            end = _pointOnCircle(center, r, a_start + sweep)
+
+            # the samples miss at most r * (1 - cos(sweep / n)) of an extreme
+            delta = r * (1 - math.cos(sweep / n)) + 1e-6
+            self.assertBoundsAlmostEqual(
+                arcBoundingBox(start, mid, end),
+                _sampledBounds(center, r, a_start, sweep, n),
+                delta,
+            )
+
+    def test_axis_aligned_start_angles(self):
+        # start and end exactly on an axis of the circle, in both directions
+        n = 2000
+        for quarter in range(-4, 5):
+            a_start = quarter * 0.5 * math.pi
+            for sweep in (0.5 * math.pi, -0.5 * math.pi, math.pi, -1.5 * math.pi, 0.3, -0.3):
+                start = _pointOnCircle((1, 2), 2.5, a_start)
+                mid = _pointOnCircle((1, 2), 2.5, a_start + 0.5 * sweep)
+                end = _pointOnCircle((1, 2), 2.5, a_start + sweep)
+                delta = 2.5 * (1 - math.cos(sweep / n)) + 1e-6
+                self.assertBoundsAlmostEqual(
+                    arcBoundingBox(start, mid, end),
+                    _sampledBounds((1, 2), 2.5, a_start, sweep, n),
+                    delta,
+                )
+
+        # a half circle from the top to the bottom through the right side
+        self.assertBoundsAlmostEqual(arcBoundingBox((0, -1), (1, 0), (0, 1)), (0, -1, 1, 1))
+
+    def test_full_circle(self):
+        self.assertEqual(arcCenter((1, 0), (-1, 0), (1, 0)), (0, 0))
+        self.assertBoundsAlmostEqual(arcBoundingBox((1, 0), (-1, 0), (1, 0)), (-1, -1, 1, 1))
+        self.assertBoundsAlmostEqual(arcBoundingBox((3, 5), (3, 1), (3, 5)), (1, 1, 5, 5))
+
+    def test_collinear_points(self):
+        self.assertIsNone(arcCenter((0, 0), (1, 1), (2, 2)))
+        self.assertEqual(arcBoundingBox((0, 0), (1, 1), (2, 2)), (0, 0, 2, 2))
+        self.assertEqual(arcBoundingBox((2, 0), (1, 0), (0, 0)), (0, 0, 2, 0))
+
+    def test_footprint_bounds(self):
+        # the silkscreen arc reaches beyond its end points
+        module = KicadMod(
+            os.path.join(BASE_DIR, "klc-check", "test_footprint.pretty", "Pass__F5.3__ARC_courtyard.kicad_mod")
+        )
+        for (layer, expected) in (
+            ("F.SilkS", (-2.2, -2.65, 1.2, 0.35)),
+            ("F.CrtYd", (-2.75, -2.8, 2.75, 0.75)),
+            ("F.Fab", (-1.5, -2.55, 1.5, 0.25)),
+        ):
+            bounds = module.geometricBoundingBox(layer)
+            self.assertBoundsAlmostEqual((bounds.xmin, bounds.ymin, bounds.xmax, bounds.ymax), expected)
+
+    def test_layer_changes(self):
+        # an item moved to another layer in place is found on its new layer
+        module = KicadMod(
+            os.path.join(
+                BASE_DIR, "klc-check", "test_footprint.pretty", "Pass__F5.3__Polygon_Courtyard.kicad_mod.kicad_mod"
+            )
+        )
+        self.assertEqual(len(module.filterPolysAsLines("F.CrtYd")), 4)
+        module.polys[0]["layer"] = "F.Fab"
+        self.assertEqual(module.filterPolysAsLines("F.CrtYd"), [])
+        self.assertEqual(len(module.filterPolysAsLines("F.Fab")), 4)
+        bounds = module.geometricBoundingBox("F.Fab")
+        self.assertBoundsAlmostEqual((bounds.xmin, bounds.ymin, bounds.xmax, bounds.ymax), (-1.48, -0.73, 1.48, 0.73))
+
+    def test_lines_of_rects(self):
+        # the lines are built for every call, changing them does not change later results
+        module = KicadMod(
+            os.path.join(
+                BASE_DIR, "klc-check", "test_footprint.pretty", "Pass__F5.3__Polygon_Courtyard.kicad_mod.kicad_mod"
+            )
+        )
+        lines = module.filterRectsAsLines("F.Fab")
+        self.assertEqual(len(lines), 4)
+        lines[0]["start"]["x"] = 100
+        self.assertEqual(module.filterRectsAsLines("F.Fab")[0]["start"]["x"], -0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+"""
+Tests of the s-expression parser in common/sexpr.py.
+
+`parse_sexp` and `parse_sexp_file` are compared with the reference parser
+`parse_sexp_regex`, for the KLC test libraries and for unusual input. Errors
+must have the same message.
+
+Example usage:
+python3 test/test_sexpr.py
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+common = os.path.join(BASE_DIR, "common")
+
+if common not in sys.path:
+    sys.path.insert(0, common)
+
+import sexpr
+from sexpr import SexprError, parse_sexp, parse_sexp_file, parse_sexp_regex
+
+EDGE_CASES = [
+    "",
+    "   \n",
+    "()",
+    "(a)",
+    "a",
+    "(a) b",
+    "(a))",
+    "(a)) ",
+    "(a))(b)",
+    "(a)) b",
+    ")",
+    "((a b)",
+    "(a (b (c",
+    '(a "b c" d)',
+    '(a "")',
+    '(a "b\\"c")',
+    '(a "b\\" c" "d")',
+    '(a "b\\\\" c)',
+    '(a "b\nc\n" d)',
+    '(a "b',
+    '(a "b\\"',
+    '(a abc"def" "x")',
+    '(a abc"def)',
+    '(a abc"def (b "c\nd" e)\n"f")',
+    '(a 12"x")',
+    '(a "x"12 "y""z")',
+    "(at 1.5 -2 +3.25 +5 -0 007 1.50)",
+    "(at 1.5(b) 2(c))",
+    "(at 1.5\t2\t)",
+    "(at 1\r\n2)",
+    "(at 1\x0c2 3\x0b)",
+    "(a ^b c^ ^)",
+    '(a ^"b")',
+    "(a \x00 b)",
+    "(a \x1c b\x1d)",
+    "(a \xe9\xe8 \"\xe9\" b\xa0c)",
+    "(a\n\t(b 1)\n\t(c \"d\")\n)\n",
+]
+
+
+class ParserTest(unittest.TestCase):
+    def setUp(self):
+        self.chunk_size = sexpr._CHUNK_SIZE
+
+    def tearDown(self):
+        sexpr._CHUNK_SIZE = self.chunk_size
+
+    def parse(self, parser, text):
+        try:
+            return ("tree", parser(text))
+        except SexprError as e:
+            return ("error", str(e))
+
+    def assertSameAsRegex(self, text):
+        expected = self.parse(parse_sexp_regex, text)
+        self.assertEqual(self.parse(parse_sexp, text), expected, repr(text))
+        self.assertEqual(self.parse(lambda text: parse_sexp(text, index_heads=True), text), expected, repr(text))
+
+        # the file is read without translating the line endings in strings
+        expected = self.parse(parse_sexp_regex, text.replace("\r\n", "\n").replace("\r", "\n"))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "test.kicad_sym")
+            with open(filename, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            self.assertEqual(self.parse(parse_sexp_file, filename), expected, repr(text))
+
+    def test_edge_cases(self):
+        for chunk_size in (1 << 20, 1, 2, 5):
+            sexpr._CHUNK_SIZE = chunk_size
+            for text in EDGE_CASES:
+                self.assertSameAsRegex(text)
+
+    def test_combined_edge_cases(self):
+        # unusual parts between usual ones, each of them in a chunk of its own
+        text = "(lib\n" + "".join(f"(case {i} {case}\n)\n(usual 1 2)\n" for (i, case) in enumerate(EDGE_CASES)) + ")\n"
+        for chunk_size in (1 << 20, 1, 20):
+            sexpr._CHUNK_SIZE = chunk_size
+            self.assertSameAsRegex(text)
+
+    def test_libraries(self):
+        filenames = glob.glob(os.path.join(BASE_DIR, "klc-check", "test_symbol", "**", "*.kicad_sym"), recursive=True)
+        filenames += glob.glob(os.path.join(BASE_DIR, "klc-check", "test_footprint.pretty", "*.kicad_mod"))
+        self.assertTrue(filenames)
+        for chunk_size in (1 << 20, 100):
+            sexpr._CHUNK_SIZE = chunk_size
+            for filename in filenames:
+                with open(filename, encoding="utf-8", newline="") as f:
+                    self.assertSameAsRegex(f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
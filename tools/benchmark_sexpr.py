@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""
+This script measures the speed of the s-expression parser.
+
+A synthetic library of the requested size is created by repeating the symbols
+of the given libraries (with renamed symbols). It is then parsed with the
+reference parser (`parse_sexp_regex`) and with `parse_sexp`, and the results
+are compared. Each run starts without any tree of the previous runs in memory.
+
+Example usage:
+python benchmark_sexpr.py --size 10 ../klc-check/test_symbol/*.kicad_sym
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+common = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.path.pardir, "common")
+)
+
+if common not in sys.path:
+    sys.path.insert(0, common)
+
+from sexpr import parse_sexp, parse_sexp_regex
+
+
+def build_library(filenames, size: int) -> str:
+    bodies = []
+    for filename in filenames:
+        with open(filename, encoding="utf-8") as f:
+            text = f.read()
+        # strip the header and the closing parenthesis of the library
+        start = text.find('(symbol "')
+        end = text.rfind(")")
+        if start >= 0:
+            bodies.append(text[start:end])
+
+    if not bodies:
+        print("No symbols found in the given libraries")
+        exit(1)
+
+    body = "".join(bodies)
+    parts = ['(kicad_symbol_lib\n\t(version 20231120)\n\t(generator "benchmark")\n\t']
+    length = 0
+    n = 0
+    while length < size:
+        prefix = f"B{n}_"
+        part = body.replace('(symbol "', f'(symbol "{prefix}').replace(
+            '(extends "', f'(extends "{prefix}'
+        )
+        parts.append(part)
+        length += len(part)
+        n += 1
+    parts.append(")\n")
+    return "".join(parts)
+
+
+def measure(func, text: str, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        duration = time.perf_counter() - start
+        # no tree is kept alive while the next one is built
+        del result
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the s-expression parser")
+    parser.add_argument(
+        "libraries",
+        nargs="*",
+        help="symbol libraries to build the benchmark input from (default: the KLC test libraries)",
+    )
+    parser.add_argument(
+        "-s", "--size", type=float, default=10, help="size of the benchmark input in MB (default: 10)"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="number of runs, the best one is reported (default: 3)"
+    )
+    args = parser.parse_args()
+
+    libraries = args.libraries
+    if not libraries:
+        libraries = sorted(
+            glob.glob(
+                os.path.join(os.path.dirname(__file__), os.path.pardir, "klc-check", "test_symbol", "*.kicad_sym")
+            )
+        )
+
+    text = build_library(libraries, int(args.size * 1024 * 1024))
+    print(f"Input: {len(text) / 1024 / 1024:.1f} MB, {text.count('(symbol ')} symbols")
+
+    reference_time = measure(parse_sexp_regex, text, args.repeat)
+    print(f"parse_sexp_regex: {reference_time:.3f} s")
+
+    parser_time = measure(parse_sexp, text, args.repeat)
+    print(f"parse_sexp:       {parser_time:.3f} s")
+    print(f"Speedup: {reference_time / parser_time:.1f}x")
+
+    if parse_sexp(text) != parse_sexp_regex(text):
+        print("ERROR: the parsers returned different results")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
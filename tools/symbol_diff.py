@@ -30,7 +30,8 @@ common = os.path.abspath(
 if common not in sys.path:
     sys.path.insert(0, common)
 
-from kicad_sym import KicadFileFormatError, KicadLibrary
+from kicad_sym import KicadFileFormatError
+from kicad_sym_index import SymbolIndex
 from sexpr import build_sexp, format_sexp
 
 
@@ -39,6 +40,17 @@ def error(message: str):
     exit(1)
 
 
+def load_symbol(libpath: str, name: str):
+    # only the requested symbol is parsed, not the whole library
+    try:
+        index = SymbolIndex(libpath)
+        if name not in index:
+            error(f"No symbol {name} found in library {libpath}")
+        return index.load_symbols([name]).symbols[0]
+    except KicadFileFormatError as e:
+        error(f"Could not parse library: {libpath}\n{e}")
+
+
 parser = argparse.ArgumentParser(
     description=(
         "Print diff of two symbols"
@@ -71,27 +83,8 @@ if not os.path.isfile(A_parts[0]):
 if not os.path.isfile(B_parts[0]):
     error(f"File does not exist: {B_parts[0]}")
 
-try:
-    A_lib = KicadLibrary.from_file(A_parts[0])
-except KicadFileFormatError as e:
-    error(f"Could not parse library: {A_parts[0]}\n{e}")
-
-try:
-    B_lib = KicadLibrary.from_file(B_parts[0])
-except KicadFileFormatError as e:
-    error(f"Could not parse library: {B_parts[0]}\n{e}")
-
-A_symbols = {sym.name: sym for sym in A_lib.symbols}
-B_symbols = {sym.name: sym for sym in B_lib.symbols}
-
-if not A_parts[1] in A_symbols:
-    error(f"No symbol {A_parts[1]} found in library {A_parts[0]}")
-
-if not B_parts[1] in B_symbols:
-    error(f"No symbol {B_parts[1]} found in library {B_parts[0]}")
-
-A = A_symbols[A_parts[1]]
-B = B_symbols[B_parts[1]]
+A = load_symbol(A_parts[0], A_parts[1])
+B = load_symbol(B_parts[0], B_parts[1])
 
 if args.parsed or not args.sexpr:
     if PYTEST_AVAILABLE: